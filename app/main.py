@@ -1,7 +1,9 @@
+import json
 import os
 
 import openai
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 
@@ -35,7 +37,15 @@ def metadata():
                 "method": "POST",
                 "request_body": ChatRequest.schema(),
                 "response_body": ChatResponse.schema(),
-            }
+            },
+            {
+                "name": "ask_llm_stream",
+                "description": "Send prompt to OpenAI, stream the answer (SSE)",
+                "url": "/v1/tool-invocations/ask_llm/stream",
+                "method": "POST",
+                "request_body": ChatRequest.schema(),
+                "response_content_type": "text/event-stream",
+            },
         ],
     }
 
@@ -52,6 +62,48 @@ def ask_llm(req: ChatRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _sse(data: dict, event: str | None = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+@app.post("/v1/tool-invocations/ask_llm/stream")
+def ask_llm_stream(req: ChatRequest):
+    """Server-Sent Events variant of ``ask_llm``.
+
+    Emits one ``data: {"delta": ...}`` event per token chunk, then an
+    ``event: done`` carrying the full text (``event: error`` on failure).
+    """
+    openai.api_key = os.environ["OPENAI_API_KEY"]
+    try:
+        stream = openai.chat.completions.create(
+            model=req.model,
+            messages=[{"role": "user", "content": req.prompt}],
+            stream=True,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    def events():
+        parts = []
+        try:
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    yield _sse({"delta": delta})
+        except Exception as e:
+            yield _sse({"detail": str(e)}, event="error")
+            return
+        yield _sse({"text": "".join(parts).strip()}, event="done")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.get("/", include_in_schema=False)
 async def root() -> dict[str, str]:
     """Root health endpoint."""
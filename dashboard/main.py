@@ -11,7 +11,7 @@ import sys
 import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, AsyncIterator, Dict, List
 
 import uvicorn
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
@@ -20,6 +20,7 @@ from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
 try:
+    from jarvys_dev.cycle_scheduler import append_event
     from jarvys_dev.langgraph_loop import run_loop
     from jarvys_dev.multi_model_router import MultiModelRouter
     from jarvys_dev.tools.memory import memory_search
@@ -249,7 +250,12 @@ class JarvysAgent:
 
     async def chat(self, user_message: str) -> str:
         """Chat interactif avec l'agent."""
+        return "".join([delta async for delta in self.chat_stream(user_message)])
+
+    async def chat_stream(self, user_message: str) -> AsyncIterator[str]:
+        """Chat interactif, la réponse est transmise au fil des tokens."""
         start_time = datetime.now()
+        parts: list[str] = []
 
         try:
             # Construire le contexte
@@ -271,7 +277,10 @@ Réponds de manière conversationnelle et informative. Si la question concerne:
 
 Réponse:"""
 
-            _response = self.router.generate(prompt, task_type="reasoning")
+            async for delta in self.router.astream(prompt, task_type="reasoning"):
+                parts.append(delta)
+                yield delta
+            response = "".join(parts)
 
             # Log la conversation
             self.metrics.log_conversation(user_message, response, context)
@@ -289,14 +298,12 @@ Réponse:"""
                 task_type="chat",
             )
 
-            return response
-
         except Exception as e:
             error_response = f"Désolé, j'ai rencontré une erreur: {str(e)}"
             self.metrics.log_conversation(
                 user_message, error_response, f"ERROR: {str(e)}"
             )
-            return error_response
+            yield ("\n" if parts else "") + error_response
 
     async def _build_context(self, message: str) -> str:
         """Construit le contexte pour la réponse."""
@@ -425,15 +432,20 @@ async def websocket_chat(websocket: WebSocket):
             user_message = message_data.get("message", "")
 
             if user_message:
-                # Générer la réponse
-                _response = await jarvys.chat(user_message)
+                # Transmettre les tokens dès leur arrivée
+                parts = []
+                async for delta in jarvys.chat_stream(user_message):
+                    parts.append(delta)
+                    await websocket.send_text(
+                        json.dumps({"type": "delta", "message": delta})
+                    )
 
-                # Envoyer la réponse
+                # Réponse complète en fin de flux
                 await websocket.send_text(
                     json.dumps(
                         {
                             "type": "response",
-                            "message": response,
+                            "message": "".join(parts),
                             "timestamp": datetime.now().isoformat(),
                         }
                     )
@@ -524,6 +536,22 @@ async def control_agent(action: dict):
         return {"error": str(e)}
 
 
+@app.post("/api/orchestrator/command")
+async def orchestrator_command(command: dict):
+    """Envoie une tâche prioritaire au planificateur de l'orchestrateur."""
+    try:
+        task = command.get("task", "").strip()
+        if not task:
+            return {"error": "Tâche manquante"}
+
+        # Lu par FileEventSource dans grok_orchestrator.py (JARVYS_EVENTS_FILE)
+        event = append_event("command", {"task": task})
+        return {"success": True, "queued_at": event["ts"]}
+
+    except Exception as e:
+        return {"error": str(e)}
+
+
 if __name__ == "__main__":
     print("🚀 Démarrage du Dashboard JARVYS_DEV...")
     print("📊 Interface disponible sur: http://localhost:8080")
@@ -29,7 +29,7 @@ import os
 import signal
 import sys
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional
 
 import uvicorn
 from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
@@ -39,6 +39,11 @@ from pydantic import BaseModel
 
 from supabase import Client, create_client
 
+try:  # optional dependency
+    from anthropic import AsyncAnthropic
+except Exception:  # pragma: no cover - package optional
+    AsyncAnthropic = None
+
 # Configuration GCP
 PORT = int(os.getenv("PORT", 8080))  # Cloud Run utilise PORT
 PROJECT_ID = os.getenv("GOOGLE_CLOUD_PROJECT", "doublenumerique-yann")
@@ -55,6 +60,11 @@ GITHUB_REPO = os.getenv("GITHUB_REPO", "appia-dev")
 
 # Configuration Anthropic
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
+ANTHROPIC_MODEL = os.getenv("ANTHROPIC_MODEL", "claude-sonnet-4-20250514")
+CHAT_SYSTEM_PROMPT = (
+    "Tu es JARVYS, orchestrateur autonome hébergé sur GCP. "
+    "Réponds de manière concise et utile."
+)
 
 # Logging configuration
 logging.basicConfig(
@@ -112,6 +122,12 @@ if SUPABASE_URL and SUPABASE_KEY:
 else:
     logger.warning("⚠️ Configuration Supabase manquante")
 
+# Client Anthropic asynchrone (réponses de chat en streaming)
+anthropic_client: Optional["AsyncAnthropic"] = None
+if AsyncAnthropic and ANTHROPIC_API_KEY:
+    anthropic_client = AsyncAnthropic(api_key=ANTHROPIC_API_KEY)
+    logger.info("✅ Client Anthropic initialisé")
+
 # Global state
 orchestrator_state = {
     "startup_time": datetime.now(),
@@ -206,6 +222,12 @@ async def log_activity(activity: str, details: Dict):
 
 async def process_chat_message(message: str, sender: str = "user") -> str:
     """Traite un message de chat et génère une réponse"""
+    return "".join([delta async for delta in stream_chat_message(message, sender)])
+
+
+async def stream_chat_message(message: str, sender: str = "user") -> AsyncIterator[str]:
+    """Traite un message de chat et transmet la réponse au fil des tokens"""
+    parts: List[str] = []
     try:
         orchestrator_state["processed_messages"] += 1
 
@@ -217,16 +239,32 @@ async def process_chat_message(message: str, sender: str = "user") -> str:
             },
         )
 
-        # Simulation d'intelligence (remplacer par vraie IA)
+        # Commandes connues : réponse immédiate, sinon Claude en streaming
+        response = None
         if "status" in message.lower():
             response = f"🤖 JARVYS Status: Actif depuis {get_uptime()}, {orchestrator_state['processed_messages']} messages traités."
         elif "task" in message.lower():
             response = f"🎯 {orchestrator_state['active_tasks']} tâches actives. Prêt pour nouvelles instructions."
         elif "help" in message.lower():
             response = "🆘 Commandes: 'status' (état), 'task' (tâches), 'analyze' (analyse repo)"
-        else:
+        elif anthropic_client is None:
             response = f"🤖 Message reçu: '{message}'. Je suis JARVYS, votre orchestrateur autonome sur GCP. Comment puis-je vous aider?"
 
+        if response is not None:
+            parts.append(response)
+            yield response
+        else:
+            async with anthropic_client.messages.stream(
+                model=ANTHROPIC_MODEL,
+                max_tokens=1024,
+                system=CHAT_SYSTEM_PROMPT,
+                messages=[{"role": "user", "content": message}],
+            ) as stream:
+                async for delta in stream.text_stream:
+                    parts.append(delta)
+                    yield delta
+            response = "".join(parts)
+
         # Stocker la réponse dans Supabase
         if supabase:
             try:
@@ -245,11 +283,10 @@ async def process_chat_message(message: str, sender: str = "user") -> str:
                 logger.error(f"❌ Erreur chat Supabase: {e}")
 
         await log_activity("chat_response_sent", {"response_length": len(response)})
-        return response
 
     except Exception as e:
         logger.error(f"❌ Erreur process_chat_message: {e}")
-        return f"❌ Erreur lors du traitement: {str(e)}"
+        yield ("\n" if parts else "") + f"❌ Erreur lors du traitement: {str(e)}"
 
 
 async def analyze_repository():
@@ -502,9 +539,15 @@ async def websocket_endpoint(websocket: WebSocket):
                 await websocket.send_json({"type": "pong"})
             elif data.get("type") == "chat":
                 message = data.get("message", "")
-                response = await process_chat_message(message, "dashboard_user")
+                # Transmettre les tokens dès leur arrivée
+                parts = []
+                async for delta in stream_chat_message(message, "dashboard_user"):
+                    parts.append(delta)
+                    await websocket.send_json(
+                        {"type": "chat_delta", "data": {"delta": delta}}
+                    )
                 await websocket.send_json(
-                    {"type": "chat_response", "data": {"response": response}}
+                    {"type": "chat_response", "data": {"response": "".join(parts)}}
                 )
             elif data.get("type") == "request_analysis":
                 await trigger_analysis()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+📬 JARVYS_AI - File de commandes prioritaire
+
+Les commandes des interfaces (texte, voix, email, dashboard) passent par
+une ``asyncio.PriorityQueue`` servie par un pool de workers. Les niveaux
+de priorité sont ceux de l'Intelligence Core (``high`` / ``medium`` /
+``low``) ; à priorité égale l'ordre d'arrivée est conservé.
+
+- contre-pression : la file est bornée, une soumission attend au plus
+  ``submit_timeout`` secondes une place libre puis lève
+  :class:`CommandQueueFull` ;
+- annulation : annuler le futur d'une commande (ou appeler
+  :meth:`CommandQueue.cancel`) la retire de la file, ou interrompt son
+  exécution si un worker l'a déjà prise ;
+- métriques : attente en file et temps de service par commande, agrégés
+  par niveau de priorité.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_LEVELS = {"high": 0, "medium": 1, "low": 2}
+
+
+class CommandQueueFull(Exception):
+    """File pleine : la commande n'a pas trouvé de place à temps"""
+
+
+@dataclass(order=True)
+class QueuedCommand:
+    """Commande en attente ; triée par (rang de priorité, ordre d'arrivée)"""
+
+    rank: int
+    seq: int
+    name: str = field(compare=False)
+    priority: str = field(compare=False)
+    fn: Callable[..., Awaitable[Any]] = field(compare=False, repr=False)
+    args: tuple = field(compare=False, repr=False)
+    future: asyncio.Future = field(compare=False, repr=False)
+    enqueued_at: float = field(compare=False)
+    started_at: Optional[float] = field(default=None, compare=False)
+    task: Optional[asyncio.Task] = field(default=None, compare=False, repr=False)
+
+    @property
+    def id(self) -> int:
+        return self.seq
+
+
+class CommandQueue:
+    """File prioritaire bornée servie par ``workers`` coroutines"""
+
+    def __init__(
+        self,
+        workers: int = 2,
+        maxsize: int = 100,
+        submit_timeout: Optional[float] = 5.0,
+        history_size: int = 100,
+    ):
+        self.workers = max(1, workers)
+        self.maxsize = maxsize
+        self.submit_timeout = submit_timeout
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue(maxsize)
+        self._seq = itertools.count(1)
+        self._pending: Dict[int, QueuedCommand] = {}
+        self._workers: List[asyncio.Task] = []
+        self.recent: deque = deque(maxlen=history_size)
+        self.counters = {"completed": 0, "failed": 0, "cancelled": 0, "rejected": 0}
+        self._by_priority = {
+            level: {"count": 0, "wait": 0.0, "service": 0.0, "max_wait": 0.0}
+            for level in PRIORITY_LEVELS
+        }
+
+    # -- cycle de vie ------------------------------------------------------
+    @property
+    def is_running(self) -> bool:
+        return any(not worker.done() for worker in self._workers)
+
+    def start(self):
+        """Démarrer les workers (à appeler depuis la boucle asyncio)"""
+        if self.is_running:
+            return
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"jarvys-command-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"📬 File de commandes démarrée ({self.workers} workers)")
+
+    async def close(self):
+        """Arrêter les workers et annuler les commandes en attente ou en cours"""
+        for item in list(self._pending.values()):
+            item.future.cancel()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info("📬 File de commandes arrêtée")
+
+    # -- soumission --------------------------------------------------------
+    async def enqueue(
+        self,
+        fn: Callable[..., Awaitable[Any]],
+        *args: Any,
+        priority: str = "low",
+        name: str = "",
+    ) -> QueuedCommand:
+        """Placer ``fn(*args)`` dans la file ; le résultat arrive dans ``future``"""
+        if priority not in PRIORITY_LEVELS:
+            priority = "low"
+        item = QueuedCommand(
+            rank=PRIORITY_LEVELS[priority],
+            seq=next(self._seq),
+            name=name,
+            priority=priority,
+            fn=fn,
+            args=args,
+            future=asyncio.get_running_loop().create_future(),
+            enqueued_at=time.perf_counter(),
+        )
+        try:
+            await asyncio.wait_for(self._queue.put(item), self.submit_timeout)
+        except asyncio.TimeoutError:
+            self.counters["rejected"] += 1
+            raise CommandQueueFull(
+                f"file de commandes pleine ({self.maxsize}) depuis "
+                f"{self.submit_timeout}s"
+            ) from None
+        self._pending[item.id] = item
+        item.future.add_done_callback(lambda _: self._on_done(item))
+        return item
+
+    async def submit(
+        self,
+        fn: Callable[..., Awaitable[Any]],
+        *args: Any,
+        priority: str = "low",
+        name: str = "",
+    ) -> Any:
+        """Mettre en file puis attendre le résultat de la commande"""
+        item = await self.enqueue(fn, *args, priority=priority, name=name)
+        # annuler l'appelant annule aussi la commande
+        return await item.future
+
+    def cancel(self, command_id: int) -> bool:
+        """Annuler une commande en attente ou en cours"""
+        item = self._pending.get(command_id)
+        if item is None:
+            return False
+        return item.future.cancel()
+
+    def _on_done(self, item: QueuedCommand):
+        self._pending.pop(item.id, None)
+        if item.future.cancelled():
+            self.counters["cancelled"] += 1
+            if item.task is not None:
+                item.task.cancel()
+
+    # -- exécution ---------------------------------------------------------
+    async def _worker(self, index: int):
+        while True:
+            item = await self._queue.get()
+            try:
+                if not item.future.done():  # annulée pendant l'attente
+                    await self._run(item)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, item: QueuedCommand):
+        item.started_at = time.perf_counter()
+        item.task = asyncio.create_task(item.fn(*item.args))
+        try:
+            # wait() n'annule pas la commande si seul le worker est annulé
+            await asyncio.wait({item.task})
+        except asyncio.CancelledError:
+            item.task.cancel()
+            item.future.cancel()
+            raise
+        finished = time.perf_counter()
+
+        if item.task.cancelled():
+            item.future.cancel()
+            status = "cancelled"
+        elif item.task.exception() is not None:
+            error = item.task.exception()
+            logger.error(f"❌ Commande {item.name or item.id} en échec: {error}")
+            if not item.future.done():
+                item.future.set_exception(error)
+            self.counters["failed"] += 1
+            status = "failed"
+        else:
+            if not item.future.done():
+                item.future.set_result(item.task.result())
+            self.counters["completed"] += 1
+            status = "completed"
+        self._record(item, finished, status)
+
+    def _record(self, item: QueuedCommand, finished: float, status: str):
+        wait = item.started_at - item.enqueued_at
+        service = finished - item.started_at
+        agg = self._by_priority[item.priority]
+        agg["count"] += 1
+        agg["wait"] += wait
+        agg["service"] += service
+        agg["max_wait"] = max(agg["max_wait"], wait)
+        self.recent.append(
+            {
+                "id": item.id,
+                "name": item.name,
+                "priority": item.priority,
+                "status": status,
+                "queue_wait_ms": round(wait * 1000, 2),
+                "service_ms": round(service * 1000, 2),
+            }
+        )
+
+    # -- divers ------------------------------------------------------------
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def get_stats(self) -> Dict[str, Any]:
+        by_priority = {}
+        for level, agg in self._by_priority.items():
+            n = agg["count"]
+            by_priority[level] = {
+                "count": n,
+                "avg_queue_wait_ms": round(agg["wait"] / n * 1000, 2) if n else None,
+                "max_queue_wait_ms": round(agg["max_wait"] * 1000, 2) if n else None,
+                "avg_service_ms": round(agg["service"] / n * 1000, 2) if n else None,
+            }
+        return {
+            "workers": self.workers,
+            "running": self.is_running,
+            "queued": self.qsize(),
+            "in_flight": sum(
+                1 for item in self._pending.values() if item.started_at is not None
+            ),
+            "maxsize": self.maxsize,
+            **self.counters,
+            "by_priority": by_priority,
+            "recent": list(self.recent)[-10:],
+        }
@@ -30,7 +30,7 @@ class SupabaseDashboardIntegration:
     def __init__(self, jarvys_ai_instance, config: Dict[str, Any] = None):
         """Initialiser l'intégration dashboard"""
         self.jarvys_ai = jarvys_ai_instance
-        self.config
+        self.config = config or {}
 
         # Configuration Supabase
         self.dashboard_url = (
@@ -227,7 +227,7 @@ class SupabaseDashboardIntegration:
 
                 # Traiter la commande
                 if self.jarvys_ai:
-                    _response = await self.jarvys_ai.process_command(
+                    response = await self.jarvys_ai.process_command(
                         command, "dashboard"
                     )
                     logger.info(f"📤 Réponse envoyée: {response[:50]}...")
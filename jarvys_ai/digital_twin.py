@@ -4,13 +4,17 @@
 Module de personnalisation et apprentissage continu
 """
 
+import asyncio
 import json
 import logging
+import os
 import uuid
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict
 
+from .interaction_log import InteractionLog
+
 logger = logging.getLogger(__name__)
 
 
@@ -28,17 +32,31 @@ class DigitalTwin:
 
     def __init__(self, config: Dict[str, Any] = None):
         """Initialiser le jumeau numérique"""
-        self.config
+        self.config = config or {}
         self.user_profile = {}
-        self.interaction_history = []
         self.preferences = {}
         self.context_memory = {}
         self.is_initialized = False
 
         # Chemin de sauvegarde local
-        self.data_dir = Path.home() / ".jarvys_ai"
+        self.data_dir = Path(self.config.get("data_dir", Path.home() / ".jarvys_ai"))
         self.profile_file = self.data_dir / "user_profile.json"
-        self.history_file = self.data_dir / "interaction_history.json"
+        self.history_file = self.data_dir / "interaction_history.jsonl"
+        # Ancien format (tableau JSON réécrit à chaque commande), migré au chargement
+        self.legacy_history_file = self.data_dir / "interaction_history.json"
+
+        # Journal append-only + compteurs incrémentaux
+        self.history = InteractionLog(
+            self.history_file,
+            max_entries=self.config.get("history_max_entries", 1000),
+        )
+        self.interaction_history = self.history.entries
+
+        # Sauvegarde du profil regroupée (debounce) et hors boucle d'événements
+        self.profile_flush_delay = float(self.config.get("profile_flush_delay", 2.0))
+        self._profile_dirty = False
+        self._profile_flush_task = None
+        self.profile_writes = 0
 
         logger.info("👤 Digital Twin initialisé")
 
@@ -46,7 +64,7 @@ class DigitalTwin:
         """Initialiser le jumeau numérique"""
         try:
             # Créer répertoire de données
-            self.data_dir.mkdir(exist_ok=True)
+            self.data_dir.mkdir(parents=True, exist_ok=True)
 
             # Charger profil existant
             await self._load_user_profile()
@@ -83,19 +101,13 @@ class DigitalTwin:
     async def _load_interaction_history(self):
         """Charger l'historique des interactions"""
         try:
-            if self.history_file.exists():
-                with open(self.history_file, "r", encoding="utf-8") as f:
-                    self.interaction_history = json.load(f)
-                    logger.info(
-                        f"📚 {len(self.interaction_history)} interactions chargées"
-                    )
+            if self.history.load(legacy_file=self.legacy_history_file):
+                logger.info(f"📚 {len(self.history)} interactions chargées")
             else:
-                self.interaction_history = []
                 logger.info("📝 Nouvel historique d'interactions")
 
         except Exception as e:
             logger.error(f"❌ Erreur chargement historique: {e}")
-            self.interaction_history = []
 
     async def _create_default_profile(self):
         """Créer profil par défaut pour Yann Abadie"""
@@ -124,7 +136,14 @@ class DigitalTwin:
         await self.save_profile()
         logger.info("👤 Profil par défaut créé pour Yann Abadie")
 
-    async def update_interaction(self, command: str, response: str, interface: str):
+    async def update_interaction(
+        self,
+        command: str,
+        response: str,
+        interface: str,
+        intent: str = None,
+        intent_source: str = None,
+    ):
         """Enregistrer une nouvelle interaction"""
         try:
             interaction = {
@@ -135,19 +154,21 @@ class DigitalTwin:
                 "interface": interface,
                 "sentiment": self._analyze_sentiment(command),
                 "category": self._categorize_interaction(command),
+                # type retenu par l'Intelligence Core et son origine (llm,
+                # local, keywords, explicit) : seuls llm / explicit entraînent
+                # le classifieur
+                "intent": intent,
+                "intent_source": intent_source,
             }
 
-            self.interaction_history.append(interaction)
-
-            # Garder seulement les 1000 dernières interactions
-            if len(self.interaction_history) > 1000:
-                self.interaction_history = self.interaction_history[-1000:]
+            # Une ligne ajoutée au journal (1000 dernières gardées en mémoire)
+            self.history.append(interaction)
 
             # Apprendre de l'interaction
             await self._learn_from_interaction(interaction)
 
-            # Sauvegarder
-            await self.save_history()
+            # Profil sauvegardé en différé, une écriture par rafale
+            self._schedule_profile_flush()
 
             logger.info(f"📝 Interaction enregistrée: {interface}")
 
@@ -210,10 +231,8 @@ class DigitalTwin:
             sentiment = interaction["sentiment"]
 
             # Mettre à jour les préférences basées sur l'usage
-            if category not in self.preferences:
-                self.preferences[f"{category}_usage"] = 0
-
-            self.preferences[f"{category}_usage"] += 1
+            usage_key = f"{category}_usage"
+            self.preferences[usage_key] = self.preferences.get(usage_key, 0) + 1
 
             # Adapter le style de communication
             if sentiment == "negative":
@@ -226,29 +245,61 @@ class DigitalTwin:
         except Exception as e:
             logger.error(f"❌ Erreur apprentissage: {e}")
 
+    def _profile_snapshot(self) -> Dict[str, Any]:
+        # Copie prise dans la boucle : l'écriture se fait dans un thread
+        return {
+            "profile": dict(self.user_profile),
+            "preferences": dict(self.preferences),
+            "updated_at": datetime.now().isoformat(),
+        }
+
+    def _write_profile(self, data: Dict[str, Any]):
+        """Écriture atomique du profil (fichier temporaire puis remplacement)"""
+        tmp = self.profile_file.with_name(self.profile_file.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.profile_file)
+        self.profile_writes += 1
+
     async def save_profile(self):
         """Sauvegarder le profil utilisateur"""
         try:
-            data = {
-                "profile": self.user_profile,
-                "preferences": self.preferences,
-                "updated_at": datetime.now().isoformat(),
-            }
-
-            with open(self.profile_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-
+            self._profile_dirty = False
+            await asyncio.to_thread(self._write_profile, self._profile_snapshot())
             logger.debug("💾 Profil sauvegardé")
 
         except Exception as e:
             logger.error(f"❌ Erreur sauvegarde profil: {e}")
 
+    def _schedule_profile_flush(self):
+        """Marquer le profil modifié et programmer une sauvegarde différée"""
+        self._profile_dirty = True
+        if self._profile_flush_task and not self._profile_flush_task.done():
+            return  # une sauvegarde est déjà programmée
+        self._profile_flush_task = asyncio.get_running_loop().create_task(
+            self._flush_profile_later()
+        )
+
+    async def _flush_profile_later(self):
+        # Reboucle si le profil a encore changé pendant l'écriture
+        while self._profile_dirty:
+            await asyncio.sleep(self.profile_flush_delay)
+            if self._profile_dirty:
+                await self.save_profile()
+
+    async def flush_profile(self, force: bool = False):
+        """Sauvegarder tout de suite un profil modifié (annule le différé)"""
+        task, self._profile_flush_task = self._profile_flush_task, None
+        if task and not task.done():
+            task.cancel()
+        if self._profile_dirty or force:
+            await self.save_profile()
+
     async def save_history(self):
-        """Sauvegarder l'historique des interactions"""
+        """Compacter le journal des interactions"""
         try:
-            with open(self.history_file, "w", encoding="utf-8") as f:
-                json.dump(self.interaction_history, f, indent=2, ensure_ascii=False)
-
+            # Dans la boucle : aucun ajout concurrent pendant la réécriture
+            self.history.compact()
             logger.debug("💾 Historique sauvegardé")
 
         except Exception as e:
@@ -256,21 +307,19 @@ class DigitalTwin:
 
     async def save_state(self):
         """Sauvegarder l'état complet"""
-        await self.save_profile()
+        await self.flush_profile(force=True)
         await self.save_history()
         logger.info("💾 État complet sauvegardé")
 
     def get_user_context(self) -> Dict[str, Any]:
         """Obtenir le contexte utilisateur actuel"""
-        recent_interactions = (
-            self.interaction_history[-10:] if self.interaction_history else []
-        )
+        recent_interactions = self.history.recent(10)
 
         return {
             "profile": self.user_profile,
             "preferences": self.preferences,
             "recent_interactions": len(recent_interactions),
-            "total_interactions": len(self.interaction_history),
+            "total_interactions": len(self.history),
             "last_interaction": (
                 recent_interactions[-1]["timestamp"] if recent_interactions else None
             ),
@@ -279,15 +328,7 @@ class DigitalTwin:
 
     def _get_most_used_category(self) -> str:
         """Obtenir la catégorie la plus utilisée"""
-        if not self.interaction_history:
-            return "general"
-
-        categories = {}
-        for interaction in self.interaction_history:
-            category = interaction.get("category", "general")
-            categories[category] = categories.get(category, 0) + 1
-
-        return max(categories, key=categories.get)
+        return self.history.most_common_category()
 
     def get_personalized_response(self, base_response: str, context: str = "") -> str:
         """Personnaliser une réponse selon le profil"""
@@ -307,7 +348,12 @@ class DigitalTwin:
         return {
             "is_initialized": self.is_initialized,
             "profile_loaded": bool(self.user_profile),
-            "total_interactions": len(self.interaction_history),
+            "total_interactions": len(self.history),
+            "category_counts": dict(self.history.categories),
+            "sentiment_counts": dict(self.history.sentiments),
+            "history_lines_on_disk": self.history.lines_on_disk,
+            "history_compactions": self.history.compactions,
+            "profile_writes": self.profile_writes,
             "preferences_count": len(self.preferences),
             "data_dir": str(self.data_dir),
             "version": "1.0.0",
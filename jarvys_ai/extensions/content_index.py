@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+📝 JARVYS_AI - Recherche plein texte dans les documents
+
+Index inversé SQLite du contenu des fichiers (texte, Markdown, code, PDF
+si PyPDF2 est installé), classé par BM25. L'extraction et la
+tokenisation tournent dans un pool de processus ; seuls les fichiers
+ajoutés ou modifiés depuis la dernière synchronisation (taille / mtime
+fournis par :class:`FileIndex`) sont relus, par lots de ``SYNC_BATCH``
+fichiers écrits et validés avant d'analyser le lot suivant : la mémoire
+reste bornée quelle que soit la taille de l'arborescence. Le texte
+extrait est conservé compressé pour construire les extraits sans relire
+le disque, avec la liste des termes du document pour supprimer ses
+entrées par clé primaire.
+
+Les termes sont en minuscules et sans accents : « réunion » trouve
+« reunion » et inversement.
+"""
+
+import logging
+import math
+import multiprocessing
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+import zlib
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    length INTEGER NOT NULL,
+    text BLOB,
+    terms BLOB
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term, doc_id)
+) WITHOUT ROWID;
+"""
+
+TEXT_EXTENSIONS = set(
+    ".txt .md .rst .csv .log .tex .html .htm .xml .json .yaml .yml .toml .ini"
+    " .cfg .py .js .ts .java .c .h .cpp .go .rs .sh .sql .css".split()
+)
+PDF_EXTENSIONS = {".pdf"}
+MAX_FILE_SIZE = 5 * 1024 * 1024
+MAX_STORED_TEXT = 100_000  # caractères gardés pour les extraits
+SYNC_BATCH = 256  # fichiers analysés puis écrits par transaction
+K1 = 1.2
+B = 0.75
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+@lru_cache(maxsize=65536)
+def fold(word: str) -> str:
+    """Minuscules sans accents (« Réunion » -> « reunion »)"""
+    decomposed = unicodedata.normalize("NFKD", word.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text: str) -> List[str]:
+    return [fold(w) for w in WORD_RE.findall(text) if len(w) > 1]
+
+
+def is_indexable(path: str) -> bool:
+    suffix = os.path.splitext(path)[1].lower()
+    return suffix in TEXT_EXTENSIONS or suffix in PDF_EXTENSIONS
+
+
+def extract_text(path: str) -> Optional[str]:
+    """Texte d'un fichier ; ``None`` si non lisible ou format non géré"""
+    suffix = os.path.splitext(path)[1].lower()
+    try:
+        if suffix in PDF_EXTENSIONS:
+            try:
+                from PyPDF2 import PdfReader
+            except ImportError:
+                return None
+            reader = PdfReader(path)
+            return "\n".join(page.extract_text() or "" for page in reader.pages)
+        with open(path, "rb") as f:
+            raw = f.read(MAX_FILE_SIZE)
+        if b"\0" in raw[:1024]:
+            return None  # binaire
+        return raw.decode("utf-8", errors="replace")
+    except Exception as e:
+        logger.debug(f"📝 Extraction impossible {path}: {e}")
+        return None
+
+
+def _pack(text: str) -> bytes:
+    return zlib.compress(text.encode("utf-8"))
+
+
+def _unpack(blob: bytes) -> str:
+    return zlib.decompress(blob).decode("utf-8")
+
+
+def analyze_file(path: str) -> Tuple[str, Optional[str], Dict[str, int], int]:
+    """Exécuté dans le pool : (chemin, texte tronqué, fréquences, longueur)"""
+    text = extract_text(path)
+    if text is None:
+        return path, None, {}, 0
+    terms = tokenize(text)
+    return path, text[:MAX_STORED_TEXT], dict(Counter(terms)), len(terms)
+
+
+class ContentIndex:
+    """Index inversé persistant avec classement BM25"""
+
+    def __init__(self, db_path: Path, workers: Optional[int] = None):
+        self.db_path = Path(db_path)
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+        self._n_docs, self._avg_length = self._corpus_stats()
+        self.last_sync: Dict[str, Any] = {}
+
+    def _corpus_stats(self) -> Tuple[int, float]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*), AVG(length) FROM docs WHERE length > 0"
+            ).fetchone()
+        return row[0], row[1] or 0.0
+
+    # -- mise à jour -------------------------------------------------------
+    def sync(self, files: Iterable[Tuple[str, int, float]]) -> Dict[str, Any]:
+        """Aligner l'index sur ``(chemin, taille, mtime)`` des fichiers connus"""
+        start = time.perf_counter()
+        with self._lock:
+            known = {
+                row["path"]: (row["id"], row["size"], row["mtime"])
+                for row in self._conn.execute("SELECT id, path, size, mtime FROM docs")
+            }
+
+        todo, seen = [], set()
+        for path, size, mtime in files:
+            if not is_indexable(path) or size > MAX_FILE_SIZE:
+                continue
+            seen.add(path)
+            row = known.get(path)
+            if row is None or row[1] != size or row[2] != mtime:
+                todo.append((path, size, mtime))
+        removed = [known[path][0] for path in known.keys() - seen]
+        with self._lock, self._conn:
+            self._delete(removed)
+
+        # un lot analysé est écrit et validé avant l'analyse du suivant
+        for batch in self._analyze_batches(todo):
+            with self._lock, self._conn:
+                self._delete([known[path][0] for path, *_ in batch if path in known])
+                for path, size, mtime, analysis in batch:
+                    self._insert(path, size, mtime, analysis)
+        self._n_docs, self._avg_length = self._corpus_stats()
+
+        self.last_sync = {
+            "documents": self._n_docs,
+            "indexed": len(todo),
+            "removed": len(known.keys() - seen),
+            "duration": round(time.perf_counter() - start, 3),
+        }
+        return self.last_sync
+
+    def _insert(self, path: str, size: int, mtime: float, analysis: Tuple):
+        # fichier illisible gardé (longueur 0) : pas relu tant qu'inchangé
+        _, text, counts, length = analysis
+        cur = self._conn.execute(
+            "INSERT INTO docs (path, size, mtime, length, text, terms)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                path,
+                size,
+                mtime,
+                length,
+                _pack(text) if text else None,
+                _pack("\n".join(counts)) if counts else None,
+            ),
+        )
+        self._conn.executemany(
+            "INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)",
+            [(term, cur.lastrowid, tf) for term, tf in counts.items()],
+        )
+
+    def _delete(self, doc_ids: List[int]):
+        for doc_id in doc_ids:
+            row = self._conn.execute(
+                "SELECT terms FROM docs WHERE id = ?", (doc_id,)
+            ).fetchone()
+            if row is None:
+                continue
+            if row["terms"]:
+                self._conn.executemany(
+                    "DELETE FROM postings WHERE term = ? AND doc_id = ?",
+                    [(term, doc_id) for term in _unpack(row["terms"]).split("\n")],
+                )
+            self._conn.execute("DELETE FROM docs WHERE id = ?", (doc_id,))
+
+    def _analyze_batches(
+        self, todo: List[Tuple[str, int, float]]
+    ) -> Iterator[List[Tuple[str, int, float, Tuple]]]:
+        """Extraction + tokenisation en parallèle (processus séparés), par lots
+        de ``SYNC_BATCH`` : ``(chemin, taille, mtime, analyse)``"""
+        batches = [todo[i : i + SYNC_BATCH] for i in range(0, len(todo), SYNC_BATCH)]
+        done = 0
+        if self.workers > 1 and len(todo) >= 4:
+            try:
+                # spawn : pas de fork d'un processus multi-thread ; un seul
+                # pool pour tous les lots
+                ctx = multiprocessing.get_context("spawn")
+                with ProcessPoolExecutor(self.workers, mp_context=ctx) as pool:
+                    for batch in batches:
+                        paths = [path for path, _, _ in batch]
+                        chunk = max(1, len(paths) // (self.workers * 4))
+                        results = list(pool.map(analyze_file, paths, chunksize=chunk))
+                        done += 1
+                        yield [(*entry, r) for entry, r in zip(batch, results)]
+                return
+            except (OSError, BrokenProcessPool) as e:
+                logger.warning(
+                    f"⚠️ Pool d'indexation indisponible ({e}), mode séquentiel"
+                )
+        for batch in batches[done:]:
+            yield [(*entry, analyze_file(entry[0])) for entry in batch]
+
+    # -- recherche ---------------------------------------------------------
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Documents classés par BM25, avec un extrait autour du premier terme"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or not self._n_docs:
+            return []
+        n, avg = self._n_docs, self._avg_length or 1.0
+        scores: Counter = Counter()
+        with self._lock:
+            for term in terms:
+                rows = self._conn.execute(
+                    "SELECT p.doc_id, p.tf, d.length FROM postings p"
+                    " JOIN docs d ON d.id = p.doc_id WHERE p.term = ?",
+                    (term,),
+                ).fetchall()
+                if not rows:
+                    continue
+                idf = math.log(1 + (n - len(rows) + 0.5) / (len(rows) + 0.5))
+                for doc_id, tf, length in rows:
+                    norm = tf + K1 * (1 - B + B * length / avg)
+                    scores[doc_id] += idf * tf * (K1 + 1) / norm
+
+            results = []
+            for doc_id, score in scores.most_common(limit):
+                row = self._conn.execute(
+                    "SELECT path, text FROM docs WHERE id = ?", (doc_id,)
+                ).fetchone()
+                text = _unpack(row["text"]) if row["text"] else ""
+                results.append(
+                    {
+                        "path": row["path"],
+                        "name": Path(row["path"]).name,
+                        "score": round(score, 4),
+                        "snippet": self.snippet(text, set(terms)),
+                    }
+                )
+        return results
+
+    @staticmethod
+    def snippet(text: str, terms: set, width: int = 160) -> str:
+        """Passage autour de la première occurrence d'un terme recherché"""
+        for match in WORD_RE.finditer(text):
+            if fold(match.group()) in terms:
+                start = max(0, match.start() - width // 2)
+                end = min(len(text), match.end() + width // 2)
+                passage = " ".join(text[start:end].split())
+                prefix = "…" if start > 0 else ""
+                suffix = "…" if end < len(text) else ""
+                return f"{prefix}{passage}{suffix}"
+        return " ".join(text[:width].split())
+
+    # -- divers ------------------------------------------------------------
+    def __len__(self) -> int:
+        return self._n_docs
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "db_path": str(self.db_path),
+            "documents": self._n_docs,
+            "avg_length": round(self._avg_length, 1),
+            "workers": self.workers,
+            "last_sync": self.last_sync,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+🗂️ JARVYS_AI - Index de fichiers persistant
+
+Index SQLite des fichiers des répertoires de travail, clé = chemin complet
+(deux fichiers de même nom restent distincts). Il survit aux redémarrages :
+un rafraîchissement ne compare que taille et mtime et n'écrit que les
+fichiers ajoutés, modifiés ou supprimés.
+
+Les noms sont découpés en trigrammes :
+- recherche de sous-chaîne : fichiers qui possèdent tous les trigrammes
+  du terme, confirmés par ``instr`` ;
+- recherche floue (fautes de frappe) : candidats partageant assez de
+  trigrammes, y compris ceux de début et de fin de mot (``^bu``, ``et$``),
+  reclassés par similarité avec le nom et ses mots.
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    name_lower TEXT NOT NULL,
+    directory TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS name_trigrams (
+    tri TEXT NOT NULL,
+    file_id INTEGER NOT NULL,
+    PRIMARY KEY (tri, file_id)
+) WITHOUT ROWID;
+"""
+
+EXCLUDED_DIRS = {".git", ".hg", ".svn", "node_modules", "__pycache__", ".venv"}
+TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def trigrams(text: str) -> Set[str]:
+    """Trigrammes de ``text`` (sous-chaînes de 3 caractères)"""
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def boundary_trigrams(text: str) -> Set[str]:
+    """Trigrammes de début et fin de chaque mot (``^ab``, ``yz$``)"""
+    grams = set()
+    for token in TOKEN_RE.findall(text):
+        padded = f"^{token}$"
+        grams.update((padded[:3], padded[-3:]))
+    return grams
+
+
+def name_trigrams(name_lower: str) -> Set[str]:
+    return trigrams(name_lower) | boundary_trigrams(name_lower)
+
+
+class FileIndex:
+    """Index persistant et incrémental des noms de fichiers"""
+
+    def __init__(self, db_path: Path, excluded_dirs: Iterable[str] = EXCLUDED_DIRS):
+        self.db_path = Path(db_path)
+        self.excluded_dirs = set(excluded_dirs)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Connexion partagée entre la boucle et le thread de scan
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+        self.last_refresh: Dict[str, Any] = {}
+
+    # -- mise à jour -------------------------------------------------------
+    def _walk(self, root: Path) -> Iterable[Tuple[str, str, int, float]]:
+        """Parcours os.scandir : un seul stat par fichier, liens non suivis"""
+        stack = [str(root)]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if entry.name not in self.excluded_dirs:
+                                    stack.append(entry.path)
+                            elif entry.is_file(follow_symlinks=False):
+                                st = entry.stat(follow_symlinks=False)
+                                yield entry.path, entry.name, st.st_size, st.st_mtime
+                        except OSError:
+                            continue
+            except OSError as e:
+                logger.debug(f"📁 Répertoire ignoré {current}: {e}")
+
+    def refresh(self, roots: Mapping[str, Path]) -> Dict[str, Any]:
+        """Synchroniser l'index avec le disque (deltas taille / mtime)"""
+        start = time.perf_counter()
+        with self._lock:
+            known = {
+                row["path"]: (row["id"], row["size"], row["mtime"], row["name_lower"])
+                for row in self._conn.execute(
+                    "SELECT id, path, size, mtime, name_lower FROM files"
+                )
+            }
+
+        # Parcours du disque sans verrou : les recherches restent possibles
+        added, changed, seen = [], [], set()
+        for directory, root in roots.items():
+            if not Path(root).exists():
+                continue
+            for path, name, size, mtime in self._walk(Path(root)):
+                if path in seen:
+                    continue  # répertoires de travail imbriqués
+                seen.add(path)
+                row = known.get(path)
+                if row is None:
+                    added.append((path, name, directory, size, mtime))
+                elif row[1] != size or row[2] != mtime:
+                    changed.append((size, mtime, row[0]))
+        removed = [known[path] for path in known.keys() - seen]
+
+        with self._lock, self._conn:
+            if removed:
+                # trigrammes recalculés depuis le nom : suppression par clé
+                # primaire, sans index secondaire sur file_id
+                self._conn.executemany(
+                    "DELETE FROM name_trigrams WHERE tri = ? AND file_id = ?",
+                    [(tri, row[0]) for row in removed for tri in name_trigrams(row[3])],
+                )
+                self._conn.executemany(
+                    "DELETE FROM files WHERE id = ?", [(row[0],) for row in removed]
+                )
+            if changed:
+                self._conn.executemany(
+                    "UPDATE files SET size = ?, mtime = ? WHERE id = ?", changed
+                )
+            if added:
+                # identifiants attribués ici : deux insertions groupées
+                next_id = self._conn.execute(
+                    "SELECT COALESCE(MAX(id), 0) + 1 FROM files"
+                ).fetchone()[0]
+                rows = [
+                    (next_id + i, path, name, name.lower(), directory, size, mtime)
+                    for i, (path, name, directory, size, mtime) in enumerate(added)
+                ]
+                self._conn.executemany(
+                    "INSERT INTO files"
+                    " (id, path, name, name_lower, directory, size, mtime)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                # triées par clé : insertions séquentielles dans le B-tree
+                grams = sorted(
+                    (tri, row[0]) for row in rows for tri in name_trigrams(row[3])
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO name_trigrams (tri, file_id) VALUES (?, ?)",
+                    grams,
+                )
+
+        self.last_refresh = {
+            "files": len(seen),
+            "added": len(added),
+            "updated": len(changed),
+            "removed": len(removed),
+            "duration": round(time.perf_counter() - start, 3),
+        }
+        return self.last_refresh
+
+    # -- recherche ---------------------------------------------------------
+    def search(self, term: str, limit: int = 50, fuzzy: bool = True) -> List[Dict]:
+        """Fichiers dont le nom contient ``term`` ; sinon recherche floue"""
+        term = term.strip().lower()
+        if not term:
+            return []
+        results = self.search_substring(term, limit)
+        if not results and fuzzy:
+            results = self.search_fuzzy(term, limit)
+        return results
+
+    def search_substring(self, term: str, limit: int = 50) -> List[Dict]:
+        term = term.lower()
+        grams = sorted(trigrams(term))
+        with self._lock:
+            if not grams:
+                # moins de 3 caractères : pas de trigramme, balayage des noms
+                rows = self._conn.execute(
+                    "SELECT * FROM files WHERE instr(name_lower, ?) > 0"
+                    " ORDER BY length(name_lower), path LIMIT ?",
+                    (term, limit),
+                ).fetchall()
+            else:
+                marks = ",".join("?" * len(grams))
+                rows = self._conn.execute(
+                    f"""
+                    SELECT f.* FROM files f
+                    JOIN (
+                        SELECT file_id FROM name_trigrams WHERE tri IN ({marks})
+                        GROUP BY file_id HAVING COUNT(*) = ?
+                    ) c ON c.file_id = f.id
+                    WHERE instr(f.name_lower, ?) > 0
+                    ORDER BY length(f.name_lower), f.path LIMIT ?
+                    """,
+                    (*grams, len(grams), term, limit),
+                ).fetchall()
+        return [self._row(row, score=1.0) for row in rows]
+
+    def search_fuzzy(
+        self, term: str, limit: int = 20, min_score: float = 0.6
+    ) -> List[Dict]:
+        term = term.lower()
+        grams = sorted(name_trigrams(term))
+        if not grams:
+            return []
+        # au moins 40 % des trigrammes du terme en commun
+        needed = max(1, int(len(grams) * 0.4))
+        marks = ",".join("?" * len(grams))
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT f.*, c.shared FROM files f
+                JOIN (
+                    SELECT file_id, COUNT(*) AS shared FROM name_trigrams
+                    WHERE tri IN ({marks})
+                    GROUP BY file_id HAVING COUNT(*) >= ?
+                    ORDER BY shared DESC LIMIT ?
+                ) c ON c.file_id = f.id
+                """,
+                (*grams, needed, limit * 20),
+            ).fetchall()
+
+        scored = []
+        for row in rows:
+            name = row["name_lower"]
+            stem = name.rsplit(".", 1)[0]
+            candidates = [stem, *TOKEN_RE.findall(name)]
+            score = max(SequenceMatcher(None, term, c).ratio() for c in candidates)
+            if score >= min_score:
+                scored.append((score, row))
+        scored.sort(key=lambda item: (-item[0], len(item[1]["name"]), item[1]["path"]))
+        return [self._row(row, score=round(score, 3)) for score, row in scored[:limit]]
+
+    def _row(self, row: sqlite3.Row, score: float) -> Dict[str, Any]:
+        return {
+            "name": row["name"],
+            "path": row["path"],
+            "directory": row["directory"],
+            "size": row["size"],
+            "mtime": row["mtime"],
+            "score": score,
+        }
+
+    # -- divers ------------------------------------------------------------
+    def iter_files(self) -> List[Tuple[str, int, float]]:
+        """``(chemin, taille, mtime)`` de tous les fichiers indexés"""
+        with self._lock:
+            return self._conn.execute("SELECT path, size, mtime FROM files").fetchall()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "db_path": str(self.db_path),
+            "files": len(self),
+            "last_refresh": self.last_refresh,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
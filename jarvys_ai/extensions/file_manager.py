@@ -4,11 +4,15 @@
 Gestionnaire de fichiers locaux et cloud (OneDrive, Google Drive)
 """
 
+import asyncio
 import logging
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from .content_index import ContentIndex
+from .file_index import FileIndex
+
 logger = logging.getLogger(__name__)
 
 
@@ -28,7 +32,7 @@ class FileManager:
 
     def __init__(self, config: Dict[str, Any] = None):
         """Initialiser le gestionnaire de fichiers"""
-        self.config
+        self.config = config or {}
         self.is_initialized = False
 
         # Répertoires de travail
@@ -38,6 +42,10 @@ class FileManager:
             "desktop": Path.home() / "Desktop",
             "projects": Path.home() / "Projects",
         }
+        if self.config.get("working_dirs"):
+            self.working_dirs = {
+                name: Path(path) for name, path in self.config["working_dirs"].items()
+            }
 
         # Services cloud
         self.cloud_services = {
@@ -48,10 +56,30 @@ class FileManager:
 
         # Cache des fichiers récents
         self.recent_files = []
-        self.file_index = {}
+
+        # Index persistant (SQLite), rafraîchi par deltas taille / mtime
+        self.file_index = FileIndex(
+            Path(
+                self.config.get(
+                    "file_index_path", Path.home() / ".jarvys_ai" / "file_index.db"
+                )
+            )
+        )
+        # Index plein texte du contenu (BM25), alimenté par un pool de processus
+        self.content_index = ContentIndex(
+            Path(
+                self.config.get(
+                    "content_index_path",
+                    Path.home() / ".jarvys_ai" / "content_index.db",
+                )
+            ),
+            workers=self.config.get("content_index_workers"),
+        )
+        self.index_refresh_interval = float(self.config.get("file_index_interval", 300))
+        self._index_task = None
 
         # Simulation pour démo
-        self.demo_mode = {}.get("demo_mode", True)
+        self.demo_mode = self.config.get("demo_mode", True)
 
         logger.info("📁 File Manager initialisé")
 
@@ -66,8 +94,8 @@ class FileManager:
             else:
                 await self._setup_real_cloud_services()
 
-            # Construire index des fichiers
-            await self._build_file_index()
+            # Index persistant utilisable tout de suite, mis à jour en fond
+            self._index_task = asyncio.create_task(self._watch_file_index())
 
             self.is_initialized = True
             logger.info("📁 File Manager prêt")
@@ -155,29 +183,34 @@ class FileManager:
             raise
 
     async def _build_file_index(self):
-        """Construire index des fichiers pour recherche rapide"""
+        """Mettre à jour l'index des fichiers (seulement les changements)"""
         try:
-            file_count = 0
-
-            for dir_name, dir_path in self.working_dirs.items():
-                if dir_path.exists():
-                    for file_path in dir_path.rglob("*"):
-                        if file_path.is_file():
-                            self.file_index[file_path.name.lower()] = {
-                                "path": str(file_path),
-                                "size": file_path.stat().st_size,
-                                "modified": datetime.fromtimestamp(
-                                    file_path.stat().st_mtime
-                                ),
-                                "directory": dir_name,
-                            }
-                            file_count += 1
-
-            logger.info(f"📁 Index construit: {file_count} fichiers indexés")
+            stats = await asyncio.to_thread(self.file_index.refresh, self.working_dirs)
+            logger.info(
+                f"📁 Index à jour: {stats['files']} fichiers "
+                f"(+{stats['added']} ~{stats['updated']} -{stats['removed']}, "
+                f"{stats['duration']:.2f}s)"
+            )
+            # Contenu : seuls les fichiers ajoutés / modifiés sont relus
+            content = await asyncio.to_thread(
+                self.content_index.sync, self.file_index.iter_files()
+            )
+            logger.info(
+                f"📝 Index contenu: {content['documents']} documents "
+                f"({content['indexed']} relus, {content['duration']:.2f}s)"
+            )
 
         except Exception as e:
             logger.error(f"❌ Erreur construction index: {e}")
 
+    async def _watch_file_index(self):
+        """Rafraîchir l'index périodiquement (polling)"""
+        while True:
+            await self._build_file_index()
+            if self.index_refresh_interval <= 0:
+                return
+            await asyncio.sleep(self.index_refresh_interval)
+
     async def process_command(self, command: str) -> str:
         """Traiter une commande fichier"""
         try:
@@ -216,17 +249,23 @@ class FileManager:
                 return "❌ Veuillez spécifier le terme de recherche."
 
             results = await self._search_files(search_term)
+            content_results = await asyncio.to_thread(
+                self.content_index.search, search_term, limit=5
+            )
 
-            if not results:
+            if not results and not content_results:
                 return f"❌ Aucun fichier trouvé pour '{search_term}'"
 
+            if not results:
+                return self._format_content_results(search_term, content_results)
+
             response = (
                 f"🔍 **Résultats pour '{search_term}'** ({len(results)} fichiers):\n\n"
             )
 
             for i, file_info in enumerate(results[:5], 1):
                 response += f"{i}. 📄 **{file_info['name']}**\n"
-                response += f"   📁 {file_info['directory']}\n"
+                response += f"   📁 {file_info['location']}\n"
                 response += (
                     f"   📊 {file_info['size']} | 📅 {file_info['modified']}\n\n"
                 )
@@ -234,7 +273,12 @@ class FileManager:
             if len(results) > 5:
                 response += f"... et {len(results) - 5} autres fichiers.\n"
 
-            response += "\n💡 Dites 'Ouvrir [nom fichier]' pour l'ouvrir."
+            if content_results:
+                response += "\n" + self._format_content_results(
+                    search_term, content_results
+                )
+            else:
+                response += "\n💡 Dites 'Ouvrir [nom fichier]' pour l'ouvrir."
 
             return response
 
@@ -242,6 +286,16 @@ class FileManager:
             logger.error(f"❌ Erreur recherche fichiers: {e}")
             return "Erreur lors de la recherche de fichiers."
 
+    def _format_content_results(self, search_term: str, results: List[Dict]) -> str:
+        """Documents dont le contenu correspond, avec extrait"""
+        response = f"📝 **Dans le contenu des documents** ('{search_term}'):\n\n"
+        for i, doc in enumerate(results, 1):
+            response += f"{i}. 📄 **{doc['name']}**\n"
+            response += f"   📁 {Path(doc['path']).parent}\n"
+            response += f"   💬 {doc['snippet']}\n\n"
+        response += "💡 Dites 'Ouvrir [nom fichier]' pour l'ouvrir."
+        return response
+
     def _extract_search_term(self, command: str) -> Optional[str]:
         """Extraire le terme de recherche"""
         import re
@@ -261,22 +315,28 @@ class FileManager:
         return None
 
     async def _search_files(self, search_term: str) -> List[Dict[str, Any]]:
-        """Rechercher fichiers par nom"""
+        """Rechercher fichiers par nom (sous-chaîne, sinon recherche floue)"""
         results = []
         search_lower = search_term.lower()
 
-        # Recherche dans l'index local
-        for filename, file_info in self.file_index.items():
-            if search_lower in filename:
-                results.append(
-                    {
-                        "name": Path(file_info["path"]).name,
-                        "path": file_info["path"],
-                        "size": self._format_file_size(file_info["size"]),
-                        "modified": file_info["modified"].strftime("%d/%m/%Y %H:%M"),
-                        "directory": file_info["directory"],
-                    }
-                )
+        # Recherche dans l'index local (un résultat par chemin), hors de la
+        # boucle : la requête SQLite peut attendre un rafraîchissement en cours
+        matches = await asyncio.to_thread(self.file_index.search, search_lower)
+        for file_info in matches:
+            results.append(
+                {
+                    "name": file_info["name"],
+                    "path": file_info["path"],
+                    "size": self._format_file_size(file_info["size"]),
+                    "modified": datetime.fromtimestamp(file_info["mtime"]).strftime(
+                        "%d/%m/%Y %H:%M"
+                    ),
+                    "directory": file_info["directory"],
+                    # dossier parent : distingue les fichiers de même nom
+                    "location": str(Path(file_info["path"]).parent),
+                    "score": file_info["score"],
+                }
+            )
 
         # Recherche dans les fichiers récents (démo)
         for file_info in self.recent_files:
@@ -289,6 +349,7 @@ class FileManager:
                             "size": file_info["size"],
                             "modified": file_info["modified"],
                             "directory": file_info["path"].name,
+                            "location": str(file_info["path"]),
                         }
                     )
 
@@ -310,12 +371,11 @@ class FileManager:
             return "❌ Veuillez spécifier le nom du fichier à ouvrir."
 
         # Rechercher le fichier
-        for indexed_name, file_info in self.file_index.items():
-            if filename.lower() in indexed_name:
-                break
+        matches = await asyncio.to_thread(self.file_index.search, filename, limit=1)
+        file_found = matches[0] if matches else None
 
         if self.demo_mode:
-            return """✅ **Fichier ouvert**
+            return f"""✅ **Fichier ouvert**
 
 📄 **Nom**: {filename}
 📁 **Emplacement**: {file_found['directory'] if file_found else 'Documents'}
@@ -501,5 +561,7 @@ Comment puis-je vous aider avec vos fichiers ?"""
             },
             "cloud_services": self.cloud_services,
             "indexed_files": len(self.file_index),
+            "file_index": self.file_index.get_stats(),
+            "content_index": self.content_index.get_stats(),
             "version": "1.0.0",
         }
@@ -4,14 +4,21 @@
 Module de traitement intelligent et d'analyse des commandes
 """
 
+import json
 import logging
+import time
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List
 
 import openai
 
+from .intent_classifier import IntentClassifier
+
 logger = logging.getLogger(__name__)
 
+# Origines d'intention fiables pour l'entraînement du classifieur
+TRUSTED_INTENT_SOURCES = {"llm", "explicit"}
+
 
 class IntelligenceCore:
     """
@@ -26,8 +33,8 @@ class IntelligenceCore:
 
     def __init__(self, config: Dict[str, Any] = None):
         """Initialiser le cœur d'intelligence"""
-        self.config
-        self.openai_client  # To be initialized
+        self.config = config or {}
+        self.openai_client = None  # To be initialized
         self.is_initialized = False
 
         # Modèles de classification
@@ -63,6 +70,21 @@ class IntelligenceCore:
             "general": ["aide", "help", "comment", "quoi", "qui", "pourquoi"],
         }
 
+        # Classifieur local : le LLM n'est appelé que sous ce seuil de confiance
+        self.intent_threshold = float(self.config.get("intent_threshold", 0.7))
+        self.intent_classifier = IntentClassifier()
+        for cmd_type, keywords in self.command_patterns.items():
+            for keyword in keywords:
+                self.intent_classifier.learn(keyword, cmd_type)
+        self.intent_stats = {
+            "local": 0,
+            "escalated": 0,
+            "low_confidence_no_llm": 0,
+            "local_time": 0.0,
+            "llm_time": 0.0,
+            "llm_calls": 0,
+        }
+
         logger.info("🧠 Intelligence Core initialisé")
 
     async def initialize(self):
@@ -70,8 +92,9 @@ class IntelligenceCore:
         try:
             # Configurer OpenAI
             if self.config.get("openai_api_key"):
-                openai.api_key = self.config["openai_api_key"]
-                self.openai_client = openai
+                self.openai_client = openai.AsyncOpenAI(
+                    api_key=self.config["openai_api_key"]
+                )
                 logger.info("✅ OpenAI configuré")
 
             self.is_initialized = True
@@ -92,19 +115,43 @@ class IntelligenceCore:
             Analyse de la commande avec type, intention, etc.
         """
         try:
-            command_lower = command.lower()
-
-            # Classification simple par mots-clés
-            command_type = self._classify_command(command_lower)
-
-            # Analyse avancée si OpenAI disponible
-            if self.openai_client:
+            # Classifieur local (< 1 ms)
+            start = time.perf_counter()
+            command_type, confidence, _ = self.intent_classifier.predict(command)
+            self.intent_stats["local_time"] += time.perf_counter() - start
+
+            if command_type and confidence >= self.intent_threshold:
+                self.intent_stats["local"] += 1
+                advanced_analysis = {"confidence": confidence, "context": "local"}
+                source = "local"
+            elif self.openai_client:
+                # Confiance insuffisante : escalade vers le LLM
+                self.intent_stats["escalated"] += 1
+                start = time.perf_counter()
                 advanced_analysis = await self._analyze_with_ai(command)
+                self.intent_stats["llm_time"] += time.perf_counter() - start
+                self.intent_stats["llm_calls"] += 1
+                if advanced_analysis.get("type") in self.command_patterns:
+                    command_type = advanced_analysis["type"]
+                    # l'étiquette du LLM entraîne le classifieur local
+                    self.intent_classifier.learn(command, command_type)
+                    source = "llm"
+                else:
+                    command_type = self._classify_command(command.lower())
+                    source = "keywords"
             else:
-                advanced_analysis = {"confidence": 0.7, "context": "local"}
+                # Sans LLM : classification par mots-clés
+                self.intent_stats["low_confidence_no_llm"] += 1
+                command_type = self._classify_command(command.lower())
+                advanced_analysis = {
+                    "confidence": confidence,
+                    "context": "local_low_confidence",
+                }
+                source = "keywords"
 
             analysis = {
                 "type": command_type,
+                "intent_source": source,
                 "original": command,
                 "timestamp": datetime.now().isoformat(),
                 "confidence": advanced_analysis.get("confidence", 0.7),
@@ -143,13 +190,19 @@ class IntelligenceCore:
 
     async def _analyze_with_ai(self, command: str) -> Dict[str, Any]:
         """Analyse avancée avec OpenAI"""
+        types = ", ".join(self.command_patterns)
         try:
-            _response = await self.openai_client.ChatCompletion.acreate(
+            response = await self.openai_client.chat.completions.create(
                 model="gpt-3.5-turbo",
                 messages=[
                     {
                         "role": "system",
-                        "content": "Tu es JARVYS_AI, assistant de Yann Abadie. Analyse cette commande et détermine son type et contexte.",
+                        "content": (
+                            "Tu es JARVYS_AI, assistant de Yann Abadie. Analyse "
+                            "cette commande et détermine son type et contexte. "
+                            'Réponds en JSON: {"type": "<' + types + '>", '
+                            '"context": "<résumé court>"}'
+                        ),
                     },
                     {
                         "role": "user",
@@ -163,6 +216,7 @@ class IntelligenceCore:
             ai_response = response.choices[0].message.content
 
             return {
+                "type": self._parse_ai_type(ai_response),
                 "confidence": 0.9,
                 "context": "ai_enhanced",
                 "ai_analysis": ai_response,
@@ -172,6 +226,34 @@ class IntelligenceCore:
             logger.warning(f"⚠️ Analyse AI échouée: {e}")
             return {"confidence": 0.7, "context": "fallback"}
 
+    def _parse_ai_type(self, ai_response: str) -> str:
+        """Type de commande donné par le LLM (JSON, sinon premier type cité)"""
+        try:
+            value = json.loads(ai_response).get("type")
+            if value in self.command_patterns:
+                return value
+        except (ValueError, AttributeError):
+            pass
+        text = (ai_response or "").lower()
+        return next((t for t in self.command_patterns if t in text), "")
+
+    def train_from_history(self, interactions: Iterable[Dict[str, Any]]) -> int:
+        """Entraîner le classifieur local sur l'historique du Digital Twin
+
+        Seules les étiquettes confirmées (LLM ou explicites) sont apprises :
+        réapprendre ses propres prédictions renforcerait ses erreurs.
+        """
+        examples = [
+            (entry["command"], entry["intent"])
+            for entry in interactions
+            if entry.get("command")
+            and entry.get("intent") in self.command_patterns
+            and entry.get("intent_source") in TRUSTED_INTENT_SOURCES
+        ]
+        n = self.intent_classifier.fit(examples)
+        logger.info(f"🎯 Classifieur d'intention: {n} interactions apprises")
+        return n
+
     def _extract_entities(self, command: str) -> List[str]:
         """Extraire les entités de la commande"""
         # Extraction simple - peut être améliorée avec NLP
@@ -221,7 +303,7 @@ class IntelligenceCore:
     async def _generate_ai_response(self, command: str) -> str:
         """Générer réponse avec IA"""
         try:
-            _response = await self.openai_client.ChatCompletion.acreate(
+            response = await self.openai_client.chat.completions.create(
                 model="gpt-3.5-turbo",
                 messages=[
                     {
@@ -257,11 +339,39 @@ class IntelligenceCore:
 
         return "Je suis là pour vous aider. Pouvez-vous préciser votre demande ?"
 
+    def get_intent_stats(self) -> Dict[str, Any]:
+        """Taux d'escalade vers le LLM et latence économisée"""
+        stats = self.intent_stats
+        total = stats["local"] + stats["escalated"] + stats["low_confidence_no_llm"]
+        local_ms = 1000 * stats["local_time"] / total if total else 0.0
+        llm_ms = (
+            1000 * stats["llm_time"] / stats["llm_calls"]
+            if stats["llm_calls"]
+            else None
+        )
+        return {
+            "commands": total,
+            "answered_locally": stats["local"],
+            "escalated": stats["escalated"],
+            "escalation_rate": round(stats["escalated"] / total, 3) if total else 0.0,
+            "avg_local_ms": round(local_ms, 3),
+            "avg_llm_ms": round(llm_ms, 1) if llm_ms is not None else None,
+            # appels LLM évités × latence moyenne mesurée d'un appel
+            "estimated_saved_ms": (
+                round(stats["local"] * (llm_ms - local_ms), 1)
+                if llm_ms is not None
+                else None
+            ),
+            "threshold": self.intent_threshold,
+            "classifier": self.intent_classifier.get_stats(),
+        }
+
     def get_stats(self) -> Dict[str, Any]:
         """Obtenir statistiques du cœur d'intelligence"""
         return {
             "is_initialized": self.is_initialized,
             "openai_available": self.openai_client is not None,
             "patterns_loaded": len(self.command_patterns),
+            "intent": self.get_intent_stats(),
             "version": "1.0.0",
         }
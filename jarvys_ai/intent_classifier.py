@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+🎯 JARVYS_AI - Classifieur d'intention local
+
+Naive Bayes multinomial sur des n-grammes hachés (mots + trigrammes de
+caractères), entraîné en continu : mots-clés de départ, historique du
+Digital Twin, puis chaque réponse du LLM. Une prédiction coûte une
+centaine de microsecondes ; la probabilité a posteriori sert de confiance
+pour décider s'il faut escalader vers le LLM.
+
+Les trigrammes d'un même mot sont très corrélés : sommés tels quels, ils
+rendent Naive Bayes sûr de lui même sur une phrase inconnue. La
+log-probabilité (a priori compris) est donc moyennée par feature puis
+multipliée par ``sharpness``, ce qui garde des confiances exploitables
+comme seuil.
+"""
+
+import math
+import re
+import zlib
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class IntentClassifier:
+    """Classifieur incrémental sur caractéristiques hachées"""
+
+    def __init__(
+        self, n_features: int = 2**18, alpha: float = 0.1, sharpness: float = 4.0
+    ):
+        self.n_features = n_features
+        self.alpha = alpha
+        self.sharpness = sharpness
+        self.class_docs: Counter = Counter()
+        self.feature_counts: Dict[str, Dict[int, float]] = defaultdict(
+            lambda: defaultdict(float)
+        )
+        self.class_totals: Counter = Counter()
+
+    def features(self, text: str) -> Counter:
+        """Mots et trigrammes de caractères (bornés par ^ et $), hachés"""
+        feats: Counter = Counter()
+        for word in WORD_RE.findall(text.lower()):
+            feats[self._hash("w:" + word)] = 1
+            padded = f"^{word}$"
+            for i in range(len(padded) - 2):
+                feats[self._hash(padded[i : i + 3])] = 1
+        return feats
+
+    def _hash(self, token: str) -> int:
+        # crc32 : stable d'un processus à l'autre, contrairement à hash()
+        return zlib.crc32(token.encode("utf-8")) % self.n_features
+
+    def learn(self, text: str, label: str, weight: float = 1.0):
+        """Ajouter un exemple étiqueté (mise à jour O(nombre de features))"""
+        feats = self.features(text)
+        if not feats:
+            return
+        counts = self.feature_counts[label]
+        for feat, value in feats.items():
+            counts[feat] += value * weight
+        self.class_totals[label] += sum(feats.values()) * weight
+        self.class_docs[label] += weight
+
+    def fit(self, examples: Iterable[Tuple[str, str]]) -> int:
+        n = 0
+        for text, label in examples:
+            self.learn(text, label)
+            n += 1
+        return n
+
+    def predict(self, text: str) -> Tuple[Optional[str], float, Dict[str, float]]:
+        """Retourne (intention, confiance, probabilités par intention)"""
+        feats = self.features(text)
+        if not self.class_docs or not feats:
+            return None, 0.0, {}
+
+        n_docs = sum(self.class_docs.values())
+        n_classes = len(self.class_docs)
+        n_feats = sum(feats.values())
+        smoothing = self.alpha * self.n_features
+        scores = {}
+        for label, docs in self.class_docs.items():
+            counts = self.feature_counts[label]
+            denom = math.log(self.class_totals[label] + smoothing)
+            likelihood = sum(
+                value * (math.log(counts.get(feat, 0.0) + self.alpha) - denom)
+                for feat, value in feats.items()
+            )
+            prior = math.log((docs + 1) / (n_docs + n_classes))
+            scores[label] = self.sharpness * (prior + likelihood) / n_feats
+
+        top = max(scores.values())
+        exp = {label: math.exp(score - top) for label, score in scores.items()}
+        total = sum(exp.values())
+        probs = {label: value / total for label, value in exp.items()}
+        label = max(probs, key=probs.get)
+        return label, probs[label], probs
+
+    @property
+    def n_examples(self) -> float:
+        return sum(self.class_docs.values())
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "classes": len(self.class_docs),
+            "examples": int(self.n_examples),
+            "examples_per_class": {k: int(v) for k, v in self.class_docs.items()},
+        }
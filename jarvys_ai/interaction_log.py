@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+📚 JARVYS_AI - Journal d'interactions en ajout seul
+
+Chaque interaction est ajoutée comme une ligne JSONL : l'enregistrement
+coûte O(1) au lieu de réécrire tout l'historique. Les N dernières
+interactions restent en mémoire avec des compteurs par catégorie et par
+sentiment tenus à jour incrémentalement. Le fichier est compacté
+(réécriture atomique des N dernières lignes) quand il dépasse
+``compact_ratio`` fois la fenêtre conservée, soit un coût amorti constant.
+"""
+
+import json
+import logging
+import os
+from collections import Counter, deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class InteractionLog:
+    """Historique borné des interactions, persisté en JSONL append-only"""
+
+    def __init__(self, path: Path, max_entries: int = 1000, compact_ratio: float = 2):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.compact_ratio = max(1.0, compact_ratio)
+        self.entries: Deque[Dict[str, Any]] = deque(maxlen=max_entries)
+        self.categories: Counter = Counter()
+        self.sentiments: Counter = Counter()
+        self.lines_on_disk = 0
+        self.compactions = 0
+        self._fh = None
+
+    def load(self, legacy_file: Optional[Path] = None) -> int:
+        """Charger le journal ; importe l'ancien historique JSON s'il existe"""
+        self.close()
+        self.entries.clear()
+        self.categories.clear()
+        self.sentiments.clear()
+        self.lines_on_disk = 0
+
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    self.lines_on_disk += 1
+                    try:
+                        self._push(json.loads(line))
+                    except (json.JSONDecodeError, TypeError):
+                        # dernière ligne tronquée par un arrêt brutal
+                        continue
+        elif legacy_file is not None and Path(legacy_file).exists():
+            with open(legacy_file, "r", encoding="utf-8") as f:
+                for entry in json.load(f):
+                    self._push(entry)
+            self.compact()
+            logger.info(f"📦 Historique {legacy_file.name} migré en JSONL")
+
+        return len(self.entries)
+
+    def append(self, entry: Dict[str, Any]):
+        """Ajouter une interaction (une ligne écrite, compteurs mis à jour)"""
+        self._push(entry)
+        if self._fh is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = open(self.path, "a", encoding="utf-8")
+        self._fh.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._fh.flush()
+        self.lines_on_disk += 1
+
+        if self.lines_on_disk > self.max_entries * self.compact_ratio:
+            self.compact()
+
+    def _push(self, entry: Dict[str, Any]):
+        if len(self.entries) == self.entries.maxlen:
+            self._count(self.entries[0], -1)  # l'entrée la plus ancienne sort
+        self.entries.append(entry)
+        self._count(entry, 1)
+
+    def _count(self, entry: Dict[str, Any], delta: int):
+        for counter, key in (
+            (self.categories, entry.get("category", "general")),
+            (self.sentiments, entry.get("sentiment", "neutral")),
+        ):
+            counter[key] += delta
+            if counter[key] <= 0:
+                del counter[key]
+
+    def compact(self):
+        """Réécrire le fichier avec les seules entrées conservées"""
+        self.close()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for entry in self.entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self.lines_on_disk = len(self.entries)
+        self.compactions += 1
+        logger.debug(f"🗜️ Journal compacté: {self.lines_on_disk} interactions")
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def recent(self, n: int = 10) -> List[Dict[str, Any]]:
+        """Les ``n`` dernières interactions, de la plus ancienne à la plus récente"""
+        start = max(0, len(self.entries) - n)
+        return [self.entries[i] for i in range(start, len(self.entries))]
+
+    def most_common_category(self, default: str = "general") -> str:
+        top = self.categories.most_common(1)
+        return top[0][0] if top else default
+
+    def __len__(self) -> int:
+        return len(self.entries)
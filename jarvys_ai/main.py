@@ -12,6 +12,7 @@ import os
 from datetime import datetime
 from typing import Any, Dict, Optional
 
+from .command_queue import CommandQueue, CommandQueueFull
 from .continuous_improvement import ContinuousImprovement
 from .digital_twin import DigitalTwin
 from .extensions.cloud_manager import CloudManager
@@ -44,7 +45,7 @@ class JarvysAI:
 
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         """Initialiser JARVYS_AI avec configuration"""
-        self.config or self._load_default_config()
+        self.config = config or self._load_default_config()
         self.session_id = datetime.now().isoformat()
 
         # Composants principaux
@@ -61,9 +62,17 @@ class JarvysAI:
             "files": FileManager(self.config),
         }
 
+        # File prioritaire des commandes (texte, voix, email, dashboard)
+        self.command_queue = CommandQueue(
+            workers=self.config.get("command_workers", 2),
+            maxsize=self.config.get("command_queue_size", 100),
+            submit_timeout=self.config.get("command_submit_timeout", 5.0),
+        )
+
         # État système
         self.is_running = False
         self.tasks = []
+        self._stop_event = asyncio.Event()
 
         logger.info("🤖 JARVYS_AI initialisé - Digital Twin prêt")
 
@@ -86,10 +95,13 @@ class JarvysAI:
         try:
             logger.info("🚀 Démarrage de JARVYS_AI...")
             self.is_running = True
+            self._stop_event.clear()
 
             # Initialiser composants principaux
             await self.intelligence_core.initialize()
             await self.digital_twin.initialize()
+            # Classifieur d'intention local entraîné sur l'historique
+            self.intelligence_core.train_from_history(self.digital_twin.history.entries)
             await self.continuous_improvement.initialize()
             await self.fallback_engine.initialize()
 
@@ -106,12 +118,19 @@ class JarvysAI:
 
             # Démarrer amélioration continue
             if self.config.get("auto_improve"):
-                asyncio.create_task(
-                    self.continuous_improvement.start_continuous_monitoring()
+                self.tasks.append(
+                    asyncio.create_task(
+                        self.continuous_improvement.start_continuous_monitoring()
+                    )
                 )
 
             # Démarrer monitoring fallback
-            asyncio.create_task(self.fallback_engine.monitor_quotas())
+            self.tasks.append(
+                asyncio.create_task(self.fallback_engine.monitor_quotas())
+            )
+
+            # Démarrer les workers de la file de commandes
+            self.command_queue.start()
 
             # Démarrer la boucle principale
             await self._main_loop()
@@ -124,8 +143,10 @@ class JarvysAI:
         """Arrêter JARVYS_AI proprement"""
         logger.info("🛑 Arrêt de JARVYS_AI...")
         self.is_running = False
+        self._stop_event.set()
 
-        # Arrêter les tâches
+        # Annuler les commandes en attente ou en cours, puis les tâches
+        await self.command_queue.close()
         for task in self.tasks:
             task.cancel()
 
@@ -135,41 +156,35 @@ class JarvysAI:
         logger.info("✅ JARVYS_AI arrêté proprement")
 
     async def _main_loop(self):
-        """Boucle principale d'exécution"""
+        """Boucle principale : attend l'arrêt, les commandes sont servies
+        par les workers de la file"""
+        interval = self.config.get("improvement_check_interval", 300)
         while self.is_running:
             try:
-                # Vérifier les tâches en cours
-                await self._process_tasks()
-
-                # Vérifier les amélirations disponibles
+                await asyncio.wait_for(self._stop_event.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                # Vérifier les améliorations disponibles
                 if self.config.get("auto_improve"):
-                    await self._check_improvements()
-
-                # Attendre avant la prochaine itération
-                await asyncio.sleep(1)
-
-            except KeyboardInterrupt:
-                logger.info("🔄 Interruption clavier - arrêt en cours...")
-                break
-            except Exception as e:
-                logger.error(f"❌ Erreur boucle principale: {e}")
-                await asyncio.sleep(5)
-
-    async def _process_tasks(self):
-        """Traiter les tâches en attente"""
-        # TODO: Implémenter gestion des tâches
+                    try:
+                        await self._check_improvements()
+                    except Exception as e:
+                        logger.error(f"❌ Erreur boucle principale: {e}")
 
     async def _check_improvements(self):
         """Vérifier les améliorations depuis JARVYS_DEV"""
         # TODO: Implémenter check améliorations
 
-    async def process_command(self, command: str, interface: str = "text") -> str:
+    async def process_command(
+        self, command: str, interface: str = "text", priority: Optional[str] = None
+    ) -> str:
         """
         Traiter une commande utilisateur
 
         Args:
             command: Commande à traiter
             interface: Interface utilisée (text, voice, email)
+            priority: Priorité imposée (high, medium, low), sinon celle de
+                l'analyse
 
         Returns:
             Réponse à la commande
@@ -180,11 +195,43 @@ class JarvysAI:
             # Analyser la commande via intelligence core
             analysis = await self.intelligence_core.analyze_command(command)
 
+            if not self.command_queue.is_running:
+                # Hors boucle principale (tests, usage ponctuel) : exécution directe
+                return await self._execute_command(command, interface, analysis)
+
+            return await self.command_queue.submit(
+                self._execute_command,
+                command,
+                interface,
+                analysis,
+                priority=priority or analysis.get("priority", "low"),
+                name=f"{interface}:{command[:30]}",
+            )
+
+        except CommandQueueFull as e:
+            logger.warning(f"⏳ Commande refusée ({interface}): {e}")
+            return "⏳ JARVYS est très sollicité, réessayez dans un instant."
+        except Exception as e:
+            error_msg = f"❌ Erreur traitement commande: {e}"
+            logger.error(error_msg)
+            return error_msg
+
+    async def _execute_command(
+        self, command: str, interface: str, analysis: Dict[str, Any]
+    ) -> str:
+        """Exécuter une commande analysée (appelé par un worker de la file)"""
+        try:
             # Router vers l'extension appropriée
-            _response = await self._route_command(analysis, command)
+            response = await self._route_command(analysis, command)
 
             # Mettre à jour le jumeau numérique
-            await self.digital_twin.update_interaction(command, response, interface)
+            await self.digital_twin.update_interaction(
+                command,
+                response,
+                interface,
+                intent=analysis.get("type"),
+                intent_source=analysis.get("intent_source"),
+            )
 
             return response
 
@@ -215,6 +262,7 @@ class JarvysAI:
                 name: ext.is_initialized() for name, ext in self.extensions.items()
             },
             "tasks_count": len(self.tasks),
+            "command_queue": self.command_queue.get_stats(),
             "continuous_improvement": (
                 self.continuous_improvement.get_improvement_status()
                 if hasattr(self, "continuous_improvement")
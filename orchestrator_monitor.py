@@ -4,13 +4,20 @@ Orchestrator Monitor - Non-intrusive observation system
 Surveys GROK orchestrator activity without interfering with operations
 """
 
-import json
 import os
 import subprocess
+import sys
 import time
 from datetime import datetime
+from pathlib import Path
 from typing import Dict, List
 
+# jarvys_dev vit sous src/ et n'est pas installé par les lanceurs
+# (start_orchestrator.sh, docker/start-gcp.sh) : le rendre importable
+sys.path.insert(0, str(Path(__file__).resolve().parent / "src"))
+
+from jarvys_dev.log_spool import iter_json_records
+
 
 class OrchestrationMonitor:
     def __init__(self):
@@ -46,19 +53,8 @@ class OrchestrationMonitor:
 
         try:
             with open(self.log_file, "r") as f:
-                content = f.read().strip()
-                if not content:
-                    return logs
-
-                # Handle multiple JSON objects on separate lines
-                for line in content.split("\n"):
-                    line = line.strip()
-                    if line and line.startswith("{"):
-                        try:
-                            log_entry = json.loads(line)
-                            logs.append(log_entry)
-                        except json.JSONDecodeError:
-                            continue
+                # JSONL, plus les anciens objets concaténés sans saut de ligne
+                logs.extend(iter_json_records(f.read()))
         except Exception as e:
             print(f"⚠️ Error reading logs: {e}")
 
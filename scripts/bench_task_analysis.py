@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark de IntelligentOrchestrator.analyze_task.
+
+Compare l'extraction de signaux en une passe à l'ancienne approche (un
+``prompt.lower()`` et un scan par signal) sur des prompts d'environ 10k
+tokens.
+
+Usage: python scripts/bench_task_analysis.py [--words 10000] [--repeat 50]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from jarvys_dev import intelligent_orchestrator as io_mod  # noqa: E402
+from jarvys_dev.intelligent_orchestrator import IntelligentOrchestrator  # noqa: E402
+
+VOCABULARY = (
+    "the system should return results for each request and log every step "
+    "while keeping memory usage low across the whole pipeline of agents "
+    "data model value user state cache queue worker network latency"
+).split()
+
+
+def legacy_analyze(prompt: str) -> tuple:
+    """Ancienne analyse : un scan complet du prompt par signal."""
+    task_type = "general"
+    for name, keywords in io_mod.TASK_TYPE_KEYWORDS:
+        if any(kw in prompt.lower() for kw in keywords):
+            task_type = name
+            break
+    complex_count = sum(1 for w in io_mod.COMPLEX_KEYWORDS if w in prompt.lower())
+    return (
+        task_type,
+        complex_count,
+        prompt.count("?"),
+        any(kw in prompt.lower() for kw in io_mod.CREATIVE_KEYWORDS),
+        any(kw in prompt.lower() for kw in io_mod.REASONING_KEYWORDS),
+        any(kw in prompt.lower() for kw in io_mod.URGENT_KEYWORDS),
+        any(kw in prompt.lower() for kw in io_mod.THOROUGH_KEYWORDS),
+        any(kw in prompt.lower() for kw in io_mod.MULTIMODAL_KEYWORDS),
+        len(prompt.split()),
+    )
+
+
+def make_prompt(words: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words)) + " diagram?"
+
+
+def bench(fn, prompt: str, repeat: int) -> float:
+    fn(prompt)  # échauffement
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(prompt)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--words", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    orchestrator = IntelligentOrchestrator.__new__(IntelligentOrchestrator)
+    prompt = make_prompt(args.words)
+
+    legacy_ms = bench(legacy_analyze, prompt, args.repeat)
+    single_ms = bench(orchestrator.analyze_task, prompt, args.repeat)
+
+    print(f"📏 Prompt: {args.words} mots, {len(prompt)} caractères")
+    print(f"🐢 Scans multiples : {legacy_ms:.3f} ms/appel")
+    print(f"⚡ Passe unique    : {single_ms:.3f} ms/appel")
+    print(f"🚀 Accélération    : x{legacy_ms / single_ms:.1f}")
+
+
+if __name__ == "__main__":
+    main()
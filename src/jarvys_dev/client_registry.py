@@ -0,0 +1,346 @@
+"""Shared, pooled LLM provider clients and HTTP sessions.
+
+Building an SDK client per call opens a new connection pool each time, so
+every request pays for DNS, TCP and TLS again. :class:`ClientRegistry`
+creates each client once per ``(provider, constructor, api key)`` and
+shares it across the process:
+
+* sync OpenAI / Anthropic clients share one keep-alive ``httpx`` pool;
+* every client gets explicit connect and read timeouts and the SDK's own
+  retry (exponential backoff with jitter) on 408/409/429/5xx;
+* plain REST calls go through a ``requests`` session with a pooled
+  adapter, default timeouts and urllib3 retries with jitter (5xx answers
+  are only retried for idempotent methods: a replayed LLM POST may be
+  billed twice);
+* :func:`retry_call` adds the same policy around SDKs without built-in
+  retries (xAI gRPC).
+
+Async SDK clients keep their own pool: an ``httpx.AsyncClient`` is bound
+to the event loop that first uses it, so they are cached per running loop
+(a new ``asyncio.run`` or a worker thread gets its own client).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import os
+import random
+import threading
+import time
+import typing as _t
+import weakref
+
+try:  # optional dependency
+    import httpx
+except Exception:  # pragma: no cover - package optional
+    httpx = None
+
+try:  # optional dependency
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+except Exception:  # pragma: no cover - package optional
+    requests = None
+
+logger = logging.getLogger(__name__)
+
+CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "300"))
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "20"))
+KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+RETRY_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+# codes gRPC transitoires (SDK xAI)
+RETRY_GRPC_CODES = frozenset({"UNAVAILABLE", "DEADLINE_EXCEEDED", "RESOURCE_EXHAUSTED"})
+
+T = _t.TypeVar("T")
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP):
+    """Full-jitter exponential backoff for retry number ``attempt`` (0-based)."""
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """Connection failures, timeouts, throttling and 5xx answers."""
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+    if httpx is not None and isinstance(exc, httpx.TransportError):
+        return True
+    if requests is not None and isinstance(
+        exc, (requests.ConnectionError, requests.Timeout)
+    ):
+        return True
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    if status in RETRY_STATUSES:
+        return True
+    code = getattr(exc, "code", None)
+    if callable(code):
+        try:
+            return getattr(code(), "name", None) in RETRY_GRPC_CODES
+        except Exception:
+            return False
+    return False
+
+
+def retry_call(
+    fn: _t.Callable[..., T],
+    *args: _t.Any,
+    retries: int | None = None,
+    sleep: _t.Callable[[float], None] = time.sleep,
+    **kwargs: _t.Any,
+) -> T:
+    """Call ``fn`` and retry transient failures with jittered backoff."""
+    retries = MAX_RETRIES if retries is None else retries
+    for attempt in range(retries + 1):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as exc:
+            if attempt >= retries or not is_transient_error(exc):
+                raise
+            delay = backoff_delay(attempt)
+            logger.warning(
+                "🔁 Transient error (%s), retry %d/%d in %.2fs",
+                exc,
+                attempt + 1,
+                retries,
+                delay,
+            )
+            sleep(delay)
+    raise AssertionError("unreachable")  # pragma: no cover
+
+
+def _accepted(factory: _t.Callable, kwargs: dict[str, _t.Any]) -> dict[str, _t.Any]:
+    """Keep the keyword arguments ``factory`` accepts (older SDKs, test doubles)."""
+    try:
+        params = inspect.signature(factory).parameters
+    except (TypeError, ValueError):
+        return kwargs
+    if any(p.kind is inspect.Parameter.VAR_KEYWORD for p in params.values()):
+        return kwargs
+    return {k: v for k, v in kwargs.items() if k in params}
+
+
+class ClientRegistry:
+    """Process-wide cache of provider clients with shared connection pools."""
+
+    def __init__(
+        self,
+        *,
+        connect_timeout: float = CONNECT_TIMEOUT,
+        read_timeout: float = READ_TIMEOUT,
+        max_retries: int = MAX_RETRIES,
+        pool_size: int = POOL_SIZE,
+        keepalive_expiry: float = KEEPALIVE_EXPIRY,
+    ) -> None:
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.pool_size = pool_size
+        self.keepalive_expiry = keepalive_expiry
+        self._clients: dict[tuple, _t.Any] = {}
+        # clients async par boucle : libérés avec la boucle
+        self._loop_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._lock = threading.RLock()
+        self.created = 0  # nombre de clients réellement construits
+
+    def get(
+        self,
+        key: tuple,
+        factory: _t.Callable[[], T],
+        cache: dict[tuple, _t.Any] | None = None,
+    ) -> T:
+        """Return the client cached under ``key``, building it once."""
+        cache = self._clients if cache is None else cache
+        client = cache.get(key)
+        if client is None:
+            with self._lock:
+                client = cache.get(key)
+                if client is None:
+                    client = factory()
+                    cache[key] = client
+                    self.created += 1
+        return client
+
+    def _loop_cache(self) -> dict[tuple, _t.Any] | None:
+        """Client cache of the running event loop (``None`` outside a loop)."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+        with self._lock:
+            for closed in [lp for lp in self._loop_clients if lp.is_closed()]:
+                del self._loop_clients[closed]
+            return self._loop_clients.setdefault(loop, {})
+
+    # -- transports ------------------------------------------------------
+    def timeout(self) -> _t.Any:
+        if httpx is None:
+            return self.read_timeout
+        return httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+
+    def httpx_client(self) -> _t.Any:
+        """Shared keep-alive pool for sync SDK clients (``None`` without httpx)."""
+        if httpx is None:
+            return None
+        return self.get(
+            ("httpx",),
+            lambda: httpx.Client(
+                timeout=self.timeout(),
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size,
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+            ),
+        )
+
+    def http_session(self) -> _t.Any:
+        """Pooled ``requests`` session with default timeouts and retries."""
+        if requests is None:
+            raise RuntimeError("requests is not installed")
+        return self.get(("requests",), self._build_session)
+
+    def _build_session(self) -> _t.Any:
+        options: dict[str, _t.Any] = {}
+        # plafond et jitter configurables depuis urllib3 2.x seulement
+        # (requirements-grok.txt reste en 1.26)
+        params = inspect.signature(Retry.__init__).parameters
+        if "backoff_jitter" in params:
+            options.update(backoff_max=BACKOFF_CAP, backoff_jitter=BACKOFF_BASE)
+        retry = Retry(
+            total=self.max_retries,
+            backoff_factor=BACKOFF_BASE,
+            status_forcelist=sorted(RETRY_STATUSES),
+            # méthodes idempotentes seulement : un POST LLM rejoué sur 5xx
+            # peut être facturé deux fois (les erreurs de connexion restent
+            # rejouées pour toutes les méthodes)
+            raise_on_status=False,
+            **options,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            max_retries=retry,
+        )
+        session = _TimeoutSession((self.connect_timeout, self.read_timeout))
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    # -- providers -------------------------------------------------------
+    def _sdk_client(
+        self, provider: str, cls: _t.Callable, api_key: str | None, shared_pool: bool
+    ) -> _t.Any:
+        """Sync clients are process-wide; async ones are cached per event loop."""
+
+        def build():
+            options: dict[str, _t.Any] = {
+                "api_key": api_key,
+                "timeout": self.timeout(),
+                "max_retries": self.max_retries,
+            }
+            if shared_pool and self.httpx_client() is not None:
+                options["http_client"] = self.httpx_client()
+            logger.info("🔌 New %s client", provider)
+            return cls(**_accepted(cls, options))
+
+        if shared_pool:
+            return self.get((provider, cls, api_key), build)
+        cache = self._loop_cache()
+        if cache is None:
+            return build()  # hors boucle : client non partagé
+        return self.get((provider, cls, api_key), build, cache)
+
+    def openai(self, api_key: str | None, cls: _t.Callable | None = None) -> _t.Any:
+        if cls is None:
+            from openai import OpenAI as cls
+        return self._sdk_client("openai", cls, api_key, shared_pool=True)
+
+    def async_openai(
+        self, api_key: str | None, cls: _t.Callable | None = None
+    ) -> _t.Any:
+        if cls is None:
+            from openai import AsyncOpenAI as cls
+        return self._sdk_client("openai-async", cls, api_key, shared_pool=False)
+
+    def anthropic(self, api_key: str | None, cls: _t.Callable | None = None) -> _t.Any:
+        if cls is None:
+            from anthropic import Anthropic as cls
+        return self._sdk_client("anthropic", cls, api_key, shared_pool=True)
+
+    def async_anthropic(
+        self, api_key: str | None, cls: _t.Callable | None = None
+    ) -> _t.Any:
+        if cls is None:
+            from anthropic import AsyncAnthropic as cls
+        return self._sdk_client("anthropic-async", cls, api_key, shared_pool=False)
+
+    def xai(
+        self,
+        api_key: str | None,
+        cls: _t.Callable | None = None,
+        timeout: float | None = None,
+    ) -> _t.Any:
+        """xAI gRPC client; its channel stays open between calls."""
+        if cls is None:
+            from xai_sdk import Client as cls
+        timeout = timeout or self.read_timeout
+        return self.get(
+            ("xai", cls, api_key, timeout),
+            lambda: cls(**_accepted(cls, {"api_key": api_key, "timeout": timeout})),
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            close = getattr(client, "close", None)
+            if callable(close) and not inspect.iscoroutinefunction(close):
+                try:
+                    close()
+                except Exception:  # pragma: no cover - fermeture best effort
+                    pass
+
+
+if requests is not None:
+
+    class _TimeoutSession(requests.Session):
+        """``requests.Session`` applying a default ``(connect, read)`` timeout."""
+
+        def __init__(self, timeout: tuple[float, float]) -> None:
+            super().__init__()
+            self.default_timeout = timeout
+
+        def request(self, method, url, **kwargs):  # type: ignore[override]
+            kwargs.setdefault("timeout", self.default_timeout)
+            return super().request(method, url, **kwargs)
+
+
+_registry: ClientRegistry | None = None
+_registry_lock = threading.Lock()
+
+
+def get_client_registry() -> ClientRegistry:
+    """Return the process-wide registry."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ClientRegistry()
+    return _registry
+
+
+__all__ = [
+    "ClientRegistry",
+    "backoff_delay",
+    "get_client_registry",
+    "is_transient_error",
+    "retry_call",
+]
@@ -0,0 +1,487 @@
+"""Event-driven scheduler for orchestrator cycles.
+
+Instead of sleeping a fixed amount of time between cycles, the scheduler
+polls cheap event sources (an append-only JSONL file fed by the
+dashboard, GitHub issues, pytest's ``lastfailed`` cache, memory pattern
+fingerprints, an optional proactive timer) and pushes their events into a
+priority queue. Events with the same ``key`` are coalesced. Up to
+``max_concurrency`` cycles run at once; when nothing happens the poll
+interval backs off exponentially from ``idle_min`` to ``idle_max``.
+
+The backoff only applies to the expensive sources. Cheap local sources
+(``cheap = True``, e.g. the events file) are still polled every
+``local_poll_interval`` seconds, and :meth:`CycleScheduler.submit` wakes
+the loop at once.
+
+Environment:
+    JARVYS_EVENTS_FILE: JSONL file read by :class:`FileEventSource`
+"""
+
+from __future__ import annotations
+
+import hashlib
+import heapq
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+import typing as _t
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EVENTS_FILE = Path.home() / ".cache" / "jarvys" / "events.jsonl"
+
+# Plus la valeur est basse, plus l'événement est prioritaire
+PRIORITIES = {
+    "command": 0,
+    "failing_test": 1,
+    "issue": 2,
+    "memory_pattern": 3,
+    "proactive": 9,
+}
+DEFAULT_PRIORITY = 5
+
+
+@dataclass
+class CycleEvent:
+    kind: str
+    payload: dict[str, _t.Any] = field(default_factory=dict)
+    priority: int = DEFAULT_PRIORITY
+    key: str = ""
+    created: float = field(default_factory=time.time)
+
+    @classmethod
+    def make(
+        cls,
+        kind: str,
+        payload: dict[str, _t.Any] | None = None,
+        *,
+        key: str | None = None,
+        priority: int | None = None,
+    ) -> "CycleEvent":
+        payload = payload or {}
+        if key is None:
+            # sans clé explicite, deux événements identiques fusionnent
+            digest = json.dumps(payload, sort_keys=True, default=str)
+            key = f"{kind}:{hashlib.sha1(digest.encode()).hexdigest()[:12]}"
+        return cls(
+            kind=kind,
+            payload=payload,
+            priority=(
+                PRIORITIES.get(kind, DEFAULT_PRIORITY) if priority is None else priority
+            ),
+            key=key,
+        )
+
+
+def default_events_path() -> Path:
+    return Path(os.getenv("JARVYS_EVENTS_FILE", str(DEFAULT_EVENTS_FILE)))
+
+
+def append_event(
+    kind: str,
+    payload: dict[str, _t.Any] | None = None,
+    *,
+    path: str | Path | None = None,
+    priority: int | None = None,
+    key: str | None = None,
+) -> dict[str, _t.Any]:
+    """Append one event line to the JSONL file read by the scheduler."""
+    path = Path(path) if path else default_events_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    record = {"kind": kind, "payload": payload or {}, "ts": time.time()}
+    if priority is not None:
+        record["priority"] = priority
+    if key is not None:
+        record["key"] = key
+    # une seule écriture O_APPEND : les lignes ne s'entremêlent pas
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write(json.dumps(record, default=str) + "\n")
+    return record
+
+
+class EventSource(_t.Protocol):
+    def poll(self) -> list[CycleEvent]: ...
+
+
+class FileEventSource:
+    """Tail a JSONL file; each complete line is one event."""
+
+    cheap = True  # un stat par poll : non soumis au backoff
+
+    def __init__(self, path: str | Path | None = None) -> None:
+        self.path = Path(path) if path else default_events_path()
+        self._offset = self.path.stat().st_size if self.path.exists() else 0
+
+    def poll(self) -> list[CycleEvent]:
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            self._offset = 0
+            return []
+        if size < self._offset:  # fichier tronqué ou remplacé
+            self._offset = 0
+        if size == self._offset:
+            return []
+        with open(self.path, "rb") as fh:
+            fh.seek(self._offset)
+            chunk = fh.read(size - self._offset)
+        # une ligne incomplète sera relue au prochain poll
+        end = chunk.rfind(b"\n") + 1
+        self._offset += end
+        events = []
+        for line in chunk[:end].splitlines():
+            try:
+                data = json.loads(line)
+                events.append(
+                    CycleEvent.make(
+                        data["kind"],
+                        data.get("payload"),
+                        key=data.get("key"),
+                        priority=data.get("priority"),
+                    )
+                )
+            except (ValueError, KeyError, TypeError) as exc:
+                logger.warning("⚠️ Invalid event line ignored: %s", exc)
+        return events
+
+
+class _IntervalSource:
+    """Base for sources that are expensive enough to poll only every N s."""
+
+    cheap = False
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._next = 0.0
+
+    def poll(self) -> list[CycleEvent]:
+        now = time.monotonic()
+        if now < self._next:
+            return []
+        self._next = now + self.interval
+        try:
+            return self.check()
+        except Exception as exc:  # pragma: no cover - network failures
+            logger.warning("⚠️ %s poll failed: %s", type(self).__name__, exc)
+            return []
+
+    def check(self) -> list[CycleEvent]:  # pragma: no cover - abstract
+        raise NotImplementedError
+
+
+class GitHubIssueSource(_IntervalSource):
+    """Open issues created or edited since the previous poll."""
+
+    def __init__(self, repo: _t.Any, *, interval: float = 300.0) -> None:
+        super().__init__(interval)
+        self.repo = repo
+        self._since = datetime.now(timezone.utc)
+
+    def check(self) -> list[CycleEvent]:
+        events = []
+        latest = self._since
+        for issue in self.repo.get_issues(state="open", since=self._since):
+            updated = issue.updated_at
+            if updated.tzinfo is None:
+                updated = updated.replace(tzinfo=timezone.utc)
+            if updated <= self._since:
+                continue
+            latest = max(latest, updated)
+            events.append(
+                CycleEvent.make(
+                    "issue",
+                    {"task": issue.title, "number": issue.number},
+                    key=f"issue:{self.repo.full_name}#{issue.number}",
+                )
+            )
+        self._since = latest
+        return events
+
+
+class FailingTestsSource(_IntervalSource):
+    """Tests newly listed in pytest's ``.pytest_cache/v/cache/lastfailed``."""
+
+    def __init__(self, root: str | Path, *, interval: float = 30.0) -> None:
+        super().__init__(interval)
+        self.path = Path(root) / ".pytest_cache" / "v" / "cache" / "lastfailed"
+        self._mtime: float | None = None
+        self._known: set[str] = set()
+        if self.path.exists():
+            # échecs déjà connus au démarrage = référence
+            self._mtime = self.path.stat().st_mtime
+            self._known = self._read()
+
+    def _read(self) -> set[str]:
+        try:
+            return set(json.loads(self.path.read_text()))
+        except (OSError, ValueError):
+            return set()
+
+    def check(self) -> list[CycleEvent]:
+        if not self.path.exists():
+            self._known = set()
+            return []
+        mtime = self.path.stat().st_mtime
+        if mtime == self._mtime:
+            return []
+        self._mtime = mtime
+        failing = self._read()
+        new = sorted(failing - self._known)
+        self._known = failing
+        return [
+            CycleEvent.make(
+                "failing_test",
+                {"task": f"Fix failing test {nodeid}", "test": nodeid},
+                key=f"test:{nodeid}",
+            )
+            for nodeid in new
+        ]
+
+
+class MemoryPatternSource(_IntervalSource):
+    """Fires when the fingerprint of the analysed memory patterns changes."""
+
+    def __init__(
+        self,
+        fetch: _t.Callable[[], dict | None],
+        *,
+        interval: float = 600.0,
+    ) -> None:
+        super().__init__(interval)
+        self.fetch = fetch
+        self._fingerprint: str | None = None
+
+    def check(self) -> list[CycleEvent]:
+        patterns = self.fetch()
+        if not patterns:
+            return []
+        fingerprint = hashlib.sha1(
+            json.dumps(patterns, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        previous, self._fingerprint = self._fingerprint, fingerprint
+        if previous is None or previous == fingerprint:
+            return []  # premier relevé = référence
+        return [
+            CycleEvent.make(
+                "memory_pattern",
+                {"summary": patterns.get("summary", "")},
+                key="memory_pattern",
+            )
+        ]
+
+
+class IntervalEventSource(_IntervalSource):
+    """Low-priority proactive event every ``interval`` seconds."""
+
+    def __init__(self, interval: float, kind: str = "proactive") -> None:
+        super().__init__(interval)
+        self.kind = kind
+
+    def check(self) -> list[CycleEvent]:
+        return [CycleEvent.make(self.kind, key=self.kind)]
+
+
+@dataclass
+class SchedulerStats:
+    received: int = 0
+    coalesced: int = 0
+    processed: int = 0
+    failed: int = 0
+    idle_waits: int = 0
+    queue_wait_total: float = 0.0
+    by_kind: dict[str, int] = field(default_factory=dict)
+
+    def as_dict(self) -> dict[str, _t.Any]:
+        return {
+            "received": self.received,
+            "coalesced": self.coalesced,
+            "processed": self.processed,
+            "failed": self.failed,
+            "idle_waits": self.idle_waits,
+            "avg_queue_wait_s": round(
+                self.queue_wait_total / self.processed if self.processed else 0.0, 3
+            ),
+            "by_kind": dict(self.by_kind),
+        }
+
+
+class CycleScheduler:
+    """Run ``handler(event)`` for queued events, most urgent first."""
+
+    def __init__(
+        self,
+        handler: _t.Callable[[CycleEvent], _t.Any],
+        sources: _t.Sequence[EventSource],
+        *,
+        max_concurrency: int = 1,
+        idle_min: float = 5.0,
+        idle_max: float = 1800.0,
+        idle_factor: float = 2.0,
+        local_poll_interval: float = 2.0,
+    ) -> None:
+        self.handler = handler
+        self.sources = list(sources)
+        self.max_concurrency = max(1, max_concurrency)
+        self.idle_min = idle_min
+        self.idle_max = idle_max
+        self.idle_factor = idle_factor
+        self.local_poll_interval = local_poll_interval
+        self.stats = SchedulerStats()
+        self._heap: list[tuple[int, float, int, str]] = []
+        self._queued: dict[str, tuple[int, CycleEvent]] = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()  # submit() / stop() réveillent la boucle
+
+    # -------------------------------------------------------------- queue
+    def submit(self, event: CycleEvent) -> None:
+        """Queue ``event``, merging it with a queued event of the same key."""
+        with self._lock:
+            self.stats.received += 1
+            current = self._queued.get(event.key)
+            if current is not None:
+                self.stats.coalesced += 1
+                old = current[1]
+                if old.priority <= event.priority:
+                    old.payload = {**old.payload, **event.payload}
+                    return
+                event.created = min(event.created, old.created)
+            seq = next(self._seq)
+            self._queued[event.key] = (seq, event)
+            heapq.heappush(self._heap, (event.priority, event.created, seq, event.key))
+        self._wake.set()
+
+    def _pop(self) -> CycleEvent | None:
+        with self._lock:
+            while self._heap:
+                _, _, seq, key = heapq.heappop(self._heap)
+                current = self._queued.get(key)
+                if current is not None and current[0] == seq:
+                    del self._queued[key]
+                    return current[1]
+            return None
+
+    def __len__(self) -> int:
+        return len(self._queued)
+
+    def poll_sources(self, cheap_only: bool = False) -> int:
+        count = 0
+        for source in self.sources:
+            if cheap_only and not getattr(source, "cheap", False):
+                continue
+            for event in source.poll():
+                self.submit(event)
+                count += 1
+        return count
+
+    # ---------------------------------------------------------------- run
+    def _handle(self, event: CycleEvent) -> None:
+        wait_time = time.time() - event.created
+        logger.info(
+            "🔔 Cycle for %s (priority %d, waited %.1fs)",
+            event.kind,
+            event.priority,
+            wait_time,
+        )
+        try:
+            self.handler(event)
+        except Exception as exc:
+            logger.error("❌ Cycle for %s failed: %s", event.kind, exc)
+            with self._lock:
+                self.stats.failed += 1
+        finally:
+            with self._lock:
+                self.stats.processed += 1
+                self.stats.queue_wait_total += wait_time
+                self.stats.by_kind[event.kind] = (
+                    self.stats.by_kind.get(event.kind, 0) + 1
+                )
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def _local_poll_cap(self) -> float | None:
+        """Longest idle wait allowed by the cheap sources (``None``: no cap)."""
+        if any(getattr(source, "cheap", False) for source in self.sources):
+            return self.local_poll_interval
+        return None
+
+    def run(self, *, max_cycles: int | None = None) -> SchedulerStats:
+        """Process events until ``stop()`` or ``max_cycles`` cycles ran."""
+        self._stop.clear()
+        started = 0
+        delay = self.idle_min
+        next_full_poll = 0.0
+        cap = self._local_poll_cap()
+        running: set[Future] = set()
+        with ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="cycle"
+        ) as pool:
+            while not self._stop.is_set():
+                self._wake.clear()
+                # sources coûteuses seulement à l'échéance du backoff
+                full_poll = bool(running) or time.monotonic() >= next_full_poll
+                activity = self.poll_sources(cheap_only=not full_poll) > 0
+                while len(running) < self.max_concurrency and (
+                    max_cycles is None or started < max_cycles
+                ):
+                    event = self._pop()
+                    if event is None:
+                        break
+                    running.add(pool.submit(self._handle, event))
+                    started += 1
+                    activity = True
+
+                if max_cycles is not None and started >= max_cycles and not running:
+                    break
+
+                if activity:
+                    delay = self.idle_min
+                    next_full_poll = 0.0  # backoff réinitialisé : poll complet
+                elif not running and full_poll:
+                    self.stats.idle_waits += 1
+                    logger.debug("💤 Idle, next poll in %.1fs", delay)
+
+                if running:
+                    # un cycle qui se termine libère une place tout de suite
+                    running = set(
+                        wait(
+                            running, timeout=self.idle_min, return_when=FIRST_COMPLETED
+                        ).not_done
+                    )
+                else:
+                    now = time.monotonic()
+                    if full_poll:
+                        next_full_poll = now + delay
+                        timeout = delay
+                        if not activity:
+                            delay = min(delay * self.idle_factor, self.idle_max)
+                    else:
+                        timeout = max(0.0, next_full_poll - now)
+                    if cap is not None:
+                        timeout = min(timeout, cap)
+                    self._wake.wait(timeout)
+        return self.stats
+
+
+__all__ = [
+    "CycleEvent",
+    "CycleScheduler",
+    "EventSource",
+    "FailingTestsSource",
+    "FileEventSource",
+    "GitHubIssueSource",
+    "IntervalEventSource",
+    "MemoryPatternSource",
+    "append_event",
+    "default_events_path",
+]
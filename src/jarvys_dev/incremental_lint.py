@@ -0,0 +1,322 @@
+"""Changed-files-only lint stage for the orchestrator's ``fix_lint`` step.
+
+A manifest keeps the content hash of every file that was lint-clean after
+the last run. Each cycle only files whose hash changed are handed to
+ruff, black and pre-commit; ``poetry install`` runs only when
+``poetry.lock`` changed. Editing a lint configuration file clears the
+manifest so everything is checked again.
+
+Hashes are cached against ``(mtime_ns, size)`` so unchanged files are not
+re-read. The manifest lives outside the repository (``JARVYS_LINT_CACHE``)
+because the orchestrator commits with ``git add .``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import time
+import typing as _t
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "jarvys" / "lint"
+LINT_SUFFIXES = frozenset({".py", ".pyi", ".yaml", ".yml", ".md"})
+PYTHON_SUFFIXES = frozenset({".py", ".pyi"})
+CONFIG_FILES = ("pyproject.toml", "ruff.toml", ".ruff.toml", ".pre-commit-config.yaml")
+LOCK_FILE = "poetry.lock"
+EXCLUDED_DIRS = frozenset(
+    {
+        ".git",
+        ".venv",
+        "venv",
+        "node_modules",
+        "__pycache__",
+        ".mypy_cache",
+        ".ruff_cache",
+        ".pytest_cache",
+        ".tox",
+        "build",
+        "dist",
+    }
+)
+CHUNK_SIZE = 200  # fichiers par commande (limite de longueur d'argv)
+
+Runner = _t.Callable[..., subprocess.CompletedProcess]
+
+_RUFF_PATH = re.compile(r"^(?:\s*-->\s*)?([^\s:][^:]*\.pyi?):\d+:\d+", re.M)
+_BLACK_FAIL = re.compile(r"^error: cannot format ([^:]+\.pyi?):", re.M)
+
+
+def default_manifest_path(root: str | Path) -> Path | None:
+    """Manifest for ``root`` under ``JARVYS_LINT_CACHE``; ``None`` if disabled."""
+    base = os.getenv("JARVYS_LINT_CACHE", str(DEFAULT_CACHE_DIR))
+    if base.lower() in {"", "off", "0", "false"}:
+        return None
+    digest = hashlib.sha1(str(Path(root).resolve()).encode()).hexdigest()[:16]
+    return Path(base) / f"{digest}.json"
+
+
+def file_digest(path: Path) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+@dataclass
+class LintReport:
+    files_total: int = 0
+    files_linted: list[str] = field(default_factory=list)
+    files_failing: list[str] = field(default_factory=list)
+    install_ran: bool = False
+    manifest_reset: bool = False
+    commands: dict[str, float] = field(default_factory=dict)  # commande -> durée
+    output: str = ""
+    duration: float = 0.0
+    time_saved: float = 0.0  # estimation par rapport à un passage complet
+
+    @property
+    def clean(self) -> bool:
+        return not self.files_failing
+
+    def as_dict(self) -> dict[str, _t.Any]:
+        data = asdict(self)
+        data["files_linted"] = len(self.files_linted)
+        data["output"] = self.output[:500]
+        data["time_saved"] = round(self.time_saved, 3)
+        data["duration"] = round(self.duration, 3)
+        return data
+
+
+class IncrementalLinter:
+    """Run ruff/black/pre-commit only on files changed since the last clean run."""
+
+    def __init__(
+        self,
+        root: str | Path,
+        manifest_path: str | Path | None = None,
+        *,
+        prefix: _t.Sequence[str] | None = None,
+        runner: Runner = subprocess.run,
+        timeout: float = 600.0,
+    ) -> None:
+        self.root = Path(root)
+        self.manifest_path = Path(manifest_path) if manifest_path else None
+        if prefix is None:
+            use_poetry = (self.root / "pyproject.toml").exists() and shutil.which(
+                "poetry"
+            )
+            prefix = ("poetry", "run") if use_poetry else ()
+        self.prefix = tuple(prefix)
+        self.runner = runner
+        self.timeout = timeout
+        self.manifest = self._load()
+
+    # -- manifest --------------------------------------------------------
+    def _load(self) -> dict[str, _t.Any]:
+        empty = {"files": {}, "config": "", "lock": "", "costs": {}}
+        if self.manifest_path is None:
+            return empty
+        try:
+            data = json.loads(self.manifest_path.read_text())
+        except (OSError, ValueError):
+            return empty
+        return {**empty, **data} if isinstance(data, dict) else empty
+
+    def _save(self) -> None:
+        if self.manifest_path is None:
+            return
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.manifest))
+        os.replace(tmp, self.manifest_path)
+
+    def _hash(self, rel: str, cached: list | None = None) -> list | None:
+        """``[digest, mtime_ns, size]`` of ``rel``, reusing ``cached`` if unchanged."""
+        try:
+            st = (self.root / rel).stat()
+        except OSError:
+            return None
+        if cached and cached[1:] == [st.st_mtime_ns, st.st_size]:
+            return cached
+        return [file_digest(self.root / rel), st.st_mtime_ns, st.st_size]
+
+    def _combined_digest(self, names: _t.Iterable[str]) -> str:
+        h = hashlib.blake2b(digest_size=16)
+        for name in names:
+            path = self.root / name
+            if path.exists():
+                h.update(name.encode() + b"\0" + file_digest(path).encode())
+        return h.hexdigest()
+
+    def iter_files(self) -> _t.Iterator[str]:
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = sorted(d for d in dirnames if d not in EXCLUDED_DIRS)
+            for name in sorted(filenames):
+                if os.path.splitext(name)[1] in LINT_SUFFIXES:
+                    yield os.path.relpath(os.path.join(dirpath, name), self.root)
+
+    def changed_files(self, files: _t.Iterable[str] | None = None) -> list[str]:
+        """Files whose content differs from their last lint-clean version."""
+        known = self.manifest["files"]
+        changed = []
+        for rel in self.iter_files() if files is None else files:
+            cached = known.get(rel)
+            current = self._hash(rel, cached)
+            if current is None:
+                continue
+            if cached is None or current[0] != cached[0]:
+                changed.append(rel)
+            elif current is not cached:
+                known[rel] = current  # touché mais identique : rafraîchir le stat
+        return changed
+
+    # -- exécution -------------------------------------------------------
+    def _run(
+        self, report: LintReport, label: str, args: list[str], prefixed: bool = True
+    ) -> tuple[int, str]:
+        start = time.perf_counter()
+        try:
+            proc = self.runner(
+                [*(self.prefix if prefixed else ()), *args],
+                cwd=self.root,
+                capture_output=True,
+                text=True,
+                timeout=self.timeout,
+            )
+            code, out = proc.returncode, (proc.stdout or "") + (proc.stderr or "")
+        except (OSError, subprocess.SubprocessError) as exc:
+            code, out = 127, str(exc)
+        elapsed = time.perf_counter() - start
+        report.commands[label] = report.commands.get(label, 0.0) + elapsed
+        report.output += out[:200] + ("\n" if out else "")
+        return code, out
+
+    def _run_chunked(
+        self, report: LintReport, label: str, args: list[str], files: list[str]
+    ) -> tuple[bool, str]:
+        ok, output = True, ""
+        for i in range(0, len(files), CHUNK_SIZE):
+            code, out = self._run(report, label, args + files[i : i + CHUNK_SIZE])
+            ok, output = ok and code == 0, output + out
+        return ok, output
+
+    def _record_cost(self, label: str, seconds: float, units: int) -> None:
+        """EWMA of seconds per unit (file, or 1 for installs)."""
+        if units <= 0:
+            return
+        per_unit = seconds / units
+        old = self.manifest["costs"].get(label)
+        self.manifest["costs"][label] = (
+            per_unit if old is None else 0.7 * old + 0.3 * per_unit
+        )
+
+    def run(self) -> LintReport:
+        start = time.perf_counter()
+        report = LintReport()
+
+        config = self._combined_digest(CONFIG_FILES)
+        if config != self.manifest["config"]:
+            # nouvelles règles : rien n'est plus garanti propre
+            report.manifest_reset = bool(self.manifest["files"])
+            self.manifest["files"] = {}
+            self.manifest["config"] = config
+
+        present = list(self.iter_files())
+        changed = self.changed_files(present)
+        present = set(present)
+        for rel in list(self.manifest["files"]):
+            if rel not in present:
+                del self.manifest["files"][rel]
+        report.files_total = len(present)
+        report.files_linted = changed
+
+        failing: set[str] = set()
+        python = [f for f in changed if os.path.splitext(f)[1] in PYTHON_SUFFIXES]
+        if python:
+            ok, out = self._run_chunked(
+                report,
+                "ruff",
+                ["ruff", "check", "--fix", "--unsafe-fixes", "--force-exclude"],
+                python,
+            )
+            if not ok:
+                found = {os.path.normpath(p) for p in _RUFF_PATH.findall(out)}
+                # chemins non identifiables : tout le lot reste à revérifier
+                failing |= found & set(python) or set(python)
+            ok, out = self._run_chunked(report, "black", ["black", "-q"], python)
+            if not ok:
+                found = {os.path.normpath(p) for p in _BLACK_FAIL.findall(out)}
+                failing |= found & set(python) or set(python)
+        if changed and (self.root / ".pre-commit-config.yaml").exists():
+            ok, _ = self._run_chunked(
+                report, "pre-commit", ["pre-commit", "run", "--files"], changed
+            )
+            if not ok:
+                failing |= set(changed)
+
+        for rel in changed:
+            if rel in failing:
+                self.manifest["files"].pop(rel, None)
+                continue
+            current = self._hash(rel)  # contenu après corrections
+            if current is not None:
+                self.manifest["files"][rel] = current
+        report.files_failing = sorted(failing)
+
+        lock = self._combined_digest([LOCK_FILE])
+        if (self.root / LOCK_FILE).exists() and lock != self.manifest["lock"]:
+            # poetry install n'est pas préfixé par « poetry run »
+            code, _ = self._run(
+                report, "install", ["poetry", "install", "--with", "dev"], False
+            )
+            report.install_ran = True
+            if code == 0:
+                self.manifest["lock"] = lock
+        # coût par fichier effectivement traité : ruff et black ne voient que
+        # les fichiers Python, pre-commit tous les fichiers modifiés
+        handled = {
+            "ruff": len(python),
+            "black": len(python),
+            "pre-commit": len(changed),
+        }
+        for label, units in handled.items():
+            if label in report.commands:
+                self._record_cost(label, report.commands[label], units)
+        if report.install_ran:
+            self._record_cost("install", report.commands["install"], 1)
+
+        python_total = sum(
+            1 for rel in present if os.path.splitext(rel)[1] in PYTHON_SUFFIXES
+        )
+        skipped = {
+            "ruff": python_total - len(python),
+            "black": python_total - len(python),
+            "pre-commit": report.files_total - len(changed),
+        }
+        costs = self.manifest["costs"]
+        report.time_saved = sum(
+            count * costs.get(label, 0.0) for label, count in skipped.items()
+        ) + (0.0 if report.install_ran else costs.get("install", 0.0))
+        report.duration = time.perf_counter() - start
+        self._save()
+        logger.info(
+            "🧹 Lint: %d/%d files, %.1fs (≈%.1fs saved)",
+            len(changed),
+            report.files_total,
+            report.duration,
+            report.time_saved,
+        )
+        return report
+
+
+__all__ = ["IncrementalLinter", "LintReport", "default_manifest_path"]
@@ -6,14 +6,25 @@ Analyse la tâche et sélectionne le modèle optimal en temps réel.
 import json
 import logging
 import os
+from collections import deque
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, List, Tuple
+from typing import Deque, Dict, List, Optional, Tuple
 
 import requests
 
+from .performance_stats import PerformanceStore, get_performance_store
+
+try:
+    import numpy as np
+except Exception:  # pragma: no cover - package optional
+    np = None
+
 logger = logging.getLogger(__name__)
 
+HISTORY_LIMIT = 1000  # performances conservées dans performance_history
+HISTORY_WINDOW = 10  # performances récentes prises en compte par modèle
+
 
 @dataclass
 class ModelCapabilities:
@@ -44,12 +55,142 @@ class TaskAnalysis:
     estimated_tokens: int
 
 
+# Mots-clés cherchés comme sous-chaînes du prompt en minuscules ("how"
+# trouve "show"). L'ordre de TASK_TYPE_KEYWORDS fixe la priorité de détection.
+TASK_TYPE_KEYWORDS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("coding", ("code", "function", "debug", "programming", "script")),
+    ("mathematical", ("math", "calculate", "solve", "equation", "algorithm")),
+    ("creative", ("create", "write", "story", "poem", "creative", "imagine")),
+    ("reasoning", ("analyze", "reason", "explain", "why", "how", "complex")),
+    ("multimodal", ("image", "video", "visual", "picture", "diagram")),
+    ("fast", ("quick", "fast", "simple", "brie", "summary")),
+)
+COMPLEX_KEYWORDS = (
+    "algorithm",
+    "architecture",
+    "optimization",
+    "analysis",
+    "synthesis",
+)
+CREATIVE_KEYWORDS = ("creative", "innovative", "original", "unique")
+REASONING_KEYWORDS = ("why", "how", "explain", "analyze", "logic")
+URGENT_KEYWORDS = ("quick", "fast", "urgent", "now", "immediately")
+THOROUGH_KEYWORDS = ("detailed", "thorough", "comprehensive", "deep")
+MULTIMODAL_KEYWORDS = (
+    "image",
+    "picture",
+    "photo",
+    "video",
+    "visual",
+    "diagram",
+    "chart",
+    "graph",
+)
+
+
+@dataclass(frozen=True)
+class TaskFeatures:
+    """Signaux d'un prompt, extraits en une passe par TaskFeatureExtractor."""
+
+    task_type: str
+    length: int
+    word_count: int
+    question_count: int
+    complex_count: int
+    creative_hint: bool
+    reasoning_hint: bool
+    urgent_hint: bool
+    thorough_hint: bool
+    multimodal: bool
+
+
+class TaskFeatureExtractor:
+    """Extrait tous les signaux de analyze_task en une seule passe.
+
+    Aucun mot-clé ne contient d'espace : chaque occurrence tient dans un
+    seul token du prompt. On lowercase et découpe donc le prompt une fois,
+    puis on cherche chaque mot-clé distinct dans les tokens *uniques*, bien
+    moins nombreux que les mots d'un long prompt.
+    """
+
+    def __init__(self):
+        groups = [keywords for _, keywords in TASK_TYPE_KEYWORDS] + [
+            COMPLEX_KEYWORDS,
+            CREATIVE_KEYWORDS,
+            REASONING_KEYWORDS,
+            URGENT_KEYWORDS,
+            THOROUGH_KEYWORDS,
+            MULTIMODAL_KEYWORDS,
+        ]
+        self.keywords = tuple(sorted({kw for group in groups for kw in group}))
+
+    def extract(self, prompt: str) -> TaskFeatures:
+        tokens = prompt.lower().split()
+        haystack = "\n".join(set(tokens))
+        found = {kw for kw in self.keywords if kw in haystack}
+
+        task_type = next(
+            (
+                name
+                for name, keywords in TASK_TYPE_KEYWORDS
+                if not found.isdisjoint(keywords)
+            ),
+            "general",
+        )
+        return TaskFeatures(
+            task_type=task_type,
+            length=len(prompt),
+            word_count=len(tokens),
+            question_count=prompt.count("?"),
+            complex_count=len(found.intersection(COMPLEX_KEYWORDS)),
+            creative_hint=not found.isdisjoint(CREATIVE_KEYWORDS),
+            reasoning_hint=not found.isdisjoint(REASONING_KEYWORDS),
+            urgent_hint=not found.isdisjoint(URGENT_KEYWORDS),
+            thorough_hint=not found.isdisjoint(THOROUGH_KEYWORDS),
+            multimodal=not found.isdisjoint(MULTIMODAL_KEYWORDS),
+        )
+
+
+_FEATURE_EXTRACTOR = TaskFeatureExtractor()
+
+
+class PerformanceRing:
+    """Buffer circulaire des derniers taux de succès d'un modèle.
+
+    La somme glissante est tenue à jour à chaque ajout : la moyenne des
+    ``HISTORY_WINDOW`` dernières performances se lit en O(1).
+    """
+
+    __slots__ = ("values", "index", "count", "total")
+
+    def __init__(self, size: int = HISTORY_WINDOW):
+        self.values = [0.0] * size
+        self.index = 0
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value: float) -> None:
+        if self.count == len(self.values):
+            self.total -= self.values[self.index]
+        else:
+            self.count += 1
+        self.values[self.index] = value
+        self.total += value
+        self.index = (self.index + 1) % len(self.values)
+
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+
 class IntelligentOrchestrator:
     """Orchestrateur intelligent pour sélection automatique de modèles."""
 
     def __init__(self):
         self.models_db: Dict[str, ModelCapabilities] = {}
-        self.performance_history: List[Dict] = []
+        self.performance_history: Deque[Dict] = deque(maxlen=HISTORY_LIMIT)
+        self._history: Dict[str, PerformanceRing] = {}
+        self._score_index: Optional[Dict] = None
+        self.stats_store: Optional[PerformanceStore] = get_performance_store()
         self.last_update = None
         self._initialize_models_database()
         self._load_from_huggingface()
@@ -286,170 +427,90 @@ class IntelligentOrchestrator:
     def analyze_task(self, prompt: str, task_type: str = "auto") -> TaskAnalysis:
         """Analyse une tâche pour déterminer les besoins."""
 
+        # Extraction de tous les signaux en une seule passe
+        features = _FEATURE_EXTRACTOR.extract(prompt)
+
         # Détection automatique du type de tâche
         if task_type == "auto":
-            task_type = self._detect_task_type(prompt)
-
-        # Analyse de complexité
-        complexity = self._estimate_complexity(prompt)
-
-        # Besoins en créativité
-        creativity_needed = self._estimate_creativity_need(prompt, task_type)
-
-        # Besoins en raisonnement
-        reasoning_needed = self._estimate_reasoning_need(prompt, task_type)
-
-        # Priorité vitesse
-        speed_priority = self._estimate_speed_priority(prompt, task_type)
-
-        # Multimodal nécessaire
-        multimodal_needed = self._detect_multimodal_need(prompt)
+            task_type = features.task_type
 
         # Estimation de tokens
-        estimated_tokens = len(prompt.split()) * 1.3  # Approximation
+        estimated_tokens = features.word_count * 1.3  # Approximation
 
         return TaskAnalysis(
             task_type=task_type,
-            complexity=complexity,
-            creativity_needed=creativity_needed,
-            reasoning_needed=reasoning_needed,
-            speed_priority=speed_priority,
-            multimodal_needed=multimodal_needed,
+            complexity=self._estimate_complexity(features),
+            creativity_needed=self._estimate_creativity_need(features, task_type),
+            reasoning_needed=self._estimate_reasoning_need(features, task_type),
+            speed_priority=self._estimate_speed_priority(features, task_type),
+            multimodal_needed=features.multimodal,
             estimated_tokens=int(estimated_tokens),
         )
 
-    def _detect_task_type(self, prompt: str) -> str:
-        """Détecte automatiquement le type de tâche."""
-        prompt_lower = prompt.lower()
-
-        # Patterns de détection
-        if any(
-            kw in prompt_lower
-            for kw in ["code", "function", "debug", "programming", "script"]
-        ):
-            return "coding"
-        elif any(
-            kw in prompt_lower
-            for kw in ["math", "calculate", "solve", "equation", "algorithm"]
-        ):
-            return "mathematical"
-        elif any(
-            kw in prompt_lower
-            for kw in [
-                "create",
-                "write",
-                "story",
-                "poem",
-                "creative",
-                "imagine",
-            ]
-        ):
-            return "creative"
-        elif any(
-            kw in prompt_lower
-            for kw in ["analyze", "reason", "explain", "why", "how", "complex"]
-        ):
-            return "reasoning"
-        elif any(
-            kw in prompt_lower
-            for kw in ["image", "video", "visual", "picture", "diagram"]
-        ):
-            return "multimodal"
-        elif any(
-            kw in prompt_lower for kw in ["quick", "fast", "simple", "brie", "summary"]
-        ):
-            return "fast"
-        else:
-            return "general"
-
-    def _estimate_complexity(self, prompt: str) -> float:
+    def _estimate_complexity(self, features: TaskFeatures) -> float:
         """Estime la complexité de la tâche (0-1)."""
-        factors = []
-
-        # Longueur du prompt
-        length_factor = min(len(prompt) / 2000, 1.0)
-        factors.append(length_factor)
-
-        # Mots complexes
-        complex_words = [
-            "algorithm",
-            "architecture",
-            "optimization",
-            "analysis",
-            "synthesis",
+        factors = [
+            # Longueur du prompt
+            min(features.length / 2000, 1.0),
+            # Mots complexes
+            min(features.complex_count / len(COMPLEX_KEYWORDS), 1.0),
+            # Questions multiples
+            min(features.question_count / 5, 1.0),
         ]
-        complex_count = sum(1 for word in complex_words if word in prompt.lower())
-        complexity_factor = min(complex_count / len(complex_words), 1.0)
-        factors.append(complexity_factor)
-
-        # Questions multiples
-        question_count = prompt.count("?")
-        question_factor = min(question_count / 5, 1.0)
-        factors.append(question_factor)
-
         return sum(factors) / len(factors)
 
-    def _estimate_creativity_need(self, prompt: str, task_type: str) -> float:
+    def _estimate_creativity_need(
+        self, features: TaskFeatures, task_type: str
+    ) -> float:
         """Estime le besoin en créativité (0-1)."""
         if task_type in ["creative", "writing"]:
             return 0.9
         elif task_type in ["coding", "mathematical"]:
             return 0.3
-        elif any(
-            kw in prompt.lower()
-            for kw in ["creative", "innovative", "original", "unique"]
-        ):
+        elif features.creative_hint:
             return 0.8
         else:
             return 0.5
 
-    def _estimate_reasoning_need(self, prompt: str, task_type: str) -> float:
+    def _estimate_reasoning_need(self, features: TaskFeatures, task_type: str) -> float:
         """Estime le besoin en raisonnement (0-1)."""
         if task_type in ["mathematical", "reasoning", "coding"]:
             return 0.9
-        elif any(
-            kw in prompt.lower() for kw in ["why", "how", "explain", "analyze", "logic"]
-        ):
+        elif features.reasoning_hint:
             return 0.8
         else:
             return 0.6
 
-    def _estimate_speed_priority(self, prompt: str, task_type: str) -> float:
+    def _estimate_speed_priority(self, features: TaskFeatures, task_type: str) -> float:
         """Estime la priorité vitesse (0-1)."""
         if task_type == "fast":
             return 0.9
-        elif any(
-            kw in prompt.lower()
-            for kw in ["quick", "fast", "urgent", "now", "immediately"]
-        ):
+        elif features.urgent_hint:
             return 0.8
-        elif any(
-            kw in prompt.lower()
-            for kw in ["detailed", "thorough", "comprehensive", "deep"]
-        ):
+        elif features.thorough_hint:
             return 0.2
         else:
             return 0.5
 
-    def _detect_multimodal_need(self, prompt: str) -> bool:
-        """Détecte si la tâche nécessite du multimodal."""
-        multimodal_keywords = [
-            "image",
-            "picture",
-            "photo",
-            "video",
-            "visual",
-            "diagram",
-            "chart",
-            "graph",
-        ]
-        return any(kw in prompt.lower() for kw in multimodal_keywords)
-
     def select_optimal_model(
         self, task_analysis: TaskAnalysis
     ) -> Tuple[str, ModelCapabilities, float]:
         """Sélectionne le modèle optimal pour une tâche."""
 
+        if np is None:
+            best_name, best_model, best_score = self._select_by_loop(task_analysis)
+        else:
+            best_name, best_model, best_score = self._select_vectorized(task_analysis)
+
+        logger.info(
+            f"🎯 Modèle optimal sélectionné: {best_name} (score:" "{best_score:.2f})"
+        )
+        return best_name, best_model, best_score
+
+    def _select_by_loop(
+        self, task_analysis: TaskAnalysis
+    ) -> Tuple[str, Optional[ModelCapabilities], float]:
+        """Sélection modèle par modèle, utilisée quand NumPy est absent."""
         best_model = None
         best_score = 0
         best_name = ""
@@ -462,11 +523,89 @@ class IntelligentOrchestrator:
                 best_model = model
                 best_name = model_name
 
-        logger.info(
-            f"🎯 Modèle optimal sélectionné: {best_name} (score:" "{best_score:.2f})"
-        )
         return best_name, best_model, best_score
 
+    def _select_vectorized(
+        self, task: TaskAnalysis
+    ) -> Tuple[str, Optional[ModelCapabilities], float]:
+        """Score tous les modèles d'un coup (même formule que la boucle)."""
+        index = self._get_score_index()
+        if not index["names"]:
+            return "", None, 0
+
+        # Colonnes: raisonnement, créativité, vitesse, multimodal, coût
+        weights = np.array(
+            [
+                task.reasoning_needed,
+                task.creativity_needed,
+                task.speed_priority,
+                1.0 if task.multimodal_needed else 0.0,
+                1.0 if task.complexity < 0.3 else 0.0,
+            ]
+        )
+        n_terms = 4 + weights[3] + weights[4]
+        scores = index["matrix"] @ weights
+        specialty = index["specialties"].get(task.task_type)
+        if specialty is not None:
+            scores = scores + specialty
+        scores = np.minimum(scores / n_terms + index["history_bonus"], 1.0)
+
+        best = int(np.argmax(scores))  # premier maximum, comme la boucle
+        best_score = float(scores[best])
+        if best_score <= 0:
+            return "", None, 0
+        name = index["names"][best]
+        return name, self.models_db[name], best_score
+
+    def _get_score_index(self) -> Dict:
+        """Matrice des capacités, reconstruite si ``models_db`` a changé."""
+        index = self._score_index
+        if (
+            index is not None
+            and index["source"] is self.models_db
+            and len(index["names"]) == len(self.models_db)
+        ):
+            return index
+
+        names = list(self.models_db)
+        models = [self.models_db[name] for name in names]
+        matrix = np.array(
+            [
+                [
+                    m.reasoning_score,
+                    m.creativity_score,
+                    m.speed_score,
+                    0.8 if m.multimodal else 0.0,
+                    max(0, 1 - m.cost_per_1k_tokens * 100),
+                ]
+                for m in models
+            ],
+            dtype=float,
+        ).reshape(len(models), 5)
+
+        specialties: Dict[str, "np.ndarray"] = {}
+        for row, model in enumerate(models):
+            for specialty in set(model.specialties):
+                bonus = specialties.setdefault(specialty, np.zeros(len(models)))
+                bonus[row] = 0.2
+
+        history_bonus = np.array(
+            [self._get_historical_performance(name) for name in names], dtype=float
+        )
+        self._score_index = index = {
+            "source": self.models_db,
+            "names": names,
+            "rows": {name: row for row, name in enumerate(names)},
+            "matrix": matrix,
+            "specialties": specialties,
+            "history_bonus": history_bonus,
+        }
+        return index
+
+    def refresh_model_index(self):
+        """Force la reconstruction de la matrice après édition de models_db."""
+        self._score_index = None
+
     def _calculate_model_score(
         self, model: ModelCapabilities, task: TaskAnalysis
     ) -> float:
@@ -513,18 +652,14 @@ class IntelligentOrchestrator:
 
     def _get_historical_performance(self, model_name: str) -> float:
         """Récupère le bonus de performance historique."""
-        # Simulé pour l'instant - à implémenter avec données réelles
-        recent_performances = [
-            p for p in self.performance_history if p.get("model") == model_name
-        ]
-
-        if recent_performances:
-            avg_success = sum(
-                p.get("success", 0.5) for p in recent_performances[-10:]
-            ) / min(len(recent_performances), 10)
-            return (avg_success - 0.5) * 0.1  # Bonus/malus de 10%
-
-        return 0.0
+        ring = self._history.get(model_name)
+        avg_success = ring.mean() if ring is not None else None
+        if avg_success is None and getattr(self, "stats_store", None) is not None:
+            # Pas encore d'appel dans ce processus: statistiques persistées
+            avg_success = self.stats_store.model_success(model_name)
+        if avg_success is None:
+            return 0.0
+        return (avg_success - 0.5) * 0.1  # Bonus/malus de 10%
 
     def record_performance(
         self,
@@ -545,11 +680,20 @@ class IntelligentOrchestrator:
             "timestamp": datetime.now().isoformat(),
         }
 
+        # deque bornée: seules les HISTORY_LIMIT dernières sont gardées
         self.performance_history.append(performance)
 
-        # Garder seulement les 1000 dernières performances
-        if len(self.performance_history) > 1000:
-            self.performance_history = self.performance_history[-1000:]
+        ring = self._history.get(model_name)
+        if ring is None:
+            ring = self._history[model_name] = PerformanceRing()
+        ring.add(success_rate)
+        if self.stats_store is not None:
+            self.stats_store.record(model_name, task_type, success_rate, latency, cost)
+        index = self._score_index
+        if index is not None and model_name in index["rows"]:
+            index["history_bonus"][index["rows"][model_name]] = (
+                self._get_historical_performance(model_name)
+            )
 
         logger.info(
             f"📊 Performance enregistrée: {model_name} - {task_type} - "
@@ -663,6 +807,9 @@ class IntelligentOrchestrator:
                     / len(self.models_db)
                 ),
             },
+            "routing_stats": (
+                self.stats_store.summary() if self.stats_store is not None else {}
+            ),
         }
 
 
@@ -687,6 +834,9 @@ def reset_orchestrator():
 __all__ = [
     "IntelligentOrchestrator",
     "TaskAnalysis",
+    "TaskFeatures",
+    "TaskFeatureExtractor",
+    "PerformanceRing",
     "ModelCapabilities",
     "get_orchestrator",
     "reset_orchestrator",
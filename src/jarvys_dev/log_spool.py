@@ -0,0 +1,329 @@
+"""Durable batched writer for Supabase log and memory tables.
+
+Records are appended to a local JSONL write-ahead spool before being
+acknowledged, then a background thread bulk-inserts them (one insert per
+table and column set) when ``batch_size`` records are waiting or every
+``flush_interval`` seconds. The byte offset of the flushed prefix is
+persisted next to the spool, so records not yet written when the process
+stops — or during a Supabase outage — are replayed on the next start.
+Delivery is at-least-once.
+
+A batch that fails as a whole is treated as an outage and retried with
+exponential backoff. When only some rows of a batch are rejected, those
+rows are moved to a JSONL dead-letter file instead of blocking the queue.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+import typing as _t
+from collections import deque
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPOOL_FILE = Path.home() / ".cache" / "jarvys" / "log_spool.jsonl"
+
+Sink = _t.Callable[[str, _t.List[_t.Dict[str, _t.Any]]], _t.Any]
+
+
+def default_spool_path() -> Path | None:
+    """Spool file from ``JARVYS_LOG_SPOOL``; ``None`` disables persistence."""
+    path = os.getenv("JARVYS_LOG_SPOOL", str(DEFAULT_SPOOL_FILE))
+    if path.lower() in {"", "off", "0", "false"}:
+        return None
+    return Path(path)
+
+
+def iter_json_records(text: str) -> _t.Iterator[dict[str, _t.Any]]:
+    """Yield JSON objects from JSONL text, tolerating concatenated objects.
+
+    Older fallbacks wrote ``json.dump`` output without newlines; those
+    objects are still recovered, and a truncated trailing object is skipped.
+    """
+    decoder = json.JSONDecoder()
+    for line in text.splitlines():
+        idx, line = 0, line.strip()
+        while idx < len(line):
+            if line[idx] != "{":
+                idx = line.find("{", idx)
+                if idx < 0:
+                    break
+            try:
+                obj, idx = decoder.raw_decode(line, idx)
+            except json.JSONDecodeError:
+                break
+            if isinstance(obj, dict):
+                yield obj
+
+
+class _Entry(_t.NamedTuple):
+    table: str
+    record: dict[str, _t.Any]
+    end: int  # offset dans le spool après cette ligne
+
+
+class SpoolWriter:
+    """Buffer inserts locally and flush them to ``sink(table, rows)`` in bulk."""
+
+    def __init__(
+        self,
+        sink: Sink | None,
+        path: str | Path | None = None,
+        *,
+        batch_size: int = 50,
+        flush_interval: float = 2.0,
+        max_backoff: float = 300.0,
+        dead_letter: str | Path | None = None,
+        compact_bytes: int = 1 << 20,
+        autostart: bool = True,
+    ) -> None:
+        self.sink = sink
+        self.path = Path(path) if path else None
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+        self.dead_letter = Path(dead_letter) if dead_letter else None
+        self.compact_bytes = compact_bytes
+        self.autostart = autostart
+
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._pending: deque[_Entry] = deque()
+        self._committed = 0
+        self._failures = 0
+        self._closed = False
+        self._thread: threading.Thread | None = None
+        self._fh: _t.BinaryIO | None = None
+        self._metrics = {
+            "enqueued": 0,
+            "flushed": 0,
+            "replayed": 0,
+            "dead_lettered": 0,
+            "flushes": 0,
+            "failed_flushes": 0,
+            "flush_latency_total": 0.0,
+            "last_flush_latency": 0.0,
+            "max_flush_latency": 0.0,
+        }
+
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._replay()
+            self._fh = open(self.path, "ab")
+
+    # -- spool -----------------------------------------------------------
+    @property
+    def _offset_path(self) -> Path:
+        return self.path.with_name(self.path.name + ".offset")
+
+    def _replay(self) -> None:
+        try:
+            self._committed = int(self._offset_path.read_text().strip() or 0)
+        except (OSError, ValueError):
+            self._committed = 0
+        try:
+            data = self.path.read_bytes()
+        except FileNotFoundError:
+            data = b""
+        if self._committed > len(data):
+            self._committed = 0  # spool remplacé : tout rejouer
+
+        offset = self._committed
+        while offset < len(data):
+            newline = data.find(b"\n", offset)
+            if newline < 0:
+                # écriture interrompue : la ligne partielle est abandonnée
+                with open(self.path, "r+b") as fh:
+                    fh.truncate(offset)
+                break
+            end = newline + 1
+            try:
+                line = json.loads(data[offset:end])
+                entry = _Entry(line["table"], line["record"], end)
+            except (ValueError, KeyError, TypeError):
+                entry = None
+            if entry is not None and self.sink is not None:
+                self._pending.append(entry)
+                self._metrics["replayed"] += 1
+            offset = end
+        if self._metrics["replayed"]:
+            logger.info("🔁 Replaying %d spooled records", self._metrics["replayed"])
+
+    def _commit(self, end: int) -> None:
+        """Persist the flushed prefix; compact the spool once fully flushed."""
+        if self.path is None:
+            return
+        self._committed = max(self._committed, end)
+        if (
+            self._fh is not None
+            and self._committed >= self._fh.tell() >= self.compact_bytes
+        ):
+            self._fh.truncate(0)
+            self._fh.seek(0)
+            self._committed = 0
+        tmp = self._offset_path.with_suffix(".tmp")
+        tmp.write_text(str(self._committed))
+        os.replace(tmp, self._offset_path)
+
+    # -- API -------------------------------------------------------------
+    def enqueue(self, table: str, record: dict[str, _t.Any]) -> None:
+        """Durably queue ``record`` for insertion into ``table``."""
+        line = json.dumps({"table": table, "record": record}, default=str)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("SpoolWriter is closed")
+            end = 0
+            if self._fh is not None:
+                self._fh.write(line.encode("utf-8") + b"\n")
+                self._fh.flush()
+                end = self._fh.tell()
+            self._metrics["enqueued"] += 1
+            if self.sink is None:
+                return  # rejoué au prochain démarrage avec un client
+            # json aller-retour : le thread ne voit pas les mutations ultérieures
+            self._pending.append(_Entry(table, json.loads(line)["record"], end))
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+        if self.autostart and self._thread is None:
+            self.start()
+
+    def start(self) -> None:
+        with self._cond:
+            if self._thread is not None or self._closed:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="log-spool", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                delay = (
+                    min(self.max_backoff, self.flush_interval * 2**self._failures)
+                    if self._failures
+                    else self.flush_interval
+                )
+                self._cond.wait_for(
+                    lambda: self._closed
+                    or (not self._failures and len(self._pending) >= self.batch_size),
+                    timeout=delay,
+                )
+                if self._closed:
+                    return
+            self.flush()
+
+    def flush(self) -> int:
+        """Write pending records; returns how many left the queue.
+
+        Stops at the first batch that fails entirely (outage) so the next
+        attempt starts from the same records.
+        """
+        done = 0
+        with self._flush_lock:
+            while True:
+                with self._cond:
+                    batch = list(self._pending)[: self.batch_size]
+                if not batch or self.sink is None:
+                    return done
+                if not self._flush_batch(batch):
+                    return done
+                done += len(batch)
+
+    def _flush_batch(self, batch: list[_Entry]) -> bool:
+        start = time.perf_counter()
+        # un insert par table et jeu de colonnes (PostgREST exige des clés uniformes)
+        groups: dict[tuple, list[_Entry]] = {}
+        for entry in batch:
+            key = (entry.table, tuple(sorted(entry.record)))
+            groups.setdefault(key, []).append(entry)
+
+        rejected: list[tuple[_Entry, Exception]] = []
+        written = 0
+        for (table, _), entries in groups.items():
+            try:
+                self.sink(table, [e.record for e in entries])
+                written += len(entries)
+                continue
+            except Exception as exc:
+                if len(groups) == 1 and len(entries) == 1:
+                    rejected.append((entries[0], exc))
+                    continue
+            for entry in entries:  # isoler les lignes refusées
+                try:
+                    self.sink(table, [entry.record])
+                    written += 1
+                except Exception as exc:
+                    rejected.append((entry, exc))
+
+        latency = time.perf_counter() - start
+        with self._cond:
+            m = self._metrics
+            m["flushes"] += 1
+            m["last_flush_latency"] = latency
+            m["flush_latency_total"] += latency
+            m["max_flush_latency"] = max(m["max_flush_latency"], latency)
+            if not written:
+                self._failures += 1
+                m["failed_flushes"] += 1
+                logger.warning(
+                    "⚠️ Spool flush failed (%d records kept): %s",
+                    len(self._pending),
+                    rejected[0][1] if rejected else "unknown error",
+                )
+                return False
+            self._failures = 0
+            for _ in batch:
+                self._pending.popleft()
+            m["flushed"] += written
+            m["dead_lettered"] += len(rejected)
+            self._commit(batch[-1].end)
+        if rejected:
+            self._write_dead_letters(rejected)
+        return True
+
+    def _write_dead_letters(self, rejected: list[tuple[_Entry, Exception]]) -> None:
+        logger.error("❌ %d records rejected by the sink", len(rejected))
+        if self.dead_letter is None:
+            return
+        with open(self.dead_letter, "a", encoding="utf-8") as fh:
+            for entry, exc in rejected:
+                record = {**entry.record, "_table": entry.table, "_error": str(exc)}
+                fh.write(json.dumps(record, default=str) + "\n")
+
+    def metrics(self) -> dict[str, _t.Any]:
+        """Queue depth, throughput and flush latency counters."""
+        with self._cond:
+            m = dict(self._metrics)
+            m["queue_depth"] = len(self._pending)
+            m["consecutive_failures"] = self._failures
+            m["spool_bytes"] = self._fh.tell() if self._fh is not None else 0
+        m["avg_flush_latency"] = (
+            m["flush_latency_total"] / m["flushes"] if m["flushes"] else 0.0
+        )
+        return m
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop the background thread and attempt a final flush."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        try:
+            self.flush()
+        finally:
+            with self._cond:
+                if self._fh is not None:
+                    self._fh.close()
+                    self._fh = None
+
+
+__all__ = ["SpoolWriter", "default_spool_path", "iter_json_records"]
@@ -5,15 +5,23 @@ from __future__ import annotations
 This module selects the best model depending on the ``task_type`` and
 available API keys. It also implements a simple fallback strategy and
 basic benchmarking (latency, prompt size for cost approximation).
+Async variants (:meth:`MultiModelRouter.agenerate`) use the providers'
+async clients with a bounded number of in-flight requests per provider.
+In hedged mode a backup provider is fired once the primary exceeds its
+historical p95 latency and the first answer wins.
+:meth:`MultiModelRouter.astream` yields the completion as text deltas and
+records the time-to-first-token of each streamed call.
 """
 
+import asyncio
 import json
 import logging
 import os
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, AsyncIterator, Callable, Iterator
 
 try:  # optional dependency
     import google.generativeai as genai
@@ -21,13 +29,16 @@ except Exception:  # pragma: no cover - package optional
     genai = None
 
 try:  # optional dependency
-    from anthropic import Anthropic
+    from anthropic import Anthropic, AsyncAnthropic
 except Exception:  # pragma: no cover - package optional
     Anthropic = None  # type: ignore
+    AsyncAnthropic = None  # type: ignore
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
-from .intelligent_orchestrator import get_orchestrator
+from .client_registry import get_client_registry
+from .intelligent_orchestrator import ModelCapabilities, TaskAnalysis, get_orchestrator
+from .response_cache import ResponseCache
 
 CONFIG_PATH = Path(__file__).with_name("model_config.json")
 DEFAULT_MODELS = {
@@ -35,6 +46,22 @@ DEFAULT_MODELS = {
     "anthropic": "claude-sonnet-4-20250514",  # Claude 4 Sonnet (2025)
     "gemini": "gemini-2.5-pro",  # Gemini 2.5 Pro avec thinking
 }
+# Requêtes simultanées maximum par provider pour les appels asynchrones
+MAX_CONCURRENCY_PER_PROVIDER = int(os.getenv("ROUTER_MAX_CONCURRENCY", "16"))
+
+# Requêtes "hedged" : lancement d'un provider de secours après le p95 du primaire
+HEDGE_TASK_TYPES = ("reasoning", "coding")
+HEDGE_QUANTILE = float(os.getenv("ROUTER_HEDGE_QUANTILE", "0.95"))
+HEDGE_DEFAULT_DELAY = float(os.getenv("ROUTER_HEDGE_DEFAULT_DELAY", "2.0"))
+HEDGE_MIN_SAMPLES = 5  # en dessous, on utilise HEDGE_DEFAULT_DELAY
+HEDGE_HISTORY = 200  # nombre de benchmarks récents pris en compte
+
+# Cache de réponses (ROUTER_CACHE_TTL=0 pour le désactiver)
+CACHE_TTL = float(os.getenv("ROUTER_CACHE_TTL", "600"))
+CACHE_MAX_ENTRIES = int(os.getenv("ROUTER_CACHE_MAX_ENTRIES", "512"))
+# Seuil de similarité cosinus du niveau sémantique (vide = désactivé)
+CACHE_SEMANTIC_THRESHOLD = os.getenv("ROUTER_CACHE_SEMANTIC_THRESHOLD")
+CACHE_EMBEDDING_MODEL = "text-embedding-3-small"
 
 
 def _load_models() -> dict[str, str]:
@@ -60,12 +87,18 @@ class Benchmark:
     model: str
     latency: float
     cost: float | None = None
+    ttft: float | None = None  # délai avant le premier token (streaming)
 
 
 class MultiModelRouter:
     """Route prompts to the optimal LLM."""
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        *,
+        max_concurrency: int | None = None,
+        hedged: bool | None = None,
+    ) -> None:
         self.model_names = _load_models()
         self.openai_key = os.getenv("OPENAI_API_KEY")
         self.gemini_key = os.getenv("GEMINI_API_KEY")
@@ -74,9 +107,14 @@ class MultiModelRouter:
         # Orchestrateur intelligent
         self.orchestrator = get_orchestrator()
 
+        # Clients partagés (pool keep-alive, timeouts, retries) entre routeurs
+        clients = get_client_registry()
         self.openai_client: OpenAI | None = None
+        # clients async résolus par boucle (voir async_openai_client)
+        self._async_openai_cls: Any | None = None
         if self.openai_key:
-            self.openai_client = OpenAI(api_key=self.openai_key)
+            self.openai_client = clients.openai(self.openai_key, OpenAI)
+            self._async_openai_cls = AsyncOpenAI
 
         self.gemini_available = False
         if genai and self.gemini_key:
@@ -89,9 +127,11 @@ class MultiModelRouter:
                 )
 
         self.anthropic_client: Any | None = None
+        self._async_anthropic_cls: Any | None = None
         if Anthropic and self.anthropic_key:
             try:  # pragma: no cover
-                self.anthropic_client = Anthropic(api_key=self.anthropic_key)
+                self.anthropic_client = clients.anthropic(self.anthropic_key, Anthropic)
+                self._async_anthropic_cls = AsyncAnthropic
             except Exception as exc:  # pragma: no cover - package errors
                 logger = logging.getLogger(__name__).warning(
                     "Anthropic init failed: %s", exc
@@ -102,6 +142,28 @@ class MultiModelRouter:
 
         self.benchmarks: list[Benchmark] = []
 
+        # Limitation de concurrence par provider (recréée par boucle asyncio)
+        self.max_concurrency = max_concurrency or MAX_CONCURRENCY_PER_PROVIDER
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._semaphore_loop: asyncio.AbstractEventLoop | None = None
+
+        # Mode hedged (désactivé par défaut)
+        if hedged is None:
+            hedged = os.getenv("ROUTER_HEDGED", "false").lower() == "true"
+        self.hedged = hedged
+        self.hedge_task_types = set(HEDGE_TASK_TYPES)
+        self.hedge_quantile = HEDGE_QUANTILE
+        self.hedge_default_delay = HEDGE_DEFAULT_DELAY
+
+        # Cache de réponses, avec niveau sémantique optionnel
+        semantic = bool(CACHE_SEMANTIC_THRESHOLD) and self.openai_client is not None
+        self.cache = ResponseCache(
+            ttl=CACHE_TTL,
+            max_entries=CACHE_MAX_ENTRIES,
+            embed_fn=self._embed_for_cache if semantic else None,
+            semantic_threshold=float(CACHE_SEMANTIC_THRESHOLD) if semantic else None,
+        )
+
     # ---------------------------- helpers
     def _load_model_capabilities(self) -> dict:
         """Load model capabilities from JSON file."""
@@ -111,9 +173,12 @@ class MultiModelRouter:
         try:
             with open(capabilities_path, "r", encoding="utf-8") as f:
                 return json.load(f)
+        except (OSError, ValueError):
             return {}
 
-    def _record_bench(self, model: str, start: float, prompt: str) -> None:
+    def _record_bench(
+        self, model: str, start: float, prompt: str, ttft: float | None = None
+    ) -> None:
         latency = time.perf_counter() - start
         cost = len(prompt) / 1000  # crude proxy
         self.benchmarks.append(
@@ -121,9 +186,52 @@ class MultiModelRouter:
                 model=model,
                 latency=latency,
                 cost=cost,
+                ttft=ttft,
             )
         )
 
+    def _embed_for_cache(self, text: str) -> list[float]:
+        resp = self.openai_client.embeddings.create(
+            model=CACHE_EMBEDDING_MODEL, input=text[:8192]
+        )
+        return resp.data[0].embedding
+
+    def _cache_lookup(self, model: str, task_type: str, prompt: str) -> str | None:
+        cached = self.cache.get(model, task_type, prompt)
+        if cached is not None:
+            logger.info(f"♻️ Réponse en cache pour {model} ({task_type})")
+        return cached
+
+    async def _acache_lookup(
+        self, model: str, task_type: str, prompt: str
+    ) -> str | None:
+        if self.cache.semantic:  # l'embedding est un appel réseau bloquant
+            return await asyncio.to_thread(self._cache_lookup, model, task_type, prompt)
+        return self._cache_lookup(model, task_type, prompt)
+
+    def _cache_store(
+        self,
+        model: str,
+        task_analysis: TaskAnalysis,
+        prompt: str,
+        response: str,
+        start: float,
+    ) -> None:
+        info = self.orchestrator.models_db.get(model)
+        cost = info.cost_per_1k_tokens * (len(prompt.split()) / 1000) if info else 0.0
+        self.cache.put(
+            model,
+            task_analysis.task_type,
+            prompt,
+            response,
+            latency=time.perf_counter() - start,
+            cost=cost,
+        )
+
+    def get_cache_stats(self) -> dict:
+        """Hit/miss counters and the latency/cost saved by the response cache."""
+        return {**self.cache.stats.as_dict(), "entries": len(self.cache)}
+
     # ------------------------------------------------------------------ public
     def generate(self, prompt: str, *, task_type: str = "auto") -> str:
         """Generate a completion using the optimal model selected by AI orchestrator."""
@@ -141,9 +249,40 @@ class MultiModelRouter:
             f"Confiance: {confidence:.2f}"
         )
 
+        cached = self._cache_lookup(optimal_model, task_analysis.task_type, prompt)
+        if cached is not None:
+            return cached
+
+        start = time.perf_counter()
+        _result = self._generate_selected(
+            prompt, task_analysis, optimal_model, model_info
+        )
+        self._cache_store(optimal_model, task_analysis, prompt, _result, start)
+        return _result
+
+    def _generate_selected(
+        self,
+        prompt: str,
+        task_analysis: TaskAnalysis,
+        optimal_model: str,
+        model_info: ModelCapabilities,
+    ) -> str:
+        """Exécute la requête pour le modèle sélectionné (hedge et fallback inclus)."""
+        # Course entre deux providers si le mode hedged s'applique
+        hedge_plan = self._hedge_plan(
+            model_info.provider, optimal_model, task_analysis.task_type
+        )
+        if hedge_plan:
+            try:
+                return self._hedged_generation(
+                    hedge_plan, prompt, task_analysis.task_type
+                )
+            except Exception as exc:
+                logging.getLogger(__name__).warning("hedged generation failed: %s", exc)
+                return self._fallback_generation(prompt, task_analysis.task_type)
+
         # Exécution avec le modèle sélectionné
         start = time.perf_counter()
-        _result
         success = False
 
         try:
@@ -209,6 +348,178 @@ class MultiModelRouter:
             # Fallback vers autre modèle
             return self._fallback_generation(prompt, task_analysis.task_type)
 
+    async def agenerate(self, prompt: str, *, task_type: str = "auto") -> str:
+        """Async counterpart of :meth:`generate` that never blocks the event loop."""
+        task_analysis = self.orchestrator.analyze_task(prompt, task_type)
+        optimal_model, model_info, confidence = self.orchestrator.select_optimal_model(
+            task_analysis
+        )
+        logger.info(
+            f"🎯 Tâche: {task_analysis.task_type}, Modèle: {optimal_model}, "
+            f"Confiance: {confidence:.2f}"
+        )
+
+        cached = await self._acache_lookup(
+            optimal_model, task_analysis.task_type, prompt
+        )
+        if cached is not None:
+            return cached
+
+        start = time.perf_counter()
+        _result = await self._agenerate_selected(
+            prompt, task_analysis, optimal_model, model_info
+        )
+        self._cache_store(optimal_model, task_analysis, prompt, _result, start)
+        return _result
+
+    async def _agenerate_selected(
+        self,
+        prompt: str,
+        task_analysis: TaskAnalysis,
+        optimal_model: str,
+        model_info: ModelCapabilities,
+    ) -> str:
+        """Version asynchrone de :meth:`_generate_selected`."""
+        provider = model_info.provider
+        hedge_plan = self._hedge_plan(provider, optimal_model, task_analysis.task_type)
+        if hedge_plan:
+            try:
+                return await self._ahedged_generation(
+                    hedge_plan, prompt, task_analysis.task_type
+                )
+            except Exception as exc:
+                logger.warning("hedged generation failed: %s", exc)
+                return await self._afallback_generation(prompt, task_analysis.task_type)
+
+        if not self._provider_available(provider):
+            logger.warning(f"⚠️ Modèle optimal {optimal_model} indisponible, fallback")
+            return await self._afallback_generation(prompt, task_analysis.task_type)
+
+        start = time.perf_counter()
+        try:
+            _result = await self._aexecute(provider, optimal_model, prompt)
+        except Exception as exc:
+            logger.error(f"❌ Erreur avec modèle optimal {optimal_model}: {exc}")
+            self.orchestrator.record_performance(
+                optimal_model,
+                task_analysis.task_type,
+                0.0,
+                time.perf_counter() - start,
+                0.0,
+            )
+            return await self._afallback_generation(prompt, task_analysis.task_type)
+
+        estimated_cost = model_info.cost_per_1k_tokens * (len(prompt.split()) / 1000)
+        self.orchestrator.record_performance(
+            optimal_model,
+            task_analysis.task_type,
+            1.0,
+            time.perf_counter() - start,
+            estimated_cost,
+        )
+        self._record_bench(optimal_model, start, prompt)
+        return _result
+
+    async def agenerate_many(
+        self,
+        prompts: list[str],
+        *,
+        task_type: str = "auto",
+        return_exceptions: bool = False,
+    ) -> list[str | BaseException]:
+        """Run :meth:`agenerate` concurrently for every prompt.
+
+        Results keep the order of ``prompts``. Concurrency is bounded per
+        provider by ``max_concurrency``.
+        """
+        return await asyncio.gather(
+            *(self.agenerate(p, task_type=task_type) for p in prompts),
+            return_exceptions=return_exceptions,
+        )
+
+    async def astream(
+        self, prompt: str, *, task_type: str = "auto"
+    ) -> AsyncIterator[str]:
+        """Stream the completion of ``prompt`` as text deltas.
+
+        The optimal model is tried first, then the fallback plan. A provider
+        is only abandoned if it fails before its first delta: text already
+        sent to the caller cannot be taken back. Cache hits are yielded in
+        one piece; the time-to-first-token lands in :attr:`benchmarks`.
+        """
+        task_analysis = self.orchestrator.analyze_task(prompt, task_type)
+        optimal_model, model_info, confidence = self.orchestrator.select_optimal_model(
+            task_analysis
+        )
+        logger.info(
+            f"🎯 Tâche (stream): {task_analysis.task_type}, "
+            f"Modèle: {optimal_model}, Confiance: {confidence:.2f}"
+        )
+
+        cached = await self._acache_lookup(
+            optimal_model, task_analysis.task_type, prompt
+        )
+        if cached is not None:
+            yield cached
+            return
+
+        plan = []
+        if self._provider_available(model_info.provider):
+            plan.append((model_info.provider, optimal_model))
+        plan += [
+            step
+            for step in self._fallback_plan(task_analysis.task_type)
+            if step not in plan
+        ]
+
+        start = time.perf_counter()
+        for provider, model in plan:
+            attempt_start = time.perf_counter()
+            ttft: float | None = None
+            parts: list[str] = []
+            try:
+                # le créneau du provider reste pris pendant tout le flux
+                async with self._provider_semaphore(provider):
+                    async for delta in self._astream(provider, model, prompt):
+                        if not delta:
+                            continue
+                        if ttft is None:
+                            ttft = time.perf_counter() - attempt_start
+                        parts.append(delta)
+                        yield delta
+            except Exception as exc:
+                if parts:
+                    raise
+                logger.warning("%s stream failed: %s", provider, exc)
+                self.orchestrator.record_performance(
+                    model,
+                    task_analysis.task_type,
+                    0.0,
+                    time.perf_counter() - attempt_start,
+                    0.0,
+                )
+                continue
+
+            info = self.orchestrator.models_db.get(model)
+            cost = 0.0
+            if info:
+                cost = info.cost_per_1k_tokens * (len(prompt.split()) / 1000)
+            self.orchestrator.record_performance(
+                model,
+                task_analysis.task_type,
+                1.0,
+                time.perf_counter() - attempt_start,
+                cost,
+            )
+            self._record_bench(model, attempt_start, prompt, ttft=ttft)
+            logger.info(f"⚡ Premier token {model}: {(ttft or 0.0) * 1000:.0f} ms")
+            response = "".join(parts)
+            if response:
+                self._cache_store(optimal_model, task_analysis, prompt, response, start)
+            return
+
+        raise RuntimeError("No available model for generation")
+
     def _execute_openai(self, model: str, prompt: str) -> str:
         """Exécute une requête OpenAI."""
         resp = self.openai_client.chat.completions.create(
@@ -241,8 +552,201 @@ class MultiModelRouter:
         part = resp.content[0]
         return part.text if hasattr(part, "text") else str(part)
 
-    def _fallback_generation(self, prompt: str, task_type: str) -> str:
-        """Génération de fallback si modèle optimal indisponible."""
+    def _stream_openai(self, model: str, prompt: str) -> Iterator[str]:
+        """Flux synchrone OpenAI."""
+        stream = self.openai_client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.7,
+            max_tokens=4000,
+            stream=True,
+        )
+        for chunk in stream:
+            if chunk.choices:
+                yield chunk.choices[0].delta.content or ""
+
+    def _stream_gemini(self, model: str, prompt: str) -> Iterator[str]:
+        """Flux synchrone Gemini."""
+        genai_model = genai.GenerativeModel(model)
+        stream = genai_model.generate_content(
+            prompt,
+            generation_config=genai.types.GenerationConfig(
+                temperature=0.7, max_output_tokens=4000
+            ),
+            stream=True,
+        )
+        for chunk in stream:
+            yield getattr(chunk, "text", "")
+
+    def _stream_anthropic(self, model: str, prompt: str) -> Iterator[str]:
+        """Flux synchrone Anthropic."""
+        with self.anthropic_client.messages.stream(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=4000,
+            temperature=0.7,
+        ) as stream:
+            yield from stream.text_stream
+
+    @property
+    def async_openai_client(self) -> AsyncOpenAI | None:
+        """Async OpenAI client of the running loop (its pool is loop-bound)."""
+        if self._async_openai_cls is None:
+            return None
+        return get_client_registry().async_openai(
+            self.openai_key, self._async_openai_cls
+        )
+
+    @property
+    def async_anthropic_client(self) -> Any | None:
+        """Async Anthropic client of the running loop."""
+        if self._async_anthropic_cls is None:
+            return None
+        return get_client_registry().async_anthropic(
+            self.anthropic_key, self._async_anthropic_cls
+        )
+
+    def _provider_semaphore(self, provider: str) -> asyncio.Semaphore:
+        """Return the concurrency limiter of ``provider`` for the running loop."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._semaphore_loop:
+            self._semaphores = {}
+            self._semaphore_loop = loop
+        sem = self._semaphores.get(provider)
+        if sem is None:
+            sem = self._semaphores[provider] = asyncio.Semaphore(self.max_concurrency)
+        return sem
+
+    async def _aexecute_openai(self, model: str, prompt: str) -> str:
+        """Exécute une requête OpenAI asynchrone."""
+        client = self.async_openai_client
+        if client is None:
+            return await asyncio.to_thread(self._execute_openai, model, prompt)
+        resp = await client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.7,
+            max_tokens=4000,
+        )
+        return resp.choices[0].message.content
+
+    async def _aexecute_gemini(self, model: str, prompt: str) -> str:
+        """Exécute une requête Gemini asynchrone."""
+        genai_model = genai.GenerativeModel(model)
+        if not hasattr(genai_model, "generate_content_async"):
+            return await asyncio.to_thread(self._execute_gemini, model, prompt)
+        resp = await genai_model.generate_content_async(
+            prompt,
+            generation_config=genai.types.GenerationConfig(
+                temperature=0.7, max_output_tokens=4000
+            ),
+        )
+        return getattr(resp, "text", str(resp))
+
+    async def _aexecute_anthropic(self, model: str, prompt: str) -> str:
+        """Exécute une requête Anthropic asynchrone."""
+        client = self.async_anthropic_client
+        if client is None:
+            return await asyncio.to_thread(self._execute_anthropic, model, prompt)
+        resp = await client.messages.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=4000,
+            temperature=0.7,
+        )
+        part = resp.content[0]
+        return part.text if hasattr(part, "text") else str(part)
+
+    async def _astream_openai(self, model: str, prompt: str) -> AsyncIterator[str]:
+        """Flux asynchrone OpenAI."""
+        client = self.async_openai_client
+        if client is None:
+            async for delta in _aiter_in_thread(
+                lambda: self._stream_openai(model, prompt)
+            ):
+                yield delta
+            return
+        stream = await client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.7,
+            max_tokens=4000,
+            stream=True,
+        )
+        async for chunk in stream:
+            if chunk.choices:
+                yield chunk.choices[0].delta.content or ""
+
+    async def _astream_gemini(self, model: str, prompt: str) -> AsyncIterator[str]:
+        """Flux asynchrone Gemini."""
+        genai_model = genai.GenerativeModel(model)
+        if not hasattr(genai_model, "generate_content_async"):
+            async for delta in _aiter_in_thread(
+                lambda: self._stream_gemini(model, prompt)
+            ):
+                yield delta
+            return
+        stream = await genai_model.generate_content_async(
+            prompt,
+            generation_config=genai.types.GenerationConfig(
+                temperature=0.7, max_output_tokens=4000
+            ),
+            stream=True,
+        )
+        async for chunk in stream:
+            yield getattr(chunk, "text", "")
+
+    async def _astream_anthropic(self, model: str, prompt: str) -> AsyncIterator[str]:
+        """Flux asynchrone Anthropic."""
+        client = self.async_anthropic_client
+        if client is None:
+            async for delta in _aiter_in_thread(
+                lambda: self._stream_anthropic(model, prompt)
+            ):
+                yield delta
+            return
+        async with client.messages.stream(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=4000,
+            temperature=0.7,
+        ) as stream:
+            async for text in stream.text_stream:
+                yield text
+
+    def _astream(self, provider: str, model: str, prompt: str) -> AsyncIterator[str]:
+        """Flux de deltas de ``provider`` (sans limite de concurrence)."""
+        if provider == "openai":
+            return self._astream_openai(model, prompt)
+        if provider == "gemini":
+            return self._astream_gemini(model, prompt)
+        if provider == "anthropic":
+            return self._astream_anthropic(model, prompt)
+        raise ValueError(f"Unknown provider: {provider}")
+
+    async def _aexecute(self, provider: str, model: str, prompt: str) -> str:
+        """Exécute une requête asynchrone en respectant la limite du provider."""
+        async with self._provider_semaphore(provider):
+            if provider == "openai":
+                return await self._aexecute_openai(model, prompt)
+            if provider == "gemini":
+                return await self._aexecute_gemini(model, prompt)
+            if provider == "anthropic":
+                return await self._aexecute_anthropic(model, prompt)
+        raise ValueError(f"Unknown provider: {provider}")
+
+    def _provider_available(self, provider: str) -> bool:
+        """Indique si un provider est configuré."""
+        if provider == "openai":
+            return self.openai_client is not None
+        if provider == "gemini":
+            return self.gemini_available
+        if provider == "anthropic":
+            return self.anthropic_client is not None
+        return False
+
+    def _fallback_plan(self, task_type: str) -> list[tuple[str, str]]:
+        """Return the ordered ``(provider, model)`` pairs to try for ``task_type``."""
         models = self.model_names
         config = {
             "multimodal": {
@@ -284,33 +788,177 @@ class MultiModelRouter:
         }
 
         task_cfg = config.get(task_type, config["reasoning"])
-        order = task_cfg["order"]
         model_map = task_cfg["models"]
+        return [
+            (provider, model_map[provider])
+            for provider in task_cfg["order"]
+            if self._provider_available(provider)
+        ]
+
+    def _execute(self, provider: str, model: str, prompt: str) -> str:
+        """Exécute une requête synchrone sur ``provider``."""
+        if provider == "openai":
+            return self._execute_openai(model, prompt)
+        if provider == "gemini":
+            return self._execute_gemini(model, prompt)
+        if provider == "anthropic":
+            return self._execute_anthropic(model, prompt)
+        raise ValueError(f"Unknown provider: {provider}")
 
-        for provider in order:
+    def _fallback_generation(self, prompt: str, task_type: str) -> str:
+        """Génération de fallback si modèle optimal indisponible."""
+        for provider, model in self._fallback_plan(task_type):
             start = time.perf_counter()
             try:
-                if provider == "openai" and self.openai_client:
-                    _result = self._execute_openai(model_map[provider], prompt)
-                    self._record_bench(model_map[provider], start, prompt)
-                    return _result
+                _result = self._execute(provider, model, prompt)
+                self._record_bench(model, start, prompt)
+                return _result
+            except Exception as exc:  # pragma: no cover - network failures
+                logger.warning("%s failed: %s", provider, exc)
 
-                if provider == "gemini" and self.gemini_available:
-                    _result = self._execute_gemini(model_map[provider], prompt)
-                    self._record_bench(model_map[provider], start, prompt)
-                    return _result
+        raise RuntimeError("No available model for generation")
 
-                if provider == "anthropic" and self.anthropic_client:
-                    _result = self._execute_anthropic(model_map[provider], prompt)
-                    self._record_bench(model_map[provider], start, prompt)
-                    return _result
+    # ---------------------------------------------------------------- hedging
+    def _hedge_delay(self, model: str) -> float:
+        """Delay before firing the backup, i.e. the ``hedge_quantile`` latency."""
+        latencies = sorted(
+            b.latency for b in self.benchmarks[-HEDGE_HISTORY:] if b.model == model
+        )
+        if len(latencies) < HEDGE_MIN_SAMPLES:
+            # peu d'appels dans ce processus: histogramme persisté du modèle
+            store = getattr(self.orchestrator, "stats_store", None)
+            persisted = (
+                store.latency_quantile(model, self.hedge_quantile) if store else None
+            )
+            return persisted if persisted is not None else self.hedge_default_delay
+        idx = min(len(latencies) - 1, int(self.hedge_quantile * len(latencies)))
+        return latencies[idx]
+
+    def _hedge_plan(
+        self, provider: str, model: str, task_type: str
+    ) -> list[tuple[str, str]]:
+        """Return the primary and backup ``(provider, model)`` to race, if any."""
+        if not self.hedged or task_type not in self.hedge_task_types:
+            return []
+        plan = [(provider, model)] if self._provider_available(provider) else []
+        plan += [p for p in self._fallback_plan(task_type) if p[0] != provider]
+        return plan[:2] if len(plan) >= 2 else []
+
+    def _record_hedge_winner(
+        self, model: str, task_type: str, latency: float, prompt: str
+    ) -> None:
+        info = self.orchestrator.models_db.get(model)
+        cost = info.cost_per_1k_tokens * (len(prompt.split()) / 1000) if info else 0.0
+        self.orchestrator.record_performance(model, task_type, 1.0, latency, cost)
+
+    def _hedged_generation(
+        self, plan: list[tuple[str, str]], prompt: str, task_type: str
+    ) -> str:
+        """Race ``plan[0]`` against ``plan[1]`` using worker threads.
+
+        Threads cannot be interrupted: the losing call is abandoned and its
+        result discarded.
+        """
+        (primary, primary_model), (backup, backup_model) = plan
+        pool = ThreadPoolExecutor(max_workers=2)
+        start = time.perf_counter()
+        try:
+            first = pool.submit(self._execute, primary, primary_model, prompt)
+            futures = {first: (primary_model, start)}
+            done, _ = wait([first], timeout=self._hedge_delay(primary_model))
+            if not done or first.exception() is not None:
+                logger.info("⏱️ hedge: lancement de %s", backup_model)
+                second = pool.submit(self._execute, backup, backup_model, prompt)
+                futures[second] = (backup_model, time.perf_counter())
+
+            pending = set(futures)
+            error: BaseException | None = None
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    model, launched = futures[fut]
+                    if fut.exception() is not None:
+                        error = fut.exception()
+                        logger.warning("%s failed: %s", model, error)
+                        continue
+                    self._record_bench(model, launched, prompt)
+                    self._record_hedge_winner(
+                        model, task_type, time.perf_counter() - start, prompt
+                    )
+                    return fut.result()
+            raise error or RuntimeError("No available model for generation")
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    async def _ahedged_generation(
+        self, plan: list[tuple[str, str]], prompt: str, task_type: str
+    ) -> str:
+        """Race ``plan[0]`` against ``plan[1]`` and cancel the loser."""
+        (primary, primary_model), (backup, backup_model) = plan
+        start = time.perf_counter()
+        first = asyncio.ensure_future(self._aexecute(primary, primary_model, prompt))
+        tasks = {first: (primary_model, start)}
+        pending: set[asyncio.Future] = {first}
+        try:
+            done, _ = await asyncio.wait(
+                [first], timeout=self._hedge_delay(primary_model)
+            )
+            if not done or first.exception() is not None:
+                logger.info("⏱️ hedge: lancement de %s", backup_model)
+                second = asyncio.ensure_future(
+                    self._aexecute(backup, backup_model, prompt)
+                )
+                tasks[second] = (backup_model, time.perf_counter())
+                pending.add(second)
 
-            except Exception as exc:  # pragma: no cover - network failures
-                logger = logging.getLogger(__name__).warning(
-                    "%s failed: %s", provider, exc
+            error: BaseException | None = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
                 )
+                for task in done:
+                    model, launched = tasks[task]
+                    if task.exception() is not None:
+                        error = task.exception()
+                        logger.warning("%s failed: %s", model, error)
+                        continue
+                    self._record_bench(model, launched, prompt)
+                    self._record_hedge_winner(
+                        model, task_type, time.perf_counter() - start, prompt
+                    )
+                    return task.result()
+            raise error or RuntimeError("No available model for generation")
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _afallback_generation(self, prompt: str, task_type: str) -> str:
+        """Version asynchrone de :meth:`_fallback_generation`."""
+        for provider, model in self._fallback_plan(task_type):
+            start = time.perf_counter()
+            try:
+                _result = await self._aexecute(provider, model, prompt)
+                self._record_bench(model, start, prompt)
+                return _result
+            except Exception as exc:  # pragma: no cover - network failures
+                logger.warning("%s failed: %s", provider, exc)
 
         raise RuntimeError("No available model for generation")
 
 
+_STREAM_END = object()
+
+
+async def _aiter_in_thread(
+    make_iter: Callable[[], Iterator[str]],
+) -> AsyncIterator[str]:
+    """Consume a blocking iterator from a worker thread, item by item."""
+    iterator = await asyncio.to_thread(make_iter)
+    while True:
+        item = await asyncio.to_thread(next, iterator, _STREAM_END)
+        if item is _STREAM_END:
+            return
+        yield item
+
+
 __all__ = ["MultiModelRouter", "Benchmark"]
@@ -0,0 +1,415 @@
+"""Persistent performance statistics used for model routing.
+
+One :class:`PerformanceStats` is kept per ``(model, task_type)``: call
+count, EWMA latency / success / cost and a log-linear (HDR-style) latency
+histogram stored in a fixed ``array``. :class:`PerformanceStore` flushes
+dirty entries to SQLite every ``flush_interval`` seconds from a background
+thread (and at exit) and reloads them at startup, so routing keeps its
+statistics across restarts. Counters and histograms are merged into the
+stored row rather than replacing it, so several processes sharing the file
+add up their calls; the EWMAs keep the last writer's value.
+
+Environment:
+    JARVYS_PERF_STATS: path of the SQLite file, or ``off`` to disable
+"""
+
+from __future__ import annotations
+
+import array
+import atexit
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+import typing as _t
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = Path.home() / ".cache" / "jarvys" / "perf_stats.sqlite"
+EWMA_ALPHA = 0.1
+FLUSH_INTERVAL = 30.0  # secondes entre deux écritures SQLite
+
+# Histogramme log-linéaire : HIST_SUB_BUCKETS seaux par puissance de deux
+# de millisecondes, de 1 ms à 2**HIST_OCTAVES ms (~35 min), plus un seau
+# de débordement. Erreur relative bornée à 12,5 % par seau.
+HIST_SUB_BUCKETS = 8
+HIST_OCTAVES = 21
+HIST_SIZE = HIST_OCTAVES * HIST_SUB_BUCKETS + 2
+
+
+def latency_bucket(latency: float) -> int:
+    """Histogram bucket of a latency given in seconds."""
+    ms = latency * 1000
+    if ms < 1:
+        return 0
+    octave = int(math.log2(ms))
+    if octave >= HIST_OCTAVES:
+        return HIST_SIZE - 1
+    sub = int((ms / 2**octave - 1) * HIST_SUB_BUCKETS)
+    return 1 + octave * HIST_SUB_BUCKETS + min(sub, HIST_SUB_BUCKETS - 1)
+
+
+def bucket_upper_bound(bucket: int) -> float:
+    """Upper latency bound of ``bucket``, in seconds."""
+    if bucket == 0:
+        return 0.001
+    if bucket >= HIST_SIZE - 1:
+        return 2**HIST_OCTAVES / 1000
+    octave, sub = divmod(bucket - 1, HIST_SUB_BUCKETS)
+    return 2**octave * (1 + (sub + 1) / HIST_SUB_BUCKETS) / 1000
+
+
+def histogram_quantile(histogram: _t.Sequence[int], q: float) -> float | None:
+    """Latency (seconds) below which a fraction ``q`` of the samples fall."""
+    total = sum(histogram)
+    if not total:
+        return None
+    rank = max(1, math.ceil(q * total))
+    seen = 0
+    for bucket, count in enumerate(histogram):
+        seen += count
+        if seen >= rank:
+            return bucket_upper_bound(bucket)
+    return bucket_upper_bound(len(histogram) - 1)  # pragma: no cover
+
+
+class PerformanceStats:
+    """Running statistics for one ``(model, task_type)`` pair."""
+
+    __slots__ = (
+        "count",
+        "success_total",
+        "ewma_latency",
+        "ewma_success",
+        "ewma_cost",
+        "total_cost",
+        "histogram",
+        "updated_at",
+    )
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.success_total = 0.0
+        self.ewma_latency = 0.0
+        self.ewma_success = 0.0
+        self.ewma_cost = 0.0
+        self.total_cost = 0.0
+        self.histogram = array.array("Q", bytes(8 * HIST_SIZE))
+        self.updated_at = 0.0
+
+    def add(
+        self, success: float, latency: float, cost: float, alpha: float = EWMA_ALPHA
+    ) -> None:
+        if self.count == 0:
+            self.ewma_latency, self.ewma_success, self.ewma_cost = (
+                latency,
+                success,
+                cost,
+            )
+        else:
+            self.ewma_latency += alpha * (latency - self.ewma_latency)
+            self.ewma_success += alpha * (success - self.ewma_success)
+            self.ewma_cost += alpha * (cost - self.ewma_cost)
+        self.count += 1
+        self.success_total += success
+        self.total_cost += cost
+        self.histogram[latency_bucket(latency)] += 1
+        self.updated_at = time.time()
+
+    def quantile(self, q: float) -> float | None:
+        return histogram_quantile(self.histogram, q)
+
+    def as_dict(self) -> dict[str, _t.Any]:
+        return {
+            "count": self.count,
+            "success_rate": self.success_total / self.count if self.count else 0.0,
+            "ewma_latency": round(self.ewma_latency, 4),
+            "ewma_success": round(self.ewma_success, 4),
+            "ewma_cost": round(self.ewma_cost, 6),
+            "total_cost": round(self.total_cost, 6),
+            "p50_latency": self.quantile(0.5),
+            "p95_latency": self.quantile(0.95),
+        }
+
+
+# (count, success_total, total_cost, histogram) au dernier flush
+_Snapshot = tuple[int, float, float, array.array]
+
+
+class PerformanceStore:
+    """``(model, task_type)`` statistics persisted to SQLite."""
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        *,
+        flush_interval: float = FLUSH_INTERVAL,
+    ) -> None:
+        self.path = Path(path) if path else None
+        self.flush_interval = flush_interval
+        self._stats: dict[tuple[str, str], PerformanceStats] = {}
+        self._dirty: set[tuple[str, str]] = set()
+        # compteurs déjà écrits, par clé : flush() n'ajoute que la différence
+        self._flushed: dict[tuple[str, str], _Snapshot] = {}
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._conn: sqlite3.Connection | None = None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS model_stats (
+                    model TEXT NOT NULL,
+                    task_type TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    success_total REAL NOT NULL,
+                    ewma_latency REAL NOT NULL,
+                    ewma_success REAL NOT NULL,
+                    ewma_cost REAL NOT NULL,
+                    total_cost REAL NOT NULL,
+                    histogram BLOB NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (model, task_type)
+                )
+                """
+            )
+            self._conn.commit()
+            self._load()
+
+    def _load(self) -> None:
+        for row in self._conn.execute("SELECT * FROM model_stats"):
+            stats = PerformanceStats()
+            (
+                stats.count,
+                stats.success_total,
+                stats.ewma_latency,
+                stats.ewma_success,
+                stats.ewma_cost,
+                stats.total_cost,
+            ) = row[2:8]
+            hist = array.array("Q")
+            hist.frombytes(row[8])
+            # taille différente : ancien format, on garde les compteurs
+            if len(hist) == HIST_SIZE:
+                stats.histogram = hist
+            stats.updated_at = row[9]
+            self._stats[(row[0], row[1])] = stats
+            self._flushed[(row[0], row[1])] = self._snapshot(stats)
+        if self._stats:
+            logger.info(f"📈 {len(self._stats)} statistiques de routage rechargées")
+
+    @staticmethod
+    def _snapshot(stats: PerformanceStats) -> _Snapshot:
+        return (
+            stats.count,
+            stats.success_total,
+            stats.total_cost,
+            array.array("Q", stats.histogram),
+        )
+
+    def __len__(self) -> int:
+        return len(self._stats)
+
+    def start(self) -> None:
+        """Start the background thread flushing every ``flush_interval``."""
+        with self._lock:
+            if self._thread is not None or self._conn is None:
+                return
+            if self.flush_interval <= 0:
+                return  # record() écrit déjà à chaque appel
+            self._thread = threading.Thread(
+                target=self._run, name="perf-stats-flush", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def record(
+        self,
+        model: str,
+        task_type: str,
+        success: float,
+        latency: float,
+        cost: float,
+    ) -> None:
+        key = (model, task_type)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = PerformanceStats()
+            stats.add(success, latency, cost)
+            self._dirty.add(key)
+        if self._thread is None:
+            self.start()
+        # le thread de flush écrit hors du chemin critique du routage ; sans
+        # lui (flush_interval <= 0, pas de fichier) l'écriture reste ici
+        if (
+            self._thread is None
+            and time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def get(self, model: str, task_type: str) -> PerformanceStats | None:
+        return self._stats.get((model, task_type))
+
+    def _for_model(self, model: str) -> list[PerformanceStats]:
+        return [s for (m, _), s in self._stats.items() if m == model and s.count]
+
+    def model_success(self, model: str) -> float | None:
+        """EWMA success of ``model`` across task types, weighted by calls."""
+        stats = self._for_model(model)
+        total = sum(s.count for s in stats)
+        if not total:
+            return None
+        return sum(s.ewma_success * s.count for s in stats) / total
+
+    def latency_quantile(
+        self, model: str, q: float, task_type: str | None = None
+    ) -> float | None:
+        """Latency quantile of ``model`` from the merged histograms."""
+        if task_type is not None:
+            stats = self.get(model, task_type)
+            return stats.quantile(q) if stats else None
+        stats = self._for_model(model)
+        if not stats:
+            return None
+        merged = [sum(col) for col in zip(*(s.histogram for s in stats))]
+        return histogram_quantile(merged, q)
+
+    def flush(self) -> int:
+        """Merge dirty entries into SQLite; returns the number of rows written.
+
+        Counters and histogram buckets are added to the stored row, then the
+        in-memory entry is reloaded from it so that it includes the calls
+        flushed by other processes.
+        """
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if self._conn is None or not self._dirty:
+                self._dirty.clear()
+                return 0
+            keys = list(self._dirty)
+            try:
+                # BEGIN IMMEDIATE : lecture des histogrammes et écriture atomiques
+                self._conn.execute("BEGIN IMMEDIATE")
+                for key in keys:
+                    self._merge(key)
+                self._conn.commit()
+            except sqlite3.Error as exc:
+                self._conn.rollback()
+                logger.warning(f"⚠️ Écriture des statistiques impossible: {exc}")
+                return 0
+            for key in keys:
+                self._reload(key)
+            self._dirty.clear()
+            return len(keys)
+
+    def _merge(self, key: tuple[str, str]) -> None:
+        s = self._stats[key]
+        count, success_total, total_cost, histogram = self._flushed.get(
+            key, (0, 0.0, 0.0, array.array("Q", bytes(8 * HIST_SIZE)))
+        )
+        delta = array.array(
+            "Q", (now - then for now, then in zip(s.histogram, histogram))
+        )
+        row = self._conn.execute(
+            "SELECT histogram FROM model_stats WHERE model = ? AND task_type = ?",
+            key,
+        ).fetchone()
+        if row is not None:
+            stored = array.array("Q")
+            stored.frombytes(row[0])
+            # taille différente : ancien format, remplacé par nos seaux
+            if len(stored) == HIST_SIZE:
+                delta = array.array("Q", map(sum, zip(stored, delta)))
+        self._conn.execute(
+            f"INSERT INTO model_stats VALUES ({','.join('?' * 10)}) "
+            "ON CONFLICT (model, task_type) DO UPDATE SET "
+            "count = count + excluded.count, "
+            "success_total = success_total + excluded.success_total, "
+            "ewma_latency = excluded.ewma_latency, "
+            "ewma_success = excluded.ewma_success, "
+            "ewma_cost = excluded.ewma_cost, "
+            "total_cost = total_cost + excluded.total_cost, "
+            "histogram = excluded.histogram, "
+            "updated_at = max(updated_at, excluded.updated_at)",
+            (
+                *key,
+                s.count - count,
+                s.success_total - success_total,
+                s.ewma_latency,
+                s.ewma_success,
+                s.ewma_cost,
+                s.total_cost - total_cost,
+                delta.tobytes(),
+                s.updated_at,
+            ),
+        )
+
+    def _reload(self, key: tuple[str, str]) -> None:
+        row = self._conn.execute(
+            "SELECT count, success_total, total_cost, histogram, updated_at "
+            "FROM model_stats WHERE model = ? AND task_type = ?",
+            key,
+        ).fetchone()
+        if row is None:  # pragma: no cover - ligne écrite juste avant
+            return
+        s = self._stats[key]
+        s.count, s.success_total, s.total_cost = row[0], row[1], row[2]
+        s.histogram = array.array("Q")
+        s.histogram.frombytes(row[3])
+        s.updated_at = row[4]
+        self._flushed[key] = self._snapshot(s)
+
+    def summary(self) -> dict[str, dict[str, _t.Any]]:
+        return {
+            f"{model}/{task_type}": stats.as_dict()
+            for (model, task_type), stats in self._stats.items()
+        }
+
+    def close(self) -> None:
+        self._stop.set()
+        self.flush()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_store_instance: PerformanceStore | None = None
+_store_path: str | None = None
+
+
+def get_performance_store() -> PerformanceStore | None:
+    """Return the process-wide store, or ``None`` when disabled."""
+    global _store_instance, _store_path
+    path = os.getenv("JARVYS_PERF_STATS", str(DEFAULT_PATH))
+    if path.lower() in {"", "off", "0", "false"}:
+        return None
+    if _store_instance is None or _store_path != path:
+        try:
+            _store_instance = PerformanceStore(path)
+            _store_path = path
+            atexit.register(_store_instance.flush)
+        except (OSError, sqlite3.Error) as exc:
+            logger.warning("⚠️ Performance stats unavailable (%s): %s", path, exc)
+            return None
+    return _store_instance
+
+
+__all__ = [
+    "PerformanceStats",
+    "PerformanceStore",
+    "get_performance_store",
+    "histogram_quantile",
+    "latency_bucket",
+]
@@ -0,0 +1,388 @@
+"""Token-budgeted prompt assembly with cacheable static prefixes.
+
+Prompts are built from named sections, each counted with a real tokenizer
+(``tiktoken`` when installed, a conservative character estimate
+otherwise). A per-task budget is enforced by trimming the lowest-priority
+sections first: list sections (memory snippets, history) lose their last
+items, text sections are truncated on a token boundary. Sections without a
+priority, and stable sections, are never trimmed.
+
+Stable sections (instructions, output format, environment summary) are
+emitted first and in a fixed order, so consecutive calls share a
+byte-identical prefix that provider-side prompt caching can reuse: OpenAI
+and xAI cache long prefixes automatically, Anthropic through the
+``cache_control`` blocks returned by :meth:`BuiltPrompt.anthropic_system`.
+Providers only cache prefixes of at least ``MIN_CACHEABLE_TOKENS`` tokens;
+shorter prefixes are sent without a cache marker.
+:class:`PromptUsageLog` records the input and cached tokens the providers
+report for each call.
+
+Environment:
+    JARVYS_PROMPT_BUDGET_<TASK>: token budget of ``<task>`` (upper case)
+"""
+
+from __future__ import annotations
+
+import functools
+import logging
+import math
+import os
+import threading
+import typing as _t
+from dataclasses import asdict, dataclass, field
+
+try:  # optional dependency
+    import tiktoken
+except Exception:  # pragma: no cover - package optional
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+ENCODING_NAME = "o200k_base"
+CHARS_PER_TOKEN = 3.0  # estimation prudente sans tiktoken
+TRUNCATION_MARKER = " […]"
+SECTION_SEPARATOR = "\n\n"
+MIN_CACHEABLE_TOKENS = 1024  # préfixe minimal mis en cache par les providers
+
+DEFAULT_BUDGET = 8000
+DEFAULT_BUDGETS = {
+    "generate_code": 3000,
+    "code_review": 6000,
+    "code_validation": 16000,
+}
+
+
+@functools.lru_cache(maxsize=1)
+def _encoding() -> _t.Any:
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(ENCODING_NAME)
+    except Exception as exc:  # pragma: no cover - BPE non téléchargeable
+        logger.warning("tiktoken unavailable (%s), estimating tokens", exc)
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens of ``text``."""
+    if not text:
+        return 0
+    enc = _encoding()
+    if enc is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut ``text`` to at most ``max_tokens`` tokens, marker included."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    room = max_tokens - count_tokens(TRUNCATION_MARKER)
+    if room <= 0:
+        return ""
+    enc = _encoding()
+    if enc is None:
+        head = text[: int(room * CHARS_PER_TOKEN)]
+    else:
+        head = enc.decode(enc.encode(text, disallowed_special=())[:room])
+    return head.rstrip() + TRUNCATION_MARKER
+
+
+def task_budget(task: str) -> int:
+    """Token budget of ``task``, overridable per task from the environment."""
+    env = os.getenv(f"JARVYS_PROMPT_BUDGET_{task.upper()}")
+    if env:
+        return int(env)
+    return DEFAULT_BUDGETS.get(task, DEFAULT_BUDGET)
+
+
+@dataclass
+class PromptSection:
+    """Named part of a prompt; ``priority=None`` means never trimmed."""
+
+    name: str
+    items: list[str]
+    priority: int | None = None
+    stable: bool = False
+    header: str = ""
+    separator: str = "\n"
+
+    @property
+    def trimmable(self) -> bool:
+        return self.priority is not None and not self.stable
+
+    def render(self) -> str:
+        items = [item for item in self.items if item]
+        if not items:
+            return ""
+        body = self.separator.join(items)
+        return f"{self.header}\n{body}" if self.header else body
+
+
+@dataclass
+class BuiltPrompt:
+    """Assembled prompt: stable ``prefix`` first, then the variable ``suffix``."""
+
+    task: str
+    prefix: str
+    suffix: str
+    tokens: int
+    budget: int
+    section_tokens: dict[str, int]
+    trimmed: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def text(self) -> str:
+        return SECTION_SEPARATOR.join(
+            part for part in (self.prefix, self.suffix) if part
+        )
+
+    @property
+    def prefix_tokens(self) -> int:
+        return count_tokens(self.prefix)
+
+    @property
+    def over_budget(self) -> bool:
+        return self.tokens > self.budget
+
+    @property
+    def cacheable(self) -> bool:
+        return self.prefix_tokens >= MIN_CACHEABLE_TOKENS
+
+    def anthropic_system(self) -> list[dict[str, _t.Any]]:
+        """Stable prefix as an Anthropic system block, marked for caching
+        when it is long enough to be cached."""
+        if not self.prefix:
+            return []
+        block: dict[str, _t.Any] = {"type": "text", "text": self.prefix}
+        if self.cacheable:
+            block["cache_control"] = {"type": "ephemeral"}
+        return [block]
+
+    def as_dict(self) -> dict[str, _t.Any]:
+        return {
+            "task": self.task,
+            "tokens": self.tokens,
+            "prefix_tokens": self.prefix_tokens,
+            "cacheable": self.cacheable,
+            "budget": self.budget,
+            "sections": dict(self.section_tokens),
+            "trimmed": dict(self.trimmed),
+        }
+
+    def __str__(self) -> str:
+        return self.text
+
+
+class PromptBuilder:
+    """Collect prompt sections and assemble them under a token budget."""
+
+    def __init__(self, task: str, budget: int | None = None) -> None:
+        self.task = task
+        self.budget = task_budget(task) if budget is None else budget
+        self.sections: list[PromptSection] = []
+
+    def add(
+        self,
+        name: str,
+        content: str | _t.Sequence[str],
+        *,
+        priority: int | None = None,
+        stable: bool = False,
+        header: str = "",
+        separator: str = "\n",
+    ) -> "PromptBuilder":
+        """Add a section; lower ``priority`` values are trimmed first.
+
+        ``content`` may be a list of items (most relevant first): trimming
+        drops items from the end before truncating the last one left.
+        """
+        items = [content] if isinstance(content, str) else list(content)
+        self.sections.append(
+            PromptSection(name, items, priority, stable, header, separator)
+        )
+        return self
+
+    def build(self) -> BuiltPrompt:
+        ordered = [s for s in self.sections if s.stable] + [
+            s for s in self.sections if not s.stable
+        ]
+        counts = {s.name: count_tokens(s.render()) for s in ordered}
+        overhead = count_tokens(SECTION_SEPARATOR) * max(len(ordered) - 1, 0)
+        trimmed: dict[str, int] = {}
+
+        total = sum(counts.values()) + overhead
+        while total > self.budget:
+            candidates = [s for s in ordered if s.trimmable and counts[s.name]]
+            if not candidates:
+                break
+            # priorité la plus basse d'abord, puis la section ajoutée en dernier
+            section = min(reversed(candidates), key=lambda s: _t.cast(int, s.priority))
+            before = counts[section.name]
+            live = [item for item in section.items if item]
+            if len(live) > 1:
+                section.items = live[:-1]
+            else:
+                allowed = before - (total - self.budget)
+                section.items = [truncate_tokens(live[0], allowed)] if live else []
+            counts[section.name] = count_tokens(section.render())
+            if counts[section.name] >= before:  # garde-fou : rien n'a pu être retiré
+                section.items, counts[section.name] = [], 0
+            trimmed[section.name] = trimmed.get(section.name, 0) + (
+                before - counts[section.name]
+            )
+            total = sum(counts.values()) + overhead
+
+        prefix = SECTION_SEPARATOR.join(
+            text for s in ordered if s.stable and (text := s.render())
+        )
+        suffix = SECTION_SEPARATOR.join(
+            text for s in ordered if not s.stable and (text := s.render())
+        )
+        built = BuiltPrompt(
+            task=self.task,
+            prefix=prefix,
+            suffix=suffix,
+            tokens=0,
+            budget=self.budget,
+            section_tokens=counts,
+            trimmed=trimmed,
+        )
+        built.tokens = count_tokens(built.text)
+        if built.over_budget:
+            logger.warning(
+                "⚠️ Prompt %s: %d tokens > budget %d (sections non réductibles)",
+                self.task,
+                built.tokens,
+                self.budget,
+            )
+        return built
+
+
+@dataclass
+class TokenUsage:
+    """Token counts reported by a provider for one call."""
+
+    input_tokens: int = 0
+    cached_tokens: int = 0
+    cache_write_tokens: int = 0
+    output_tokens: int = 0
+
+
+def _field(obj: _t.Any, name: str) -> _t.Any:
+    if obj is None:
+        return None
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+def _int(value: _t.Any) -> int:
+    return value if isinstance(value, int) else 0
+
+
+def usage_from_response(response: _t.Any) -> TokenUsage:
+    """Extract token usage from an OpenAI, Anthropic, xAI or Gemini response.
+
+    Accepts SDK objects as well as decoded REST payloads (dicts).
+    """
+    usage = _field(response, "usage")
+    if usage is None:
+        meta = _field(response, "usageMetadata") or _field(response, "usage_metadata")
+        if meta is None:
+            return TokenUsage()
+        return TokenUsage(
+            input_tokens=_int(
+                _field(meta, "promptTokenCount") or _field(meta, "prompt_token_count")
+            ),
+            cached_tokens=_int(
+                _field(meta, "cachedContentTokenCount")
+                or _field(meta, "cached_content_token_count")
+            ),
+            output_tokens=_int(
+                _field(meta, "candidatesTokenCount")
+                or _field(meta, "candidates_token_count")
+            ),
+        )
+
+    if _field(usage, "input_tokens") is not None:
+        # Anthropic : input_tokens exclut les lectures / écritures de cache
+        cached = _int(_field(usage, "cache_read_input_tokens"))
+        written = _int(_field(usage, "cache_creation_input_tokens"))
+        return TokenUsage(
+            input_tokens=_int(_field(usage, "input_tokens")) + cached + written,
+            cached_tokens=cached,
+            cache_write_tokens=written,
+            output_tokens=_int(_field(usage, "output_tokens")),
+        )
+
+    # OpenAI / xAI (REST : prompt_tokens_details, SDK gRPC : champ à plat)
+    cached = _field(_field(usage, "prompt_tokens_details"), "cached_tokens")
+    if cached is None:
+        cached = _field(usage, "cached_prompt_text_tokens")
+    return TokenUsage(
+        input_tokens=_int(_field(usage, "prompt_tokens")),
+        cached_tokens=_int(cached),
+        output_tokens=_int(_field(usage, "completion_tokens")),
+    )
+
+
+class PromptUsageLog:
+    """Per-task totals of estimated, billed and cached input tokens."""
+
+    def __init__(self) -> None:
+        self._totals: dict[str, dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        task: str,
+        prompt: BuiltPrompt | None = None,
+        usage: TokenUsage | None = None,
+    ) -> dict[str, _t.Any]:
+        """Add one call to the totals of ``task`` and return its record."""
+        usage = usage or TokenUsage()
+        entry = {
+            "task": task,
+            "estimated_tokens": prompt.tokens if prompt else 0,
+            "trimmed_tokens": sum(prompt.trimmed.values()) if prompt else 0,
+            **asdict(usage),
+        }
+        with self._lock:
+            totals = self._totals.setdefault(task, {"calls": 0})
+            totals["calls"] += 1
+            for key, value in entry.items():
+                if key != "task":
+                    totals[key] = totals.get(key, 0) + value
+        if usage.input_tokens:
+            logger.info(
+                "🧮 %s: %d input tokens (%d cached)",
+                task,
+                usage.input_tokens,
+                usage.cached_tokens,
+            )
+        return entry
+
+    def stats(self) -> dict[str, dict[str, _t.Any]]:
+        """Totals per task with the share of input tokens served from cache."""
+        with self._lock:
+            out = {task: dict(totals) for task, totals in self._totals.items()}
+        for totals in out.values():
+            billed = totals.get("input_tokens", 0)
+            totals["cache_hit_ratio"] = (
+                round(totals.get("cached_tokens", 0) / billed, 3) if billed else 0.0
+            )
+        return out
+
+
+__all__ = [
+    "BuiltPrompt",
+    "PromptBuilder",
+    "PromptSection",
+    "PromptUsageLog",
+    "TokenUsage",
+    "count_tokens",
+    "task_budget",
+    "truncate_tokens",
+    "usage_from_response",
+]
@@ -0,0 +1,233 @@
+"""Response cache placed in front of :class:`MultiModelRouter`.
+
+Entries are keyed on ``(model, task_type, normalized prompt)`` and expire
+after a TTL; the least recently used entry is evicted once ``max_entries``
+is reached. An optional semantic tier embeds prompts and reuses a stored
+answer when the cosine similarity with a cached prompt of the same
+model/task type exceeds ``semantic_threshold``. The embedding computed for
+the last missed lookup is reused when the answer is stored, and the cosine
+scan is vectorised with NumPy when it is installed.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable
+
+try:
+    import numpy as np
+except Exception:  # pragma: no cover - package optional
+    np = None
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace so trivially different prompts share a key."""
+    return _WS_RE.sub(" ", prompt).strip()
+
+
+def _cosine(a: list[float], b: list[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def _unit(vector: list[float]) -> Any:
+    """Unit-norm array for the vectorised scan (``vector`` without NumPy)."""
+    if np is None:
+        return vector
+    array = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(array))
+    return array / norm if norm else array
+
+
+@dataclass
+class CacheEntry:
+    response: str
+    created: float
+    latency: float = 0.0
+    cost: float = 0.0
+    embedding: Any = None  # vecteur unitaire (np.ndarray) ou liste
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    semantic_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    saved_latency: float = 0.0
+    saved_cost: float = 0.0
+
+    def as_dict(self) -> dict:
+        lookups = self.hits + self.semantic_hits + self.misses
+        return {
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.semantic_hits) / lookups if lookups else 0.0,
+            "saved_latency_s": round(self.saved_latency, 3),
+            "saved_cost": round(self.saved_cost, 6),
+        }
+
+
+class ResponseCache:
+    """TTL + LRU cache of LLM responses with an optional semantic tier."""
+
+    def __init__(
+        self,
+        *,
+        ttl: float = 600.0,
+        max_entries: int = 512,
+        embed_fn: Callable[[str], list[float]] | None = None,
+        semantic_threshold: float | None = None,
+    ) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.embed_fn = embed_fn
+        self.semantic_threshold = semantic_threshold
+        self.stats = CacheStats()
+        self._entries: OrderedDict[tuple[str, str, str], CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        # embedding du dernier prompt manqué, réutilisé par put()
+        self._last_query: tuple[str, Any] | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    @property
+    def semantic(self) -> bool:
+        return self.embed_fn is not None and self.semantic_threshold is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expired(self, entry: CacheEntry, now: float) -> bool:
+        return now - entry.created > self.ttl
+
+    def _embed(self, text: str) -> Any:
+        memo = self._last_query
+        if memo is not None and memo[0] == text:
+            return memo[1]
+        try:
+            vector = self.embed_fn(text) if self.embed_fn else None
+        except Exception:  # pragma: no cover - embedding provider failures
+            return None
+        if vector is None:
+            return None
+        embedding = _unit(vector)
+        self._last_query = (text, embedding)
+        return embedding
+
+    def get(self, model: str, task_type: str, prompt: str) -> str | None:
+        """Return a cached answer or ``None`` (and count the miss)."""
+        if not self.enabled:
+            return None
+        key = (model, task_type, normalize_prompt(prompt))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry, now):
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._count_hit(entry, semantic=False)
+                return entry.response
+
+        if self.semantic:
+            match = self._semantic_lookup(model, task_type, key[2], now)
+            if match is not None:
+                return match
+
+        with self._lock:
+            self.stats.misses += 1
+        return None
+
+    def _semantic_lookup(
+        self, model: str, task_type: str, text: str, now: float
+    ) -> str | None:
+        query = self._embed(text)
+        if query is None:
+            return None
+        best_key = None
+        with self._lock:
+            keys, vectors = [], []
+            for key, entry in self._entries.items():
+                if key[0] != model or key[1] != task_type or entry.embedding is None:
+                    continue
+                if self._expired(entry, now):
+                    continue
+                keys.append(key)
+                vectors.append(entry.embedding)
+            if not keys:
+                return None
+            if np is not None:
+                sims = np.stack(vectors) @ query
+                best = int(np.argmax(sims))
+                if sims[best] >= self.semantic_threshold:
+                    best_key = keys[best]
+            else:
+                best_sim = self.semantic_threshold
+                for key, vector in zip(keys, vectors):
+                    sim = _cosine(query, vector)
+                    if sim >= best_sim:
+                        best_key, best_sim = key, sim
+            if best_key is None:
+                return None
+            entry = self._entries[best_key]
+            self._entries.move_to_end(best_key)
+            self._count_hit(entry, semantic=True)
+            return entry.response
+
+    def _count_hit(self, entry: CacheEntry, *, semantic: bool) -> None:
+        if semantic:
+            self.stats.semantic_hits += 1
+        else:
+            self.stats.hits += 1
+        self.stats.saved_latency += entry.latency
+        self.stats.saved_cost += entry.cost
+
+    def put(
+        self,
+        model: str,
+        task_type: str,
+        prompt: str,
+        response: str,
+        *,
+        latency: float = 0.0,
+        cost: float = 0.0,
+    ) -> None:
+        """Store ``response`` for the given key."""
+        if not self.enabled:
+            return
+        text = normalize_prompt(prompt)
+        embedding = self._embed(text) if self.semantic else None
+        entry = CacheEntry(
+            response=response,
+            created=time.monotonic(),
+            latency=latency,
+            cost=cost,
+            embedding=embedding,
+        )
+        with self._lock:
+            self._entries[(model, task_type, text)] = entry
+            self._entries.move_to_end((model, task_type, text))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+__all__ = ["ResponseCache", "CacheStats", "normalize_prompt"]
@@ -0,0 +1,359 @@
+"""Sandboxed execution of generated code with resource limits.
+
+Each :class:`Candidate` (a generated module and, optionally, its pytest
+tests) is written to a private temporary directory and executed in its own
+subprocess: the module is imported, then the tests run in the same
+interpreter. The child process gets
+
+* ``RLIMIT_CPU`` for CPU time, plus a wall-clock deadline enforced by the
+  parent (the whole process group is killed);
+* ``RLIMIT_AS`` set to the memory limit, so allocations beyond it fail
+  with ``MemoryError`` instead of growing the process; ``/proc/<pid>/status``
+  is only sampled to report the peak RSS, along with the kernel's
+  ``ru_maxrss`` from ``wait4``;
+* ``RLIMIT_FSIZE`` / ``RLIMIT_CORE`` caps and an environment stripped of
+  credentials (no API keys, ``HOME`` inside the sandbox).
+
+:meth:`SandboxRunner.run_many` runs several candidates concurrently on a
+bounded worker pool. Everything is local: Linux, the current interpreter
+and pytest, no network access needed.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import typing as _t
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+try:  # POSIX only
+    import resource
+except Exception:  # pragma: no cover - non-POSIX platforms
+    resource = None
+
+CPU_SECONDS = float(os.getenv("JARVYS_SANDBOX_CPU", "10"))
+WALL_SECONDS = float(os.getenv("JARVYS_SANDBOX_WALL", "30"))
+MEMORY_MB = int(os.getenv("JARVYS_SANDBOX_MEMORY_MB", "512"))
+MAX_WORKERS = int(os.getenv("JARVYS_SANDBOX_WORKERS", str(os.cpu_count() or 2)))
+POLL_INTERVAL = 0.02  # échantillonnage RSS (rapport) / échéance
+OUTPUT_LIMIT = 8192  # caractères de stdout / stderr conservés
+FILE_SIZE_LIMIT = 64 << 20  # octets écrits par fichier dans le bac à sable
+
+MODULE_NAME = "candidate"
+TEST_FILE = "test_candidate.py"
+REPORT_FILE = "report.xml"
+PHASE_FILE = "phase.json"
+
+# Fixe ses propres limites (pas de preexec_fn : run_many utilise des
+# threads), importe le module puis lance pytest dans le même interpréteur
+_DRIVER = """
+import json, resource, sys, time
+cpu, fsize, memory = int(sys.argv[1]), int(sys.argv[2]), int(sys.argv[3])
+resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+resource.setrlimit(resource.RLIMIT_FSIZE, (fsize, fsize))
+resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+sys.path.insert(0, ".")
+phases = {}
+start = time.perf_counter()
+import candidate
+phases["import"] = time.perf_counter() - start
+code = 0
+if len(sys.argv) > 4:
+    import pytest
+    start = time.perf_counter()
+    code = int(pytest.main(["-q", "-p", "no:cacheprovider",
+                            "--junitxml=report.xml", sys.argv[4]]))
+    phases["tests"] = time.perf_counter() - start
+with open("phase.json", "w") as fh:
+    json.dump(phases, fh)
+sys.exit(code)
+"""
+
+_CODE_BLOCK = re.compile(r"```(?:python|py)?[ \t]*\n(.*?)```", re.DOTALL)
+
+
+def extract_python_code(text: str) -> str:
+    """Return the longest fenced Python block of an LLM answer, or ``text``."""
+    blocks = _CODE_BLOCK.findall(text or "")
+    return max(blocks, key=len).strip() + "\n" if blocks else text
+
+
+@dataclass
+class SandboxLimits:
+    cpu_seconds: float = CPU_SECONDS
+    wall_seconds: float = WALL_SECONDS
+    memory_mb: int = MEMORY_MB
+
+
+@dataclass
+class Candidate:
+    """Generated module source and optional pytest source importing it."""
+
+    name: str
+    code: str
+    tests: str | None = None
+
+
+@dataclass
+class ExecutionResult:
+    """Measured outcome of one sandboxed run.
+
+    ``status`` is one of ``passed``, ``failed`` (import error or failing
+    tests), ``syntax_error``, ``timeout``, ``cpu_limit``, ``memory_limit``
+    or ``error`` (the sandbox itself could not run).
+    """
+
+    name: str
+    status: str
+    returncode: int | None = None
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    peak_rss_mb: float = 0.0
+    import_time: float | None = None
+    test_time: float | None = None
+    tests_passed: int = 0
+    tests_failed: int = 0
+    stdout: str = ""
+    stderr: str = ""
+    errors: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "passed"
+
+    def summary(self) -> str:
+        tests = ""
+        if self.tests_passed or self.tests_failed:
+            tests = f", tests {self.tests_passed} passed/{self.tests_failed} failed"
+        return (
+            f"{self.status} in {self.wall_time:.2f}s "
+            f"(cpu {self.cpu_time:.2f}s, peak {self.peak_rss_mb:.1f} MB{tests})"
+        )
+
+    def as_dict(self) -> dict[str, _t.Any]:
+        data = asdict(self)
+        data["stdout"] = data["stdout"][-1000:]
+        data["stderr"] = data["stderr"][-1000:]
+        return data
+
+
+def _sandbox_env(workdir: str) -> dict[str, str]:
+    """Minimal environment: no credentials leak into generated code."""
+    env = {
+        "PATH": os.environ.get("PATH", os.defpath),
+        "HOME": workdir,
+        "TMPDIR": workdir,
+        "LANG": os.environ.get("LANG", "C.UTF-8"),
+        "PYTHONDONTWRITEBYTECODE": "1",
+        "PYTHONHASHSEED": "0",
+        "PYTHONIOENCODING": "utf-8",
+    }
+    # interpréteur d'un virtualenv : ses site-packages restent accessibles
+    if os.environ.get("VIRTUAL_ENV"):
+        env["VIRTUAL_ENV"] = os.environ["VIRTUAL_ENV"]
+    return env
+
+
+def _rss_kb(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return 0
+
+
+def _junit_counts(report: Path) -> tuple[int, int]:
+    try:
+        root = ET.parse(report).getroot()
+    except (OSError, ET.ParseError):
+        return 0, 0
+    suites = [root] if root.tag == "testsuite" else root.findall("testsuite")
+    total = failed = skipped = 0
+    for suite in suites:
+        total += int(suite.get("tests", 0))
+        failed += int(suite.get("failures", 0)) + int(suite.get("errors", 0))
+        skipped += int(suite.get("skipped", 0))
+    return total - failed - skipped, failed
+
+
+def _tail(path: Path) -> str:
+    try:
+        with open(path, "rb") as fh:
+            fh.seek(0, os.SEEK_END)
+            fh.seek(max(fh.tell() - OUTPUT_LIMIT, 0))
+            return fh.read().decode("utf-8", "replace")
+    except OSError:
+        return ""
+
+
+class SandboxRunner:
+    """Run candidates in isolated, resource-limited subprocesses."""
+
+    def __init__(
+        self,
+        limits: SandboxLimits | None = None,
+        *,
+        python: str = sys.executable,
+        max_workers: int = MAX_WORKERS,
+        poll_interval: float = POLL_INTERVAL,
+    ) -> None:
+        self.limits = limits or SandboxLimits()
+        self.python = python
+        self.max_workers = max(1, max_workers)
+        self.poll_interval = poll_interval
+
+    def run(self, candidate: Candidate) -> ExecutionResult:
+        """Execute ``candidate`` and measure it."""
+        try:
+            compile(candidate.code, f"{MODULE_NAME}.py", "exec")
+            if candidate.tests:
+                compile(candidate.tests, TEST_FILE, "exec")
+        except SyntaxError as exc:
+            return ExecutionResult(
+                candidate.name, "syntax_error", errors=[f"Syntax error: {exc}"]
+            )
+        if resource is None or not Path("/proc").is_dir():
+            return ExecutionResult(
+                candidate.name, "error", errors=["sandbox requires Linux"]
+            )
+
+        workdir = tempfile.mkdtemp(prefix="jarvys-sandbox-")
+        try:
+            return self._run_in(Path(workdir), candidate)
+        except OSError as exc:
+            return ExecutionResult(candidate.name, "error", errors=[str(exc)])
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def _run_in(self, workdir: Path, candidate: Candidate) -> ExecutionResult:
+        (workdir / f"{MODULE_NAME}.py").write_text(candidate.code, encoding="utf-8")
+        cpu = max(1, round(self.limits.cpu_seconds))
+        memory = self.limits.memory_mb << 20
+        args = [
+            self.python,
+            "-I",
+            "-c",
+            _DRIVER,
+            str(cpu),
+            str(FILE_SIZE_LIMIT),
+            str(memory),
+        ]
+        if candidate.tests:
+            (workdir / TEST_FILE).write_text(candidate.tests, encoding="utf-8")
+            args.append(TEST_FILE)
+
+        killed: str | None = None
+        peak_kb = 0
+        start = time.perf_counter()
+        with (
+            open(workdir / "stdout.txt", "wb") as out,
+            open(workdir / "stderr.txt", "wb") as err,
+        ):
+            proc = subprocess.Popen(
+                args,
+                cwd=workdir,
+                env=_sandbox_env(str(workdir)),
+                stdin=subprocess.DEVNULL,
+                stdout=out,
+                stderr=err,
+                start_new_session=True,  # groupe de processus tué d'un bloc
+            )
+            while True:
+                pid, status, usage = os.wait4(proc.pid, os.WNOHANG)
+                if pid:
+                    break
+                # RSS relevé pour le rapport seulement : RLIMIT_AS borne la mémoire
+                peak_kb = max(peak_kb, _rss_kb(proc.pid))
+                if (
+                    killed is None
+                    and time.perf_counter() - start > self.limits.wall_seconds
+                ):
+                    killed = "timeout"
+                    try:
+                        os.killpg(proc.pid, signal.SIGKILL)
+                    except ProcessLookupError:
+                        pass
+                time.sleep(self.poll_interval)
+        wall = time.perf_counter() - start
+        proc.returncode = os.waitstatus_to_exitcode(status)
+
+        result = ExecutionResult(
+            candidate.name,
+            "passed",
+            returncode=proc.returncode,
+            wall_time=wall,
+            cpu_time=usage.ru_utime + usage.ru_stime,
+            peak_rss_mb=max(usage.ru_maxrss, peak_kb) / 1024,
+            stdout=_tail(workdir / "stdout.txt"),
+            stderr=_tail(workdir / "stderr.txt"),
+        )
+        try:
+            phases = json.loads((workdir / PHASE_FILE).read_text())
+            result.import_time = phases.get("import")
+            result.test_time = phases.get("tests")
+        except (OSError, ValueError):
+            pass
+        result.tests_passed, result.tests_failed = _junit_counts(workdir / REPORT_FILE)
+
+        if killed:
+            result.status = killed
+            result.errors.append(f"killed: {killed}")
+        elif proc.returncode == -signal.SIGXCPU or (
+            # SIGKILL du noyau : limite dure RLIMIT_CPU atteinte
+            proc.returncode == -signal.SIGKILL
+            and result.cpu_time >= self.limits.cpu_seconds
+        ):
+            result.status = "cpu_limit"
+            result.errors.append("CPU time limit exceeded")
+        elif proc.returncode != 0 and "MemoryError" in result.stderr + result.stdout:
+            # allocation refusée par RLIMIT_AS (import ou tests)
+            result.status = "memory_limit"
+            result.errors.append("memory limit exceeded")
+        elif proc.returncode != 0:
+            result.status = "failed"
+            if result.tests_failed:
+                result.errors.append(f"{result.tests_failed} test(s) failed")
+            else:
+                last = result.stderr.strip().splitlines()[-1:]
+                result.errors.append(last[0] if last else f"exit {proc.returncode}")
+        return result
+
+    def run_many(self, candidates: _t.Sequence[Candidate]) -> list[ExecutionResult]:
+        """Run ``candidates`` concurrently; results keep the input order."""
+        if len(candidates) <= 1:
+            return [self.run(c) for c in candidates]
+        workers = min(self.max_workers, len(candidates))
+        with ThreadPoolExecutor(workers, thread_name_prefix="sandbox") as pool:
+            return list(pool.map(self.run, candidates))
+
+
+def best_result(results: _t.Iterable[ExecutionResult]) -> ExecutionResult | None:
+    """Passing run with most tests passed, then lowest runtime and memory."""
+    passing = [r for r in results if r.ok]
+    if not passing:
+        return None
+    return min(passing, key=lambda r: (-r.tests_passed, r.wall_time, r.peak_rss_mb))
+
+
+__all__ = [
+    "Candidate",
+    "ExecutionResult",
+    "SandboxLimits",
+    "SandboxRunner",
+    "best_result",
+    "extract_python_code",
+]
@@ -0,0 +1,186 @@
+"""Dependency-aware parallel executor for orchestrator cycle steps.
+
+Each :class:`Step` declares the state keys it reads (``inputs``) and
+writes (``outputs``). A step depends on the closest step declared before
+it that outputs one of its inputs; steps without a pending dependency run
+concurrently in a thread pool. Only declared outputs are merged back into
+the shared state, through an optional per-key reducer (as with LangGraph
+``Annotated`` state), so concurrent steps cannot clobber each other.
+"""
+
+from __future__ import annotations
+
+import copy
+import logging
+import time
+import typing as _t
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+State = _t.Dict[str, _t.Any]
+Reducer = _t.Callable[[_t.Any, _t.Any], _t.Any]
+
+
+@dataclass(frozen=True)
+class Step:
+    """One node of the cycle: ``fn(state) -> state updates``."""
+
+    name: str
+    fn: _t.Callable[[State], State]
+    inputs: tuple[str, ...] = ()
+    outputs: tuple[str, ...] = ()
+    # Étape ignorée (ainsi que ses dépendantes) si le prédicat est faux
+    when: _t.Callable[[State], bool] | None = None
+
+    def project(self, result: State) -> State:
+        """Keep only the declared outputs of ``result``."""
+        return {key: result[key] for key in self.outputs if key in result}
+
+
+@dataclass
+class StepTiming:
+    name: str
+    status: str  # ok, skipped, failed
+    start: float = 0.0  # secondes depuis le début du cycle
+    duration: float = 0.0
+
+    def as_dict(self) -> dict[str, _t.Any]:
+        return {
+            "step": self.name,
+            "status": self.status,
+            "start": round(self.start, 3),
+            "duration": round(self.duration, 3),
+        }
+
+
+def merge_dicts(old: _t.Any, new: _t.Any) -> _t.Any:
+    """Recursive dict merge, ``new`` wins on conflicts."""
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return new
+    merged = dict(old)
+    for key, value in new.items():
+        merged[key] = merge_dicts(merged.get(key), value)
+    return merged
+
+
+def _snapshot(state: State) -> State:
+    # les dicts sont copiés : une étape peut les muter sans effet de bord
+    return {
+        key: copy.deepcopy(value) if isinstance(value, dict) else value
+        for key, value in state.items()
+    }
+
+
+class StepDAG:
+    """Run :class:`Step` objects concurrently, respecting data dependencies."""
+
+    def __init__(
+        self,
+        steps: _t.Sequence[Step],
+        *,
+        reducers: _t.Mapping[str, Reducer] | None = None,
+        max_workers: int | None = None,
+    ) -> None:
+        names = [step.name for step in steps]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate step names: {names}")
+        self.steps = list(steps)
+        self.reducers = dict(reducers or {})
+        self.max_workers = max_workers or max(1, len(steps))
+        self.last_timings: list[StepTiming] = []
+
+        # dépendances = producteur le plus proche déclaré avant, donc acyclique
+        self._deps: dict[str, tuple[str, ...]] = {}
+        for idx, step in enumerate(self.steps):
+            deps = []
+            for key in step.inputs:
+                producer = next(
+                    (s.name for s in reversed(self.steps[:idx]) if key in s.outputs),
+                    None,
+                )
+                if producer is not None and producer not in deps:
+                    deps.append(producer)
+            self._deps[step.name] = tuple(deps)
+
+    def dependencies(self, name: str) -> tuple[str, ...]:
+        return self._deps[name]
+
+    def _merge(self, state: State, updates: State) -> None:
+        for key, value in updates.items():
+            reducer = self.reducers.get(key)
+            state[key] = reducer(state.get(key), value) if reducer else value
+
+    def run(self, state: State) -> tuple[State, list[StepTiming]]:
+        """Execute all steps; returns the merged state and per-step timings.
+
+        The first exception raised by a step is re-raised once the steps
+        already running have finished; ``last_timings`` still holds the
+        timings collected so far.
+        """
+        state = dict(state)
+        origin = time.perf_counter()
+        timings: dict[str, StepTiming] = {}
+        self.last_timings = []
+        pending = list(self.steps)
+        running: dict[Future, tuple[Step, float]] = {}
+        error: BaseException | None = None
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="step"
+        ) as pool:
+            while pending or running:
+                for step in list(pending) if error is None else []:
+                    deps = [timings.get(d) for d in self._deps[step.name]]
+                    if any(t is None for t in deps):
+                        continue  # une dépendance tourne encore
+                    pending.remove(step)
+                    now = time.perf_counter() - origin
+                    if any(t.status != "ok" for t in deps) or (
+                        step.when is not None and not step.when(state)
+                    ):
+                        timings[step.name] = StepTiming(step.name, "skipped", now)
+                        continue
+                    logger.info("▶️ Step %s started", step.name)
+                    running[pool.submit(step.fn, _snapshot(state))] = (step, now)
+
+                if not running:
+                    # tout le reste est ignoré (ou bloqué par une erreur)
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step, start = running.pop(future)
+                    duration = time.perf_counter() - origin - start
+                    try:
+                        result = future.result()
+                    except Exception as exc:
+                        logger.error("❌ Step %s failed: %s", step.name, exc)
+                        timings[step.name] = StepTiming(
+                            step.name, "failed", start, duration
+                        )
+                        error = error or exc
+                        continue
+                    self._merge(state, step.project(result or {}))
+                    timings[step.name] = StepTiming(step.name, "ok", start, duration)
+
+        self.last_timings = [timings[s.name] for s in self.steps if s.name in timings]
+        if error is not None:
+            raise error
+        return state, self.last_timings
+
+
+def timing_summary(timings: _t.Sequence[StepTiming]) -> dict[str, _t.Any]:
+    """Wall time of a cycle versus the time its steps would take in sequence."""
+    ran = [t for t in timings if t.status != "skipped"]
+    wall = max((t.start + t.duration for t in ran), default=0.0)
+    sequential = sum(t.duration for t in ran)
+    return {
+        "wall_time": round(wall, 3),
+        "sequential_time": round(sequential, 3),
+        "saved": round(sequential - wall, 3),
+        "steps": [t.as_dict() for t in timings],
+    }
+
+
+__all__ = ["Step", "StepDAG", "StepTiming", "merge_dicts", "timing_summary"]
@@ -0,0 +1,391 @@
+"""Test-impact selection with results cached by content hash.
+
+An import graph of the repository is built with :mod:`ast` and cached
+per file against ``(mtime_ns, size)``. Each test file gets a fingerprint
+of its own content, every local module it imports transitively, the
+``conftest.py`` files above it and the pytest configuration. A test file
+whose fingerprint matches the last recorded run reuses that result; only
+the others are handed to pytest, and outcomes are read from a JUnit XML
+report rather than scraped from stdout.
+
+Only Python imports are tracked: tests reading data files or depending
+on installed packages are rerun when their own code changes, not when
+those inputs do.
+"""
+
+from __future__ import annotations
+
+import ast
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import typing as _t
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .incremental_lint import EXCLUDED_DIRS, file_digest
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "jarvys" / "tests"
+PYTEST_CONFIG_FILES = ("pytest.ini", "pyproject.toml", "setup.cfg", "tox.ini")
+
+Runner = _t.Callable[..., subprocess.CompletedProcess]
+
+
+def default_cache_path(root: str | Path) -> Path | None:
+    """Cache file for ``root`` under ``JARVYS_TEST_CACHE``; ``None`` if disabled."""
+    base = os.getenv("JARVYS_TEST_CACHE", str(DEFAULT_CACHE_DIR))
+    if base.lower() in {"", "off", "0", "false"}:
+        return None
+    digest = hashlib.sha1(str(Path(root).resolve()).encode()).hexdigest()[:16]
+    return Path(base) / f"{digest}.json"
+
+
+def is_test_file(rel: str) -> bool:
+    name = os.path.basename(rel)
+    return name.endswith(".py") and (
+        name.startswith("test_") or name.endswith("_test.py")
+    )
+
+
+def parse_imports(source: str, module: str, is_package: bool) -> list[str]:
+    """Absolute module names imported by ``source`` (relative ones resolved)."""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return []
+    package = module if is_package else module.rpartition(".")[0]
+    names: list[str] = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                parts = package.split(".") if package else []
+                parts = parts[: len(parts) - (node.level - 1)] if parts else []
+                base = ".".join(parts + ([node.module] if node.module else []))
+            else:
+                base = node.module or ""
+            if base:
+                names.append(base)
+            # « from pkg import sous_module » importe aussi le sous-module
+            names.extend(f"{base}.{a.name}" if base else a.name for a in node.names)
+    return names
+
+
+@dataclass
+class TestRunResult:
+    """Outcome of a test-impact run."""
+
+    selected: list[str] = field(default_factory=list)  # fichiers exécutés
+    cached: list[str] = field(default_factory=list)  # résultats réutilisés
+    passed: list[str] = field(default_factory=list)  # fichiers verts
+    failed: list[str] = field(default_factory=list)  # node ids en échec
+    errors: list[str] = field(default_factory=list)  # erreurs pytest/collecte
+    returncode: int = 0
+    duration: float = 0.0
+    output: str = ""
+
+    __test__ = False  # pas une classe de test pour pytest
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed and not self.errors
+
+    def summary(self) -> str:
+        status = "PASSED" if self.ok else "FAILED"
+        return (
+            f"{status} - {len(self.selected)} test files run, "
+            f"{len(self.cached)} cached, {len(self.failed)} failures"
+        )
+
+    def as_dict(self) -> dict[str, _t.Any]:
+        return {
+            "ok": self.ok,
+            "selected": self.selected,
+            "cached": len(self.cached),
+            "failed": self.failed,
+            "errors": self.errors,
+            "returncode": self.returncode,
+            "duration": round(self.duration, 3),
+        }
+
+
+class TestImpact:
+    """Select and run the tests affected by changes under ``root``."""
+
+    __test__ = False
+
+    def __init__(
+        self,
+        root: str | Path,
+        cache_path: str | Path | None = None,
+        *,
+        runner: Runner = subprocess.run,
+        pytest_args: _t.Sequence[str] = ("-q",),
+        timeout: float = 900.0,
+    ) -> None:
+        self.root = Path(root)
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.runner = runner
+        self.pytest_args = tuple(pytest_args)
+        self.timeout = timeout
+        self.cache = self._load()
+        self._digests: dict[str, str] = {}
+        self._modules: dict[str, str] = {}  # module -> fichier
+        self._deps: dict[str, set[str]] = {}  # fichier -> fichiers importés
+        self._closure: dict[str, frozenset[str]] = {}
+        self.scan()
+
+    # -- cache -----------------------------------------------------------
+    def _load(self) -> dict[str, _t.Any]:
+        empty: dict[str, _t.Any] = {"files": {}, "results": {}}
+        if self.cache_path is None:
+            return empty
+        try:
+            data = json.loads(self.cache_path.read_text())
+        except (OSError, ValueError):
+            return empty
+        return {**empty, **data} if isinstance(data, dict) else empty
+
+    def _save(self) -> None:
+        if self.cache_path is None:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        # cache partagé entre worktrees : les résultats (clés de contenu)
+        # enregistrés entre-temps par un autre checkout sont conservés
+        results = {**self._load()["results"], **self.cache["results"]}
+        data = {**self.cache, "results": results}
+        tmp = self.cache_path.with_name(
+            f"{self.cache_path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        tmp.write_text(json.dumps(data))
+        os.replace(tmp, self.cache_path)
+
+    # -- graphe d'imports --------------------------------------------------
+    def _module_name(self, rel: str) -> tuple[str, bool]:
+        parts = Path(rel).with_suffix("").parts
+        if parts and parts[0] == "src" and len(parts) > 1:
+            parts = parts[1:]  # disposition « src/ »
+        is_package = parts[-1] == "__init__"
+        if is_package:
+            parts = parts[:-1]
+        return ".".join(parts), is_package
+
+    def scan(self) -> None:
+        """Refresh digests and imports of every Python file (stat-cached)."""
+        files = self.cache["files"]
+        seen: dict[str, list] = {}
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = sorted(d for d in dirnames if d not in EXCLUDED_DIRS)
+            for name in filenames:
+                if not name.endswith(".py"):
+                    continue
+                path = os.path.join(dirpath, name)
+                rel = os.path.relpath(path, self.root)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entry = files.get(rel)
+                if not entry or entry[1:3] != [st.st_mtime_ns, st.st_size]:
+                    source = Path(path).read_text(encoding="utf-8", errors="replace")
+                    module, is_package = self._module_name(rel)
+                    entry = [
+                        hashlib.blake2b(
+                            source.encode("utf-8", "replace"), digest_size=16
+                        ).hexdigest(),
+                        st.st_mtime_ns,
+                        st.st_size,
+                        parse_imports(source, module, is_package),
+                    ]
+                seen[rel] = entry
+        self.cache["files"] = seen
+
+        self._digests = {rel: entry[0] for rel, entry in seen.items()}
+        self._modules = {}
+        for rel in seen:
+            module, _ = self._module_name(rel)
+            if module:
+                self._modules.setdefault(module, rel)
+        self._deps = {}
+        for rel, entry in seen.items():
+            deps = set()
+            for name in entry[3]:
+                parts = name.split(".")
+                # le module et ses paquets parents (leurs __init__ sont exécutés)
+                for i in range(1, len(parts) + 1):
+                    target = self._modules.get(".".join(parts[:i]))
+                    if target and target != rel:
+                        deps.add(target)
+            self._deps[rel] = deps
+        self._closure = {}
+        self._config_digest = "".join(
+            f"{name}\0{file_digest(self.root / name)}\n"
+            for name in PYTEST_CONFIG_FILES
+            if (self.root / name).exists()
+        )
+
+    def dependencies(self, rel: str) -> frozenset[str]:
+        """Local files ``rel`` imports, transitively (itself included)."""
+        if rel in self._closure:
+            return self._closure[rel]
+        seen, stack = {rel}, [rel]
+        while stack:
+            for dep in self._deps.get(stack.pop(), ()):
+                if dep not in seen:
+                    seen.add(dep)
+                    stack.append(dep)
+        self._closure[rel] = frozenset(seen)
+        return self._closure[rel]
+
+    def test_files(self) -> list[str]:
+        return sorted(rel for rel in self._digests if is_test_file(rel))
+
+    def affected_tests(self, paths: _t.Iterable[str | Path]) -> list[str]:
+        """Test files that import any of ``paths``, directly or transitively."""
+        targets = {self._rel(p) for p in paths}
+        return [
+            test
+            for test in self.test_files()
+            if targets & (self.dependencies(test) | self._conftests(test))
+        ]
+
+    def _rel(self, path: str | Path) -> str:
+        path = Path(path)
+        rel = os.path.relpath(path, self.root) if path.is_absolute() else str(path)
+        return os.path.normpath(rel)
+
+    def _conftests(self, rel: str) -> set[str]:
+        found: set[str] = set()
+        for parent in Path(rel).parents:
+            conftest = str(parent / "conftest.py")
+            if conftest in self._digests:
+                found |= self.dependencies(conftest)
+        return found
+
+    def fingerprint(self, test: str) -> str:
+        h = hashlib.blake2b(digest_size=16)
+        for rel in sorted(self.dependencies(test) | self._conftests(test)):
+            h.update(f"{rel}\0{self._digests.get(rel, '')}\n".encode())
+        h.update(self._config_digest.encode())
+        return h.hexdigest()
+
+    # -- exécution -------------------------------------------------------
+    def _junit_failures(self, report: Path, selected: list[str]) -> list[str]:
+        by_module = {
+            os.path.splitext(rel)[0].replace(os.sep, "."): rel for rel in selected
+        }
+        failures = []
+        for case in ET.parse(report).iter("testcase"):
+            if case.find("failure") is None and case.find("error") is None:
+                continue
+            # erreur de collecte : classname vide, module dans name
+            classname = case.get("classname") or case.get("name", "")
+            parts = classname.split(".")
+            rel, rest = None, []
+            for i in range(len(parts), 0, -1):
+                rel = by_module.get(".".join(parts[:i]))
+                if rel:
+                    rest = parts[i:]
+                    break
+            if case.get("classname"):
+                failures.append("::".join([rel or classname, *rest, case.get("name")]))
+            else:
+                failures.append(rel or classname)
+        return failures
+
+    def run(self, tests: _t.Iterable[str] | None = None) -> TestRunResult:
+        """Run ``tests`` (default: all test files), reusing cached outcomes."""
+        start = time.perf_counter()
+        result = TestRunResult()
+        results = self.cache["results"]
+        tests = self.test_files() if tests is None else [self._rel(t) for t in tests]
+
+        stale: dict[str, str] = {}
+        for test in tests:
+            key = self.fingerprint(test) if test in self._digests else ""
+            cached = results.get(test)
+            if key and cached and cached["key"] == key:
+                result.cached.append(test)
+                if cached["failed"]:
+                    result.failed.extend(cached["failed"])
+                else:
+                    result.passed.append(test)
+            else:
+                stale[test] = key
+        result.selected = sorted(stale)
+
+        if stale:
+            with tempfile.TemporaryDirectory() as tmp:
+                report = Path(tmp) / "junit.xml"
+                try:
+                    proc = self.runner(
+                        [
+                            sys.executable,
+                            "-m",
+                            "pytest",
+                            *self.pytest_args,
+                            f"--junitxml={report}",
+                            *result.selected,
+                        ],
+                        cwd=self.root,
+                        capture_output=True,
+                        text=True,
+                        timeout=self.timeout,
+                    )
+                    result.returncode = proc.returncode
+                    result.output = ((proc.stdout or "") + (proc.stderr or ""))[-2000:]
+                except (OSError, subprocess.SubprocessError) as exc:
+                    result.returncode, result.output = -1, str(exc)
+
+                # 0 : tout passe, 1 : échecs ; au-delà rien n'est fiable
+                if result.returncode in (0, 1) and report.exists():
+                    failures = self._junit_failures(report, result.selected)
+                    for test, key in stale.items():
+                        failed = [
+                            f
+                            for f in failures
+                            if f == test or f.startswith(test + "::")
+                        ]
+                        if key:
+                            results[test] = {"key": key, "failed": failed}
+                        if not failed:
+                            result.passed.append(test)
+                    result.failed.extend(failures)
+                else:
+                    last = (result.output.strip().splitlines() or [""])[-1]
+                    result.errors.append(
+                        f"pytest exited with {result.returncode}: {last}"
+                    )
+
+        for test in list(results):
+            if test not in self._digests:
+                del results[test]
+        self._save()
+        result.duration = time.perf_counter() - start
+        logger.info(
+            "🧪 Tests: %d run, %d cached, %d failures (%.1fs)",
+            len(result.selected),
+            len(result.cached),
+            len(result.failed),
+            result.duration,
+        )
+        return result
+
+
+__all__ = [
+    "TestImpact",
+    "TestRunResult",
+    "default_cache_path",
+    "is_test_file",
+    "parse_imports",
+]
@@ -0,0 +1,175 @@
+"""Persistent on-disk cache of embeddings.
+
+Vectors are stored as float32 blobs in SQLite, keyed by
+``sha256(model, text)``. The least recently used rows are evicted once
+``max_entries`` is exceeded.
+
+Environment:
+    JARVYS_EMBEDDING_CACHE: path of the SQLite file, or ``off`` to disable
+    JARVYS_EMBEDDING_CACHE_MAX: maximum number of cached vectors
+"""
+
+from __future__ import annotations
+
+import array
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import typing as _t
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = Path.home() / ".cache" / "jarvys" / "embeddings.sqlite"
+DEFAULT_MAX_ENTRIES = 50_000
+
+
+def cache_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """SQLite-backed embedding cache with LRU eviction and hit-rate stats."""
+
+    def __init__(
+        self, path: str | Path, *, max_entries: int = DEFAULT_MAX_ENTRIES
+    ) -> None:
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_access "
+            "ON embeddings(last_access)"
+        )
+        self._conn.commit()
+
+    def get_many(self, model: str, texts: _t.Sequence[str]) -> list[list[float] | None]:
+        """Return the cached vector of each text, ``None`` when missing."""
+        keys = [cache_key(model, t) for t in texts]
+        found: dict[str, list[float]] = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):  # limite de variables SQLite
+                chunk = keys[start : start + 500]
+                rows = self._conn.execute(
+                    "SELECT key, vector FROM embeddings WHERE key IN "
+                    f"({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                for key, blob in rows:
+                    vec = array.array("f")
+                    vec.frombytes(blob)
+                    found[key] = vec.tolist()
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                    [(now, k) for k in found],
+                )
+                self._conn.commit()
+            self.hits += sum(1 for k in keys if k in found)
+            self.misses += sum(1 for k in keys if k not in found)
+        return [found.get(k) for k in keys]
+
+    def get(self, model: str, text: str) -> list[float] | None:
+        return self.get_many(model, [text])[0]
+
+    def put_many(
+        self,
+        model: str,
+        items: _t.Iterable[tuple[str, _t.Sequence[float]]],
+    ) -> None:
+        now = time.time()
+        rows = [
+            (cache_key(model, text), array.array("f", vec).tobytes(), now)
+            for text, vec in items
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)", rows
+            )
+            self._evict()
+            self._conn.commit()
+
+    def put(self, model: str, text: str, vector: _t.Sequence[float]) -> None:
+        self.put_many(model, [(text, vector)])
+
+    def _evict(self) -> None:
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        excess = count - self.max_entries
+        if excess <= 0:
+            return
+        # on libère 10 % de marge pour ne pas évincer à chaque insertion
+        excess += self.max_entries // 10
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN ("
+            "SELECT key FROM embeddings ORDER BY last_access LIMIT ?)",
+            (excess,),
+        )
+        self.evictions += excess
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def stats(self) -> dict[str, _t.Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "path": str(self.path),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_cache_instance: EmbeddingCache | None = None
+_cache_path: str | None = None
+
+
+def get_embedding_cache() -> EmbeddingCache | None:
+    """Return the process-wide cache, or ``None`` when disabled."""
+    global _cache_instance, _cache_path
+    path = os.getenv("JARVYS_EMBEDDING_CACHE", str(DEFAULT_PATH))
+    if path.lower() in {"", "off", "0", "false"}:
+        return None
+    if _cache_instance is None or _cache_path != path:
+        try:
+            _cache_instance = EmbeddingCache(
+                path,
+                max_entries=int(
+                    os.getenv("JARVYS_EMBEDDING_CACHE_MAX", DEFAULT_MAX_ENTRIES)
+                ),
+            )
+            _cache_path = path
+        except (OSError, sqlite3.Error) as exc:
+            logger.warning("⚠️ Embedding cache unavailable (%s): %s", path, exc)
+            return None
+    return _cache_instance
+
+
+__all__ = ["EmbeddingCache", "cache_key", "get_embedding_cache"]
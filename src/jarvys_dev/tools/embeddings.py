@@ -0,0 +1,127 @@
+"""Batched OpenAI embedding requests.
+
+Texts are grouped into multi-input ``embeddings.create`` calls that stay
+under the provider's per-request limits, with token counts from
+:func:`jarvys_dev.prompt_budget.count_tokens`. A failed chunk is retried with
+exponential backoff instead of failing the whole batch. Vectors already in
+the on-disk :mod:`.embedding_cache` are not requested again.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+import typing as _t
+
+from ..prompt_budget import count_tokens
+from .embedding_cache import get_embedding_cache
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+MAX_INPUT_CHARS = 8192  # limite contextuelle par texte
+MAX_BATCH_TOKENS = 250_000  # marge sous la limite de 300k tokens par requête
+MAX_BATCH_ITEMS = 2048  # nombre maximum d'entrées par requête
+RETRY_ATTEMPTS = 3
+RETRY_BACKOFF = 0.5  # secondes, doublé à chaque tentative
+
+T = _t.TypeVar("T")
+
+
+def chunk_texts(
+    texts: _t.Sequence[str],
+    *,
+    max_tokens: int = MAX_BATCH_TOKENS,
+    max_items: int = MAX_BATCH_ITEMS,
+) -> list[list[int]]:
+    """Group the indexes of ``texts`` into request-sized chunks."""
+    chunks: list[list[int]] = []
+    current: list[int] = []
+    budget = 0
+    for idx, text in enumerate(texts):
+        tokens = count_tokens(text)
+        if current and (budget + tokens > max_tokens or len(current) >= max_items):
+            chunks.append(current)
+            current, budget = [], 0
+        current.append(idx)
+        budget += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def with_retry(
+    fn: _t.Callable[[], T],
+    *,
+    attempts: int = RETRY_ATTEMPTS,
+    backoff: float = RETRY_BACKOFF,
+    what: str = "request",
+) -> T:
+    """Call ``fn`` until it succeeds or ``attempts`` is exhausted."""
+    for attempt in range(1, attempts + 1):
+        try:
+            return fn()
+        except Exception as exc:
+            if attempt == attempts:
+                raise
+            delay = backoff * 2 ** (attempt - 1)
+            logger.warning(
+                "⚠️ %s failed (attempt %d/%d): %s", what, attempt, attempts, exc
+            )
+            time.sleep(delay)
+    raise AssertionError("unreachable")  # pragma: no cover
+
+
+def embed_texts(
+    client: _t.Any,
+    texts: _t.Sequence[str],
+    *,
+    model: str = EMBEDDING_MODEL,
+    skip_failed: bool = False,
+    use_cache: bool = True,
+) -> list[list[float] | None]:
+    """Embed ``texts`` with as few requests as the limits allow.
+
+    Returns one vector per text, in order. When ``skip_failed`` is true a
+    chunk that still fails after the retries yields ``None`` entries
+    instead of raising.
+    """
+    inputs = [text[:MAX_INPUT_CHARS] for text in texts]
+    cache = get_embedding_cache() if use_cache else None
+    if cache is not None:
+        vectors = cache.get_many(model, inputs)
+    else:
+        vectors = [None] * len(inputs)
+
+    missing = [i for i, vec in enumerate(vectors) if vec is None]
+    chunks = chunk_texts(
+        [inputs[i] for i in missing],
+        max_tokens=MAX_BATCH_TOKENS,
+        max_items=MAX_BATCH_ITEMS,
+    )
+    for chunk in ([missing[j] for j in c] for c in chunks):
+        batch = [inputs[i] for i in chunk]
+        try:
+            resp = with_retry(
+                lambda batch=batch: client.embeddings.create(model=model, input=batch),
+                what=f"embedding chunk of {len(batch)}",
+            )
+        except Exception as exc:
+            if not skip_failed:
+                raise
+            logger.error("❌ Embedding chunk abandoned: %s", exc)
+            continue
+        # l'API renvoie les embeddings dans l'ordre de ``input``
+        for idx, item in zip(chunk, resp.data):
+            vectors[idx] = item.embedding
+        if cache is not None:
+            cache.put_many(model, [(inputs[i], vectors[i]) for i in chunk])
+    return vectors
+
+
+__all__ = [
+    "EMBEDDING_MODEL",
+    "chunk_texts",
+    "embed_texts",
+    "with_retry",
+]
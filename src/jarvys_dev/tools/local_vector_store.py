@@ -0,0 +1,411 @@
+"""Local vector store used by :class:`JarvysInfiniteMemory` when offline.
+
+Vectors are L2-normalised and appended to a raw float32 file that is
+memory-mapped for search; metadata lives in a SQLite table whose ``row``
+is the vector's position in that file. Both are written on every insert,
+so nothing is lost on restart.
+
+Several processes (orchestrator, dashboard, jarvys_ai) may share the same
+directory: inserts take an inter-process lock (``flock`` on
+``write.lock``), the row index is derived from the vector file offset
+under that lock, and rows written by other processes are picked up
+before each search.
+
+Small stores are searched exactly. Past ``ivf_min_rows`` an IVF index
+(k-means centroids, persisted in ``ivf.npy``) restricts the scan to the
+``nprobe`` closest lists. Rows carry a ``synced`` flag so that memories
+written while Supabase was unreachable can be pushed later.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import sqlite3
+import threading
+import typing as _t
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+try:  # verrou inter-processus (POSIX)
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIM = 1536  # text-embedding-3-small
+IVF_MIN_ROWS = 4096  # en dessous, recherche exacte
+IVF_NPROBE = 8
+KMEANS_ITERATIONS = 10
+
+_FIELDS = (
+    "id",
+    "content",
+    "agent_source",
+    "memory_type",
+    "user_context",
+    "importance_score",
+    "tags",
+    "metadata",
+    "created_at",
+)
+
+
+class LocalVectorStore:
+    """Memory-mapped float32 vectors + SQLite metadata + optional IVF index."""
+
+    def __init__(
+        self,
+        root: str | Path,
+        *,
+        dim: int = DEFAULT_DIM,
+        ivf_min_rows: int = IVF_MIN_ROWS,
+        nprobe: int = IVF_NPROBE,
+    ) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.dim = dim
+        self.ivf_min_rows = ivf_min_rows
+        self.nprobe = nprobe
+        self._vec_path = self.root / "vectors.f32"
+        self._ivf_path = self.root / "ivf.npy"
+        self._lock_path = self.root / "write.lock"
+        self._lock = threading.RLock()
+
+        self._db = sqlite3.connect(self.root / "meta.sqlite", check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS memories (
+                row INTEGER PRIMARY KEY,
+                id TEXT NOT NULL,
+                content TEXT NOT NULL,
+                agent_source TEXT,
+                memory_type TEXT,
+                user_context TEXT,
+                importance_score REAL,
+                tags TEXT,
+                metadata TEXT,
+                created_at TEXT,
+                synced INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_memories_synced ON memories(synced)"
+        )
+        self._db.commit()
+
+        # colonnes de filtrage gardées en mémoire
+        self._contexts: list[str] = []
+        self._types: list[str] = []
+        self._importance: list[float] = []
+        self._filters: tuple[np.ndarray, np.ndarray, np.ndarray] | None = None
+        self._count = 0
+        self._mmap: np.memmap | None = None
+        self._centroids: np.ndarray | None = None
+        self._assign: np.ndarray | None = None
+        self._trained_on = 0
+
+        with self._file_lock():
+            self._truncate_orphans()
+            self._refresh()
+        if self._ivf_path.exists() and self._count:
+            self._centroids = np.load(self._ivf_path)
+            self._trained_on = self._count
+            self._assign = self._nearest_centroid(self._vectors())
+
+    # ------------------------------------------------------------ storage
+    def __len__(self) -> int:
+        return self._count
+
+    @contextmanager
+    def _file_lock(self) -> _t.Iterator[None]:
+        """Exclusive lock shared with the other processes using ``root``."""
+        with self._lock, open(self._lock_path, "a") as fh:
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _row_bytes(self) -> int:
+        return self.dim * 4
+
+    def _truncate_orphans(self) -> int:
+        """Drop vectors without metadata; returns the next row (lock held).
+
+        A writer that died between the vector write and the metadata commit
+        leaves orphan vectors at the end of the file.
+        """
+        committed = self._db.execute("SELECT COUNT(*) FROM memories").fetchone()[0]
+        expected = committed * self._row_bytes()
+        if self._vec_path.exists() and self._vec_path.stat().st_size > expected:
+            with open(self._vec_path, "r+b") as fh:
+                fh.truncate(expected)
+        return committed
+
+    def _refresh(self) -> None:
+        """Load the rows committed by other processes since the last call."""
+        new = self._db.execute(
+            "SELECT row, user_context, memory_type, importance_score "
+            "FROM memories WHERE row >= ? ORDER BY row",
+            (self._count,),
+        ).fetchall()
+        if not new:
+            return
+        for _, ctx, mtype, imp in new:
+            self._contexts.append(ctx)
+            self._types.append(mtype)
+            self._importance.append(imp)
+        start = self._count
+        self._count = new[-1][0] + 1
+        self._filters = None
+        if self._centroids is not None:
+            added = np.asarray(self._vectors()[start:])
+            self._assign = np.concatenate([self._assign, self._nearest_centroid(added)])
+
+    def _vectors(self) -> np.ndarray:
+        if self._count == 0:
+            return np.empty((0, self.dim), dtype=np.float32)
+        if self._mmap is None or self._mmap.shape[0] != self._count:
+            self._mmap = np.memmap(
+                self._vec_path,
+                dtype=np.float32,
+                mode="r",
+                shape=(self._count, self.dim),
+            )
+        return self._mmap
+
+    def add(
+        self,
+        records: _t.Sequence[dict[str, _t.Any]],
+        vectors: _t.Sequence[_t.Sequence[float]],
+        *,
+        synced: bool = False,
+    ) -> list[str]:
+        """Append ``records`` and their vectors; returns the record ids."""
+        if not records:
+            return []
+        matrix = np.array(vectors, dtype=np.float32).reshape(len(records), self.dim)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+
+        now = datetime.now().isoformat()
+        rows = []
+        with self._file_lock():
+            self._truncate_orphans()
+            self._refresh()  # lignes ajoutées par les autres processus
+            with open(self._vec_path, "ab") as fh:
+                fh.seek(0, 2)
+                start = fh.tell() // self._row_bytes()
+                for offset, record in enumerate(records):
+                    rows.append(
+                        (
+                            start + offset,
+                            record.get("id") or str(uuid.uuid4()),
+                            record["content"],
+                            record.get("agent_source"),
+                            record.get("memory_type", "experience"),
+                            record.get("user_context", "default"),
+                            float(record.get("importance_score", 0.5)),
+                            json.dumps(record.get("tags") or []),
+                            json.dumps(record.get("metadata") or {}),
+                            record.get("created_at") or now,
+                            int(synced),
+                        )
+                    )
+                fh.write(matrix.tobytes())
+            try:
+                with self._db:
+                    self._db.executemany(
+                        f"INSERT INTO memories VALUES ({','.join('?' * 11)})", rows
+                    )
+            except Exception:
+                # pas de vecteurs orphelins si les métadonnées sont refusées
+                with open(self._vec_path, "r+b") as fh:
+                    fh.truncate(start * self._row_bytes())
+                raise
+            self._refresh()
+            self._maybe_train()
+        return [row[1] for row in rows]
+
+    # ---------------------------------------------------------------- IVF
+    def _nearest_centroid(self, vectors: np.ndarray) -> np.ndarray:
+        out = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), 65536):
+            block = np.asarray(vectors[start : start + 65536])
+            out[start : start + len(block)] = np.argmax(
+                block @ self._centroids.T, axis=1
+            )
+        return out
+
+    def _maybe_train(self) -> None:
+        if self._count < self.ivf_min_rows:
+            return
+        if self._centroids is not None and self._count < 2 * self._trained_on:
+            return
+        self.build_index()
+
+    def build_index(self) -> None:
+        """(Re)train the IVF centroids with spherical k-means."""
+        with self._lock:
+            vectors = self._vectors()
+            nlist = max(1, int(math.sqrt(self._count)))
+            rng = np.random.default_rng(0)
+            sample_size = min(self._count, 64 * nlist)
+            sample = np.asarray(
+                vectors[np.sort(rng.choice(self._count, sample_size, replace=False))]
+            )
+            centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+            for _ in range(KMEANS_ITERATIONS):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                for c in range(nlist):
+                    members = sample[labels == c]
+                    if len(members):
+                        mean = members.mean(axis=0)
+                        centroids[c] = mean / (np.linalg.norm(mean) or 1.0)
+            self._centroids = centroids
+            self._trained_on = self._count
+            self._assign = self._nearest_centroid(vectors)
+            np.save(self._ivf_path, centroids)
+            logger.info(f"🧭 Index IVF local: {nlist} listes / {self._count} vecteurs")
+
+    # ------------------------------------------------------------- search
+    def _filter_arrays(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if self._filters is None:
+            self._filters = (
+                np.asarray(self._contexts, dtype=object),
+                np.asarray(self._types, dtype=object),
+                np.asarray(self._importance, dtype=np.float32),
+            )
+        return self._filters
+
+    def search(
+        self,
+        query: _t.Sequence[float],
+        *,
+        user_context: str,
+        memory_types: _t.Sequence[str] | None = None,
+        min_importance: float = 0.0,
+        limit: int = 10,
+    ) -> list[dict[str, _t.Any]]:
+        """Return the ``limit`` most similar memories, best first."""
+        with self._lock:
+            self._refresh()
+            if self._count == 0:
+                return []
+            contexts, types, importance = self._filter_arrays()
+            mask = (contexts == user_context) & (importance >= min_importance)
+            if memory_types:
+                mask &= np.isin(types, list(memory_types))
+            candidates = np.flatnonzero(mask)
+
+            q = np.array(query, dtype=np.float32)
+            q /= np.linalg.norm(q) or 1.0
+            if self._centroids is not None and len(candidates) > limit:
+                probe = np.argsort(self._centroids @ q)[-self.nprobe :]
+                probed = candidates[np.isin(self._assign[candidates], probe)]
+                if len(probed) >= limit:
+                    candidates = probed
+            if len(candidates) == 0:
+                return []
+
+            sims = np.asarray(self._vectors()[candidates]) @ q
+            k = min(limit, len(candidates))
+            top = np.argpartition(-sims, k - 1)[:k]
+            top = top[np.argsort(-sims[top])]
+            return self._fetch(candidates[top].tolist(), sims[top].tolist())
+
+    def _fetch(
+        self, rows: list[int], similarities: list[float] | None = None
+    ) -> list[dict[str, _t.Any]]:
+        if not rows:
+            return []
+        found = {
+            r[0]: r
+            for r in self._db.execute(
+                f"SELECT row, {', '.join(_FIELDS)} FROM memories "
+                f"WHERE row IN ({','.join('?' * len(rows))})",
+                rows,
+            )
+        }
+        out = []
+        for pos, row in enumerate(rows):
+            record = dict(zip(_FIELDS, found[row][1:]))
+            record["tags"] = json.loads(record["tags"] or "[]")
+            record["metadata"] = json.loads(record["metadata"] or "{}")
+            if similarities is not None:
+                record["similarity"] = similarities[pos]
+            out.append(record)
+        return out
+
+    # --------------------------------------------------------------- sync
+    def pending(self, limit: int = 500) -> list[tuple[int, dict, list[float]]]:
+        """Unsynced ``(row, record, vector)`` triples, oldest first."""
+        with self._lock:
+            self._refresh()
+            rows = [
+                r[0]
+                for r in self._db.execute(
+                    "SELECT row FROM memories WHERE synced = 0 ORDER BY row LIMIT ?",
+                    (limit,),
+                )
+            ]
+            vectors = self._vectors()
+            return [
+                (row, record, vectors[row].tolist())
+                for row, record in zip(rows, self._fetch(rows))
+            ]
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM memories WHERE synced = 0"
+            ).fetchone()[0]
+
+    def mark_synced(self, rows: _t.Iterable[int]) -> None:
+        with self._lock:
+            self._db.executemany(
+                "UPDATE memories SET synced = 1 WHERE row = ?", [(r,) for r in rows]
+            )
+            self._db.commit()
+
+    def stats(self, user_context: str | None = None) -> dict[str, _t.Any]:
+        where, params = "", ()
+        if user_context:
+            where, params = "WHERE user_context = ?", (user_context,)
+        with self._lock:
+            by_agent = dict(
+                self._db.execute(
+                    f"SELECT agent_source, COUNT(*) FROM memories {where} "
+                    "GROUP BY agent_source",
+                    params,
+                ).fetchall()
+            )
+            by_type = dict(
+                self._db.execute(
+                    f"SELECT memory_type, COUNT(*) FROM memories {where} "
+                    "GROUP BY memory_type",
+                    params,
+                ).fetchall()
+            )
+        return {
+            "total_memories": sum(by_type.values()),
+            "by_agent": by_agent,
+            "by_type": by_type,
+            "pending_sync": self.pending_count(),
+            "ivf_lists": 0 if self._centroids is None else len(self._centroids),
+        }
+
+
+__all__ = ["LocalVectorStore"]
@@ -10,6 +10,8 @@ from openai import OpenAI
 
 from supabase import create_client
 
+from .embeddings import embed_texts, with_retry
+
 _sb: _t.Any | None = None
 _ocl: OpenAI | None = None
 
@@ -44,15 +46,18 @@ def _load_config() -> None:
 
 
 _DIM = 1536  # modèle text‑embedding‑3‑small
+_UPSERT_BATCH = 500  # lignes par requête d'upsert Supabase
 
 
 def _embed(text: str) -> list[float]:
+    # passe par le cache disque d'embeddings (voir .embedding_cache)
+    return _embed_many([text])[0]
+
+
+def _embed_many(texts: _t.Sequence[str]) -> list[list[float]]:
+    """Embed ``texts`` with multi-input requests (see :mod:`.embeddings`)."""
     _load_config()
-    resp = _ocl.embeddings.create(
-        model="text-embedding-3-small",
-        input=text[:8192],  # limite contextuelle
-    )
-    return resp.data[0].embedding
+    return embed_texts(_ocl, texts)
 
 
 # ------------------------------------------------------------------ public
@@ -83,6 +88,44 @@ def upsert_embedding(content: str, doc_id: str | None = None) -> str:
     return doc_id
 
 
+def upsert_embeddings(
+    docs: _t.Iterable[str | tuple[str, str | None]],
+) -> list[str]:
+    """Bulk variant of :func:`upsert_embedding`.
+
+    ``docs`` holds contents or ``(content, doc_id)`` pairs. Embeddings are
+    requested in batches and rows are upserted ``_UPSERT_BATCH`` at a time;
+    each chunk is retried on failure. Returns, in input order, the UUIDs of
+    the documents actually saved.
+    """
+    _load_config()
+    pairs = [(d, None) if isinstance(d, str) else d for d in docs]
+    if not pairs:
+        return []
+    contents = [content for content, _ in pairs]
+    doc_ids = [doc_id or str(uuid.uuid4()) for _, doc_id in pairs]
+    embeddings = _embed_many(contents)
+    rows = [
+        {"id": doc_id, "content": content, "embedding": emb}
+        for doc_id, content, emb in zip(doc_ids, contents, embeddings)
+    ]
+    saved: list[str] = []
+    for start in range(0, len(rows), _UPSERT_BATCH):
+        chunk = rows[start : start + _UPSERT_BATCH]
+        try:
+            with_retry(
+                lambda chunk=chunk: _sb.table("documents")
+                .upsert(chunk, on_conflict="id")
+                .execute(),
+                what=f"upsert of {len(chunk)} documents",
+            )
+            saved.extend(row["id"] for row in chunk)
+        except Exception as e:
+            logging.warning("⚠️ Supabase bulk upsert failed, data not saved: %s", e)
+    logging.info("%d/%d document embeddings saved", len(saved), len(rows))
+    return saved
+
+
 def memory_search(query: str, k: int = 5) -> list[str]:
     """Recherche sémantique ; renvoie les contenus les + proches."""
     _load_config()
@@ -3,17 +3,65 @@ et JARVYS_AI. Utilise Supabase comme base vectorielle pour persistance
 et recherche sémantique."""
 
 import hashlib
+import json
 import logging
+import math
 import os
+import time
 from datetime import datetime
+from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 import openai
 
+try:  # optional dependency
+    import numpy as np
+except Exception:  # pragma: no cover - package optional
+    np = None
+
 from supabase import Client, create_client
 
+from .embeddings import embed_texts, with_retry
+
 logger = logging.getLogger(__name__)
 
+INSERT_BATCH_SIZE = 500  # lignes par insert Supabase
+RECALL_RPC = "match_jarvys_memory"  # voir supabase/schema.sql
+RECALL_FALLBACK_SCAN = 2000  # lignes examinées sans RPC pgvector
+# PostgREST (fonction absente du cache de schéma) et PostgreSQL (undefined_function)
+MISSING_FUNCTION_CODES = {"PGRST202", "42883"}
+# Magasin vectoriel local (hors ligne) ; JARVYS_LOCAL_MEMORY=off le désactive
+LOCAL_MEMORY_DIR = Path.home() / ".cache" / "jarvys" / "memory"
+SYNC_INTERVAL = 60.0  # secondes entre deux synchronisations vers Supabase
+
+_local_stores: Dict[str, Any] = {}
+
+
+def _open_local_store() -> Optional[Any]:
+    """Ouvre (une seule fois par chemin) le magasin vectoriel local."""
+    path = os.getenv("JARVYS_LOCAL_MEMORY", str(LOCAL_MEMORY_DIR))
+    if np is None or path.lower() in {"", "off", "0", "false"}:
+        return None
+    if path not in _local_stores:
+        try:
+            from .local_vector_store import LocalVectorStore
+
+            _local_stores[path] = LocalVectorStore(path)
+        except Exception as e:
+            logger.warning(f"⚠️ Mémoire locale indisponible ({path}): {e}")
+            return None
+    return _local_stores[path]
+
+
+def _is_missing_function(exc: Exception) -> bool:
+    """Vrai si la RPC a échoué parce que la fonction n'existe pas en base."""
+    if str(getattr(exc, "code", "") or "") in MISSING_FUNCTION_CODES:
+        return True
+    message = str(exc).lower()
+    return "could not find the function" in message or (
+        "function" in message and "does not exist" in message
+    )
+
 
 class JarvysInfiniteMemory:
     """Gestionnaire de mémoire infinie partagée pour l'écosystème JARVYS."""
@@ -44,6 +92,10 @@ class JarvysInfiniteMemory:
         if openai_key:
             self.openai_client = openai.OpenAI(api_key=openai_key)
 
+        # Repli local quand Supabase est injoignable
+        self.local_store = _open_local_store()
+        self._last_sync = 0.0
+
     def memorize(
         self,
         content: str,
@@ -67,7 +119,7 @@ class JarvysInfiniteMemory:
         Returns:
             True si succès, False sinon
         """
-        if not self.supabase or not self.openai_client:
+        if not self.openai_client or (not self.supabase and self.local_store is None):
             logger.warning(
                 "Mémoire non disponible (Supabase ou OpenAI manquant)"  # noqa: E501
             )
@@ -92,21 +144,94 @@ class JarvysInfiniteMemory:
             }
 
             # Insérer dans Supabase
-            _result = (
-                self.supabase.table("jarvys_memory").insert(memory_data).execute()  # noqa: E501
-            )
-
-            if _result.data:
+            saved_remote = False
+            if self.supabase:
+                try:
+                    _result = (
+                        self.supabase.table("jarvys_memory")
+                        .insert(memory_data)
+                        .execute()
+                    )
+                    saved_remote = bool(_result.data)
+                    if not saved_remote:
+                        logger.error(f"❌ Échec sauvegarde mémoire: {_result}")
+                except Exception as e:
+                    logger.warning(f"⚠️ Supabase injoignable: {e}")
+
+            stored_locally = False
+            if self.local_store is not None:
+                stored_locally = self._store_locally([memory_data], synced=saved_remote)
+                if saved_remote:
+                    self._maybe_sync()
+
+            if saved_remote or stored_locally:
                 logger.info(f"💾 Mémoire sauvegardée: {content[:50]}...")
-                return True
-            else:
-                logger.error(f"❌ Échec sauvegarde mémoire: {_result}")
-                return False
+            return saved_remote or stored_locally
 
         except Exception as e:
             logger.error(f"❌ Erreur mémorisation: {e}")
             return False
 
+    def memorize_many(self, items: List[Any]) -> int:
+        """
+        Mémorise plusieurs informations en quelques requêtes groupées.
+
+        Args:
+            items: Contenus (str) ou dicts acceptant les mêmes clés que
+                :meth:`memorize` (``content``, ``memory_type``,
+                ``importance_score``, ``tags``, ``metadata``)
+
+        Returns:
+            Nombre de souvenirs sauvegardés
+        """
+        if not self.openai_client or (not self.supabase and self.local_store is None):
+            logger.warning("Mémoire non disponible (Supabase ou OpenAI manquant)")
+            return 0
+
+        entries = [{"content": i} if isinstance(i, str) else i for i in items]
+        if not entries:
+            return 0
+
+        embeddings = self._generate_embeddings([e["content"] for e in entries])
+        rows = [
+            {
+                "content": entry["content"],
+                "agent_source": self.agent_name,
+                "memory_type": entry.get("memory_type", "experience"),
+                "user_context": self.user_context,
+                "importance_score": entry.get("importance_score", 0.5),
+                "tags": entry.get("tags") or [],
+                "metadata": entry.get("metadata") or {},
+                "embedding": embedding,
+            }
+            for entry, embedding in zip(entries, embeddings)
+            if embedding
+        ]
+
+        saved = 0
+        for start in range(0, len(rows), INSERT_BATCH_SIZE):
+            chunk = rows[start : start + INSERT_BATCH_SIZE]
+            saved_remote = False
+            if self.supabase:
+                try:
+                    _result = with_retry(
+                        lambda chunk=chunk: self.supabase.table("jarvys_memory")
+                        .insert(chunk)
+                        .execute(),
+                        what=f"insert of {len(chunk)} memories",
+                    )
+                    saved += len(_result.data or [])
+                    saved_remote = True
+                except Exception as e:
+                    logger.error(f"❌ Erreur mémorisation groupée: {e}")
+            if self.local_store is not None:
+                stored = self._store_locally(chunk, synced=saved_remote)
+                if stored and not saved_remote:
+                    saved += len(chunk)
+
+        logger.info(f"💾 {saved}/{len(entries)} souvenirs sauvegardés")
+        return saved
+
     def recall(
         self,
         query: str,
@@ -126,7 +251,7 @@ class JarvysInfiniteMemory:
         Returns:
             Liste des souvenirs trouvés
         """
-        if not self.supabase or not self.openai_client:
+        if not self.openai_client or (not self.supabase and self.local_store is None):
             logger.warning("Mémoire non disponible pour la recherche")
             return []
 
@@ -136,52 +261,142 @@ class JarvysInfiniteMemory:
             if not query_embedding:
                 return []
 
-            # Construire la requête Supabase
-            query_builder = (
-                self.supabase.table("jarvys_memory")
-                .select("*")
-                .eq("user_context", self.user_context)
-                .gte("importance_score", min_importance)
-                .order("created_at", desc=True)
-                .limit(limit)
-            )
-
-            # Filtrer par type de mémoire si spécifié
-            if memory_types:
-                query_builder = query_builder.in_("memory_type", memory_types)
-
-            _result = query_builder.execute()
-
-            if _result.data:
-                # Calculer la similarité et trier
-                memories = []
-                for memory in _result.data:
-                    if memory.get("embedding"):
-                        similarity = self._calculate_similarity(
-                            query_embedding, memory["embedding"]
-                        )
-                        memory["similarity"] = similarity
-                        memories.append(memory)
-
-                # Trier par similarité décroissante
-                memories.sort(key=lambda x: x["similarity"], reverse=True)
-
-                logger.info(
-                    "🧠 %d souvenirs trouvés pour: %s...",
-                    len(memories),
-                    query[:30],
+            memories = None
+            if self.supabase:
+                try:
+                    memories = self._recall_remote(
+                        query_embedding, memory_types, min_importance, limit
+                    )
+                except Exception as e:
+                    logger.warning(f"⚠️ Supabase injoignable, recherche locale: {e}")
+            if memories is None and self.local_store is not None:
+                memories = self.local_store.search(
+                    query_embedding,
+                    user_context=self.user_context,
+                    memory_types=memory_types,
+                    min_importance=min_importance,
+                    limit=limit,
                 )
-                return memories[:limit]
+            memories = memories or []
 
-            return []
+            logger.info(
+                "🧠 %d souvenirs trouvés pour: %s...",
+                len(memories),
+                query[:30],
+            )
+            return memories
 
         except Exception as e:
             logger.error(f"❌ Erreur recherche mémoire: {e}")
             return []
 
+    def _recall_remote(
+        self,
+        query_embedding: List[float],
+        memory_types: Optional[List[str]],
+        min_importance: float,
+        limit: int,
+    ) -> List[Dict[str, Any]]:
+        try:
+            return self._recall_rpc(
+                query_embedding, memory_types, min_importance, limit
+            )
+        except Exception as e:
+            if not _is_missing_function(e):
+                # erreur transitoire : pas de balayage de 2000 lignes, recall()
+                # se rabat sur le store local
+                raise
+            # Base sans la fonction pgvector : classement côté client
+            logger.debug(f"RPC {RECALL_RPC} indisponible: {e}")
+            return self._recall_client_side(
+                query_embedding, memory_types, min_importance, limit
+            )
+
+    def _recall_rpc(
+        self,
+        query_embedding: List[float],
+        memory_types: Optional[List[str]],
+        min_importance: float,
+        limit: int,
+    ) -> List[Dict[str, Any]]:
+        """Recherche vectorielle filtrée et triée par distance côté serveur."""
+        _result = self.supabase.rpc(
+            RECALL_RPC,
+            {
+                "query_embedding": query_embedding,
+                "user_ctx": self.user_context,
+                "memory_types": memory_types,
+                "min_importance": min_importance,
+                "match_count": limit,
+            },
+        ).execute()
+        return list(_result.data or [])
+
+    def _recall_client_side(
+        self,
+        query_embedding: List[float],
+        memory_types: Optional[List[str]],
+        min_importance: float,
+        limit: int,
+    ) -> List[Dict[str, Any]]:
+        """Classement vectorisé sur au plus ``RECALL_FALLBACK_SCAN`` lignes."""
+        query_builder = (
+            self.supabase.table("jarvys_memory")
+            .select("*")
+            .eq("user_context", self.user_context)
+            .gte("importance_score", min_importance)
+        )
+        if memory_types:
+            query_builder = query_builder.in_("memory_type", memory_types)
+        _result = (
+            query_builder.order("created_at", desc=True)
+            .limit(RECALL_FALLBACK_SCAN)
+            .execute()
+        )
+
+        rows, vectors = [], []
+        for memory in _result.data or []:
+            embedding = memory.get("embedding")
+            if isinstance(embedding, str):  # pgvector sérialisé par PostgREST
+                embedding = json.loads(embedding)
+            if embedding:
+                rows.append(memory)
+                vectors.append(embedding)
+        if not rows:
+            return []
+
+        similarities = self._batch_similarity(query_embedding, vectors)
+        order = sorted(range(len(rows)), key=lambda i: -similarities[i])[:limit]
+        memories = []
+        for i in order:
+            rows[i]["similarity"] = similarities[i]
+            memories.append(rows[i])
+        return memories
+
+    @staticmethod
+    def _batch_similarity(
+        query: List[float], vectors: List[List[float]]
+    ) -> List[float]:
+        """Similarités cosinus de ``query`` avec chaque vecteur."""
+        if np is not None:
+            matrix = np.asarray(vectors, dtype=np.float32)
+            q = np.asarray(query, dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(q)
+            norms[norms == 0] = 1.0
+            return (matrix @ q / norms).tolist()
+
+        q_norm = math.sqrt(sum(x * x for x in query))
+        sims = []
+        for vec in vectors:
+            norm = math.sqrt(sum(x * x for x in vec)) * q_norm
+            sims.append(sum(a * b for a, b in zip(query, vec)) / norm if norm else 0.0)
+        return sims
+
     def get_memory_stats(self) -> Dict[str, Any]:
         """Retourne des statistiques sur la mémoire."""
         if not self.supabase:
+            if self.local_store is not None:
+                return self._local_stats()
             return {"error": "Mémoire non disponible"}
 
         try:
@@ -225,23 +440,94 @@ class JarvysInfiniteMemory:
 
         except Exception as e:
             logger.error(f"❌ Erreur stats mémoire: {e}")
+            if self.local_store is not None:
+                return self._local_stats()
             return {"error": str(e)}
 
+    def _local_stats(self) -> Dict[str, Any]:
+        stats = self.local_store.stats(self.user_context)
+        stats.update(
+            {
+                "user_context": self.user_context,
+                "last_updated": datetime.now().isoformat(),
+                "backend": "local",
+            }
+        )
+        return stats
+
+    # ------------------------------------------------------------ local store
+    def _store_locally(self, rows: List[Dict[str, Any]], synced: bool) -> bool:
+        """Copie locale des souvenirs ; ``False`` si l'écriture a échoué"""
+        try:
+            self.local_store.add(
+                [{k: v for k, v in r.items() if k != "embedding"} for r in rows],
+                [r["embedding"] for r in rows],
+                synced=synced,
+            )
+            return True
+        except Exception as e:
+            logger.error(f"❌ Erreur mémoire locale: {e}")
+            return False
+
+    def _maybe_sync(self) -> None:
+        if time.monotonic() - self._last_sync < SYNC_INTERVAL:
+            return
+        self._last_sync = time.monotonic()
+        if self.local_store.pending_count():
+            self.sync_local_memory()
+
+    def sync_local_memory(self) -> int:
+        """
+        Pousse vers Supabase les souvenirs écrits hors ligne.
+
+        Returns:
+            Nombre de souvenirs synchronisés
+        """
+        if not self.supabase or self.local_store is None:
+            return 0
+
+        pushed = 0
+        while True:
+            batch = self.local_store.pending(INSERT_BATCH_SIZE)
+            if not batch:
+                break
+            rows = [{**record, "embedding": vector} for _, record, vector in batch]
+            try:
+                with_retry(
+                    lambda rows=rows: self.supabase.table("jarvys_memory")
+                    .upsert(rows, on_conflict="id")
+                    .execute(),
+                    what=f"sync of {len(rows)} local memories",
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ Synchronisation mémoire locale interrompue: {e}")
+                break
+            self.local_store.mark_synced([row for row, _, _ in batch])
+            pushed += len(batch)
+
+        if pushed:
+            logger.info(f"🔄 {pushed} souvenirs locaux synchronisés vers Supabase")
+        return pushed
+
     def _generate_embedding(self, text: str) -> Optional[List[float]]:
         """Génère un embedding pour le texte."""
         if not self.openai_client:
             return None
 
         try:
-            _response = self.openai_client.embeddings.create(
-                model="text-embedding-3-small", input=text
-            )
-            return _response.data[0].embedding
+            # embed_texts consulte le cache disque avant d'appeler OpenAI
+            return embed_texts(self.openai_client, [text])[0]
 
         except Exception as e:
             logger.error(f"❌ Erreur génération embedding: {e}")
             return None
 
+    def _generate_embeddings(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Génère les embeddings par lots ; ``None`` pour les lots en échec."""
+        if not self.openai_client:
+            return [None] * len(texts)
+        return embed_texts(self.openai_client, texts, skip_failed=True)
+
     def _calculate_similarity(
         self, embedding1: List[float], embedding2: List[float]
     ) -> float:
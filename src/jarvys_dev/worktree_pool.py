@@ -0,0 +1,396 @@
+"""Per-task git worktrees, a worker pool and a serialized commit queue.
+
+:class:`WorktreePool` runs several tasks at once, each in its own
+``git worktree`` checked out on a dedicated branch from the current
+``HEAD`` of the main checkout: workers never share a working directory
+and nothing relies on the process-global ``os.chdir``.
+
+Results reach the repository through :class:`CommitQueue`. A single
+thread commits a worktree's changes on its branch, merges the branch into
+the main checkout (``--no-ff``) and optionally pushes, one request at a
+time, so concurrent tasks cannot race on the index or on the remote. A
+conflicting merge is aborted and reported; the task branch is kept for
+inspection.
+
+Environment:
+    JARVYS_WORKTREE_DIR: parent directory of the task worktrees
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import queue
+import re
+import subprocess
+import threading
+import time
+import typing as _t
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKTREE_DIR = Path.home() / ".cache" / "jarvys" / "worktrees"
+BRANCH_PREFIX = "jarvys/task"
+GIT_TIMEOUT = 300
+
+Runner = _t.Callable[..., subprocess.CompletedProcess]
+
+
+class GitError(RuntimeError):
+    """A git command failed."""
+
+
+def _git(
+    cwd: str | Path, *args: str, runner: Runner = subprocess.run, check: bool = True
+) -> subprocess.CompletedProcess:
+    proc = runner(
+        ["git", *args],
+        cwd=str(cwd),
+        capture_output=True,
+        text=True,
+        timeout=GIT_TIMEOUT,
+    )
+    if check and proc.returncode != 0:
+        detail = (proc.stderr or proc.stdout).strip()
+        raise GitError(f"git {' '.join(args)}: {detail}")
+    return proc
+
+
+def is_git_repo(path: str | Path) -> bool:
+    """``True`` if ``path`` is inside a git work tree."""
+    try:
+        proc = _git(path, "rev-parse", "--is-inside-work-tree", check=False)
+    except (OSError, subprocess.SubprocessError):
+        return False
+    return proc.returncode == 0 and proc.stdout.strip() == "true"
+
+
+def _slug(text: str, length: int = 40) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+    return slug[:length].strip("-") or "task"
+
+
+@dataclass(frozen=True)
+class Worktree:
+    task: str
+    path: Path
+    branch: str
+    repo_dir: Path  # checkout principal dans lequel la branche est fusionnée
+
+
+class WorktreeManager:
+    """Create and remove one worktree (and branch) per task."""
+
+    def __init__(
+        self,
+        repo_dir: str | Path,
+        root: str | Path | None = None,
+        *,
+        runner: Runner = subprocess.run,
+    ) -> None:
+        self.repo_dir = Path(repo_dir).resolve()
+        if root is None:
+            digest = hashlib.sha1(str(self.repo_dir).encode()).hexdigest()[:12]
+            base = os.getenv("JARVYS_WORKTREE_DIR") or DEFAULT_WORKTREE_DIR
+            root = Path(base) / f"{self.repo_dir.name}-{digest}"
+        self.root = Path(root)
+        self.runner = runner
+        # git verrouille .git/worktrees : créations et suppressions en série
+        self._lock = threading.Lock()
+
+    def create(self, task: str) -> Worktree:
+        name = f"{_slug(task)}-{uuid.uuid4().hex[:8]}"
+        branch = f"{BRANCH_PREFIX}/{name}"
+        path = self.root / name
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            _git(
+                self.repo_dir,
+                "worktree",
+                "add",
+                "-b",
+                branch,
+                str(path),
+                "HEAD",
+                runner=self.runner,
+            )
+        logger.info("🌿 Worktree %s for task %r", path, task)
+        return Worktree(task, path, branch, self.repo_dir)
+
+    def remove(self, worktree: Worktree, *, delete_branch: bool = False) -> None:
+        with self._lock:
+            _git(
+                self.repo_dir,
+                "worktree",
+                "remove",
+                "--force",
+                str(worktree.path),
+                runner=self.runner,
+                check=False,
+            )
+            if delete_branch:
+                _git(
+                    self.repo_dir,
+                    "branch",
+                    "-D",
+                    worktree.branch,
+                    runner=self.runner,
+                    check=False,
+                )
+            _git(self.repo_dir, "worktree", "prune", runner=self.runner, check=False)
+
+
+@dataclass
+class CommitResult:
+    path: str
+    message: str
+    branch: str | None = None
+    sha: str | None = None
+    committed: bool = False
+    merged: bool = False
+    pushed: bool = False
+    conflict: bool = False
+    error: str | None = None
+    queue_wait: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def as_dict(self) -> dict[str, _t.Any]:
+        return asdict(self)
+
+
+@dataclass
+class _CommitRequest:
+    path: Path
+    message: str
+    branch: str | None
+    main_dir: Path | None
+    push: bool
+    future: Future
+    queued_at: float
+
+
+class CommitQueue:
+    """Single writer for commits, merges and pushes of every worker."""
+
+    def __init__(self, *, remote: str = "origin", runner: Runner = subprocess.run):
+        self.remote = remote
+        self.runner = runner
+        self._queue: queue.Queue[_CommitRequest | None] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self.processed = 0
+
+    def submit(
+        self,
+        path: str | Path,
+        message: str,
+        *,
+        branch: str | None = None,
+        main_dir: str | Path | None = None,
+        push: bool = False,
+    ) -> Future:
+        """Queue a commit of everything changed under ``path``.
+
+        With ``branch`` (a worktree), the commit lands on that branch and is
+        then merged into ``main_dir``; otherwise ``path`` is committed
+        directly. The future resolves to a :class:`CommitResult`.
+        """
+        future: Future = Future()
+        self._queue.put(
+            _CommitRequest(
+                Path(path),
+                message,
+                branch,
+                Path(main_dir) if main_dir else None,
+                push,
+                future,
+                time.perf_counter(),
+            )
+        )
+        self._ensure_worker()
+        return future
+
+    def commit_worktree(
+        self, worktree: Worktree, message: str, *, push: bool = False
+    ) -> Future:
+        return self.submit(
+            worktree.path,
+            message,
+            branch=worktree.branch,
+            main_dir=worktree.repo_dir,
+            push=push,
+        )
+
+    def _ensure_worker(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._worker, name="commit-queue", daemon=True
+                )
+                self._thread.start()
+
+    def _worker(self) -> None:
+        while True:
+            request = self._queue.get()
+            if request is None:
+                return
+            try:
+                result = self._process(request)
+            except Exception as exc:  # pragma: no cover - garde-fou
+                result = CommitResult(
+                    str(request.path), request.message, error=str(exc)
+                )
+            self.processed += 1
+            request.future.set_result(result)
+
+    def _process(self, request: _CommitRequest) -> CommitResult:
+        result = CommitResult(
+            str(request.path),
+            request.message,
+            branch=request.branch,
+            queue_wait=time.perf_counter() - request.queued_at,
+        )
+        git = lambda cwd, *args, check=True: _git(  # noqa: E731
+            cwd, *args, runner=self.runner, check=check
+        )
+        try:
+            git(request.path, "add", "-A")
+            staged = git(request.path, "diff", "--cached", "--quiet", check=False)
+            if staged.returncode != 0:
+                git(request.path, "commit", "-m", request.message)
+                result.committed = True
+            result.sha = git(request.path, "rev-parse", "HEAD").stdout.strip()
+
+            target = request.path
+            if request.branch and request.main_dir and result.committed:
+                target = request.main_dir
+                merge = git(
+                    target,
+                    "merge",
+                    "--no-ff",
+                    "--no-edit",
+                    "-m",
+                    f"Merge {request.branch}: {request.message}",
+                    request.branch,
+                    check=False,
+                )
+                if merge.returncode != 0:
+                    git(target, "merge", "--abort", check=False)
+                    result.conflict = True
+                    result.error = f"merge conflict on {request.branch}"
+                    logger.warning("⚠️ %s", result.error)
+                    return result
+                result.merged = True
+                result.sha = git(target, "rev-parse", "HEAD").stdout.strip()
+
+            if request.push and result.committed:
+                git(target, "push", self.remote, "HEAD")
+                result.pushed = True
+        except (GitError, OSError, subprocess.SubprocessError) as exc:
+            result.error = str(exc)
+            logger.warning("⚠️ Commit queue: %s", exc)
+        return result
+
+    def close(self, timeout: float | None = None) -> None:
+        """Process what is queued, then stop the worker."""
+        self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+@dataclass
+class TaskOutcome:
+    task: str
+    worktree: str | None
+    branch: str | None
+    duration: float
+    result: _t.Any = None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class WorktreePool:
+    """Run one task per worker, each inside its own worktree."""
+
+    def __init__(self, workers: int = 2, *, root: str | Path | None = None):
+        self.workers = max(1, workers)
+        self.root = root
+        self._managers: dict[Path, WorktreeManager] = {}
+        self._lock = threading.Lock()
+
+    def manager(self, repo_dir: str | Path) -> WorktreeManager:
+        key = Path(repo_dir).resolve()
+        with self._lock:
+            if key not in self._managers:
+                root = Path(self.root) / key.name if self.root else None
+                self._managers[key] = WorktreeManager(key, root)
+            return self._managers[key]
+
+    def run(
+        self,
+        repo_dir: str | Path,
+        tasks: _t.Sequence[str],
+        fn: _t.Callable[[str, Worktree], _t.Any],
+        *,
+        keep_branches: bool = False,
+    ) -> list[TaskOutcome]:
+        """Run ``fn(task, worktree)`` for every task; order is preserved.
+
+        Worktrees are removed afterwards. Their branches are deleted once
+        merged (``git branch -d`` semantics) unless ``keep_branches``.
+        """
+        manager = self.manager(repo_dir)
+
+        def work(task: str) -> TaskOutcome:
+            start = time.perf_counter()
+            try:
+                worktree = manager.create(task)
+            except GitError as exc:
+                return TaskOutcome(task, None, None, 0.0, error=str(exc))
+            outcome = TaskOutcome(task, str(worktree.path), worktree.branch, 0.0)
+            try:
+                outcome.result = fn(task, worktree)
+            except Exception as exc:
+                logger.error("❌ Task %r failed: %s", task, exc)
+                outcome.error = str(exc)
+            finally:
+                outcome.duration = time.perf_counter() - start
+                manager.remove(worktree)
+                if not keep_branches:
+                    # -d : seule une branche déjà fusionnée est supprimée
+                    _git(
+                        manager.repo_dir,
+                        "branch",
+                        "-d",
+                        worktree.branch,
+                        runner=manager.runner,
+                        check=False,
+                    )
+            return outcome
+
+        workers = min(self.workers, len(tasks)) or 1
+        with ThreadPoolExecutor(workers, thread_name_prefix="task") as pool:
+            return list(pool.map(work, tasks))
+
+
+__all__ = [
+    "CommitQueue",
+    "CommitResult",
+    "GitError",
+    "TaskOutcome",
+    "Worktree",
+    "WorktreeManager",
+    "WorktreePool",
+    "is_git_repo",
+]
@@ -28,6 +28,12 @@ create table if not exists jarvys_memory (
   updated_at timestamp with time zone default now()
 );
 
+-- Colonnes utilisées par JarvysInfiniteMemory (memory_infinite.py)
+alter table jarvys_memory add column if not exists agent_source text default 'JARVYS_DEV';
+alter table jarvys_memory add column if not exists user_context text default 'default';
+alter table jarvys_memory add column if not exists importance_score float default 0.5;
+alter table jarvys_memory add column if not exists tags text[] default '{}';
+
 -- JARVYS Agents Status Table
 create table if not exists jarvys_agents_status (
   id uuid default uuid_generate_v4() primary key,
@@ -72,6 +78,10 @@ create index if not exists idx_jarvys_metrics_timestamp on jarvys_metrics(timest
 create index if not exists idx_jarvys_metrics_agent on jarvys_metrics(agent_id);
 create index if not exists idx_jarvys_memory_agent on jarvys_memory(agent_id);
 create index if not exists idx_jarvys_memory_type on jarvys_memory(memory_type);
+create index if not exists idx_jarvys_memory_context_importance on jarvys_memory(user_context, importance_score desc);
+-- ANN index for recall(); cosine distance matches the `<=>` operator used below
+create index if not exists idx_jarvys_memory_embedding_hnsw on jarvys_memory
+  using hnsw (embedding vector_cosine_ops) with (m = 16, ef_construction = 64);
 create index if not exists idx_jarvys_agents_status_agent on jarvys_agents_status(agent_id);
 create index if not exists idx_jarvys_tasks_status on jarvys_tasks(status);
 create index if not exists idx_jarvys_tasks_agent on jarvys_tasks(assigned_agent);
@@ -133,6 +143,63 @@ begin
 end;
 $$ language plpgsql;
 
+-- Function for semantic recall (JarvysInfiniteMemory.recall)
+-- Filters and distance ordering run server-side on the HNSW index. Iterative
+-- scans (pgvector >= 0.8) keep returning rows when filters discard candidates;
+-- strict_order keeps results in exact distance order. The setting is applied
+-- at call time and skipped on older pgvector, where the parameter does not
+-- exist (a SET clause on the function would fail at creation).
+create or replace function match_jarvys_memory(
+  query_embedding vector(1536),
+  user_ctx text,
+  memory_types text[] default null,
+  min_importance float default 0,
+  match_count int default 10
+)
+returns table (
+  id uuid,
+  content text,
+  agent_source text,
+  memory_type text,
+  user_context text,
+  importance_score float,
+  tags text[],
+  metadata jsonb,
+  created_at timestamp with time zone,
+  similarity float
+)
+language plpgsql stable
+set hnsw.ef_search = 100
+as $$
+begin
+  begin
+    perform set_config('hnsw.iterative_scan', 'strict_order', true);
+  exception when others then
+    null; -- pgvector < 0.8
+  end;
+
+  return query
+  select
+    jm.id,
+    jm.content,
+    jm.agent_source,
+    jm.memory_type,
+    jm.user_context,
+    jm.importance_score,
+    jm.tags,
+    jm.metadata,
+    jm.created_at,
+    1 - (jm.embedding <=> query_embedding) as similarity
+  from jarvys_memory jm
+  where jm.user_context = user_ctx
+    and jm.importance_score >= min_importance
+    and (memory_types is null or jm.memory_type = any(memory_types))
+    and jm.embedding is not null
+  order by jm.embedding <=> query_embedding
+  limit match_count;
+end;
+$$;
+
 -- Function to get dashboard data
 create or replace function get_dashboard_data()
 returns jsonb as $$
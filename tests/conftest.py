@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _no_local_state(monkeypatch):
+    """Keep tests away from the user's on-disk caches, memory and stats."""
+    monkeypatch.setenv("JARVYS_EMBEDDING_CACHE", "off")
+    monkeypatch.setenv("JARVYS_LOCAL_MEMORY", "off")
+    monkeypatch.setenv("JARVYS_PERF_STATS", "off")
@@ -0,0 +1,123 @@
+import types
+
+import pytest
+
+from jarvys_dev import client_registry
+from jarvys_dev.client_registry import ClientRegistry, is_transient_error, retry_call
+
+
+class FakeSDK:
+    def __init__(self, api_key=None, timeout=None, max_retries=None, http_client=None):
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.http_client = http_client
+
+
+def test_clients_are_built_once_and_share_the_pool():
+    registry = ClientRegistry(connect_timeout=2, read_timeout=30, max_retries=4)
+    first = registry.openai("k", FakeSDK)
+    assert registry.openai("k", FakeSDK) is first
+    assert registry.openai("other", FakeSDK) is not first
+
+    claude = registry.anthropic("k", FakeSDK)
+    assert claude is not first  # clé par provider
+    assert first.http_client is claude.http_client is registry.httpx_client()
+    assert first.max_retries == 4
+    assert first.timeout.connect == 2 and first.timeout.read == 30
+    # async : pas de pool partagé (lié à la boucle d'événements)
+    assert registry.async_openai("k", FakeSDK).http_client is None
+
+
+def test_async_clients_are_cached_per_event_loop():
+    import asyncio
+
+    registry = ClientRegistry()
+
+    async def get_twice():
+        first = registry.async_anthropic("k", FakeSDK)
+        assert registry.async_anthropic("k", FakeSDK) is first
+        return first
+
+    first = asyncio.run(get_twice())
+    second = asyncio.run(get_twice())
+    assert first is not second  # nouvelle boucle : nouveau pool
+    assert registry.async_openai("k", FakeSDK) is not first  # hors boucle
+
+
+def test_factories_only_receive_supported_options():
+    registry = ClientRegistry()
+    client = registry.openai("k", lambda api_key=None: types.SimpleNamespace(k=api_key))
+    assert client.k == "k"
+
+
+def test_http_session_has_default_timeout_and_retries():
+    registry = ClientRegistry(connect_timeout=1, read_timeout=9, max_retries=2)
+    session = registry.http_session()
+    assert registry.http_session() is session
+    assert session.default_timeout == (1, 9)
+    retry = session.get_adapter("https://api.x.ai").max_retries
+    assert retry.total == 2 and 429 in retry.status_forcelist
+    # POST non rejoué sur 5xx (double facturation possible)
+    assert "POST" not in retry.allowed_methods
+
+
+def test_http_session_builds_with_urllib3_1x_retry(monkeypatch):
+    class LegacyRetry(client_registry.Retry):
+        # signature de urllib3 1.26 : ni backoff_max ni backoff_jitter
+        def __init__(
+            self,
+            total=10,
+            backoff_factor=0,
+            status_forcelist=None,
+            raise_on_status=True,
+            **kwargs,
+        ):
+            if {"backoff_max", "backoff_jitter"} & kwargs.keys():
+                raise TypeError("unexpected keyword argument")
+            super().__init__(
+                total=total,
+                backoff_factor=backoff_factor,
+                status_forcelist=status_forcelist,
+                raise_on_status=raise_on_status,
+                **kwargs,
+            )
+
+    monkeypatch.setattr(client_registry, "Retry", LegacyRetry)
+    session = ClientRegistry(max_retries=2).http_session()
+    retry = session.get_adapter("https://api.openai.com").max_retries
+    assert isinstance(retry, LegacyRetry) and retry.total == 2
+
+
+def test_retry_call_retries_transient_errors_with_backoff(monkeypatch):
+    delays, calls = [], []
+    monkeypatch.setattr(client_registry.random, "uniform", lambda a, b: b)
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ConnectionError("reset")
+        return "ok"
+
+    assert retry_call(flaky, retries=3, sleep=delays.append) == "ok"
+    assert delays == [0.5, 1.0]
+
+    with pytest.raises(ValueError):
+        retry_call(
+            lambda: (_ for _ in ()).throw(ValueError("bad")), sleep=delays.append
+        )
+    assert len(delays) == 2  # erreur non transitoire : pas de retry
+
+
+def test_transient_error_classification():
+    class Throttled(Exception):
+        status_code = 429
+
+    class GrpcError(Exception):
+        def code(self):
+            return types.SimpleNamespace(name="UNAVAILABLE")
+
+    assert is_transient_error(Throttled())
+    assert is_transient_error(GrpcError())
+    assert is_transient_error(TimeoutError())
+    assert not is_transient_error(KeyError("x"))
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from jarvys_ai.command_queue import CommandQueue, CommandQueueFull
+
+
+async def _echo(label, delay, log):
+    await asyncio.sleep(delay)
+    log.append(label)
+    return label
+
+
+def test_priority_order_and_metrics():
+    async def scenario():
+        queue = CommandQueue(workers=1)
+        log = []
+        # la file se remplit avant que l'unique worker ne démarre
+        items = [
+            await queue.enqueue(_echo, "low-1", 0, log, priority="low"),
+            await queue.enqueue(_echo, "medium", 0, log, priority="medium"),
+            await queue.enqueue(_echo, "low-2", 0, log, priority="low"),
+            await queue.enqueue(_echo, "high", 0.01, log, priority="high"),
+        ]
+        queue.start()
+        results = await asyncio.gather(*(item.future for item in items))
+        stats = queue.get_stats()
+        await queue.close()
+        return log, results, stats
+
+    log, results, stats = asyncio.run(scenario())
+    assert log == ["high", "medium", "low-1", "low-2"]
+    assert results == ["low-1", "medium", "low-2", "high"]
+    assert stats["completed"] == 4 and stats["queued"] == 0
+    assert stats["by_priority"]["low"]["count"] == 2
+    assert stats["by_priority"]["high"]["avg_service_ms"] >= 10
+    assert stats["by_priority"]["low"]["max_queue_wait_ms"] >= 10
+    assert {"queue_wait_ms", "service_ms"} <= stats["recent"][0].keys()
+
+
+def test_backpressure_and_cancellation():
+    async def scenario():
+        queue = CommandQueue(workers=1, maxsize=1, submit_timeout=0.05)
+        queue.start()
+        log = []
+        running = await queue.enqueue(_echo, "slow", 10, log)
+        await asyncio.sleep(0.01)  # prise par le worker
+        queued = await queue.enqueue(_echo, "queued", 0, log)
+        with pytest.raises(CommandQueueFull):
+            await queue.enqueue(_echo, "rejected", 0, log)
+
+        assert queue.cancel(queued.id)
+        assert queue.cancel(running.id)
+        after = await queue.submit(_echo, "after", 0, log)
+        stats = queue.get_stats()
+        await queue.close()
+        return log, after, running, stats
+
+    log, after, running, stats = asyncio.run(scenario())
+    assert log == ["after"] and after == "after"
+    assert running.task.cancelled()
+    assert stats["cancelled"] == 2 and stats["rejected"] == 1
+    assert stats["completed"] == 1 and stats["running"] is True
+
+
+def test_failures_are_reported_to_the_caller():
+    async def boom():
+        raise ValueError("boom")
+
+    async def scenario():
+        queue = CommandQueue(workers=2)
+        queue.start()
+        with pytest.raises(ValueError):
+            await queue.submit(boom, priority="unknown")
+        stats = queue.get_stats()
+        await queue.close()
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert stats["failed"] == 1 and stats["by_priority"]["low"]["count"] == 1
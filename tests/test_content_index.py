@@ -0,0 +1,131 @@
+import asyncio
+import os
+import sqlite3
+import threading
+
+from jarvys_ai.extensions import content_index
+from jarvys_ai.extensions.content_index import ContentIndex
+from jarvys_ai.extensions.file_manager import FileManager
+
+
+def _files(root):
+    return [
+        (str(p), p.stat().st_size, p.stat().st_mtime)
+        for p in root.rglob("*")
+        if p.is_file()
+    ]
+
+
+def _corpus(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "cr.md").write_text(
+        "Compte rendu : la Réunion avec le client Acme a validé le budget."
+    )
+    (docs / "budget.txt").write_text("budget budget budget, rien d'autre")
+    (docs / "code.py").write_text("def deploy():\n    return 'serveur'\n")
+    (docs / "image.png").write_bytes(b"\x89PNG\0\0budget")
+    for i in range(4):
+        (docs / f"note_{i}.txt").write_text(f"note {i} sans rapport")
+    return docs
+
+
+def test_bm25_ranking_snippets_and_accent_folding(tmp_path):
+    docs = _corpus(tmp_path)
+    index = ContentIndex(tmp_path / "content.db", workers=2)  # pool de processus
+    assert index.sync(_files(docs))["indexed"] == 7  # .png ignoré
+
+    hits = index.search("reunion acme")
+    assert [h["name"] for h in hits] == ["cr.md"]
+    assert "Réunion avec le client Acme" in hits[0]["snippet"]
+
+    ranked = [h["name"] for h in index.search("budget")]
+    assert ranked == ["budget.txt", "cr.md"]  # tf plus élevé, document plus court
+    assert index.search("serveur")[0]["name"] == "code.py"
+    assert index.search("introuvable") == []
+
+
+def test_sync_only_reads_changed_files_and_persists(tmp_path):
+    docs = _corpus(tmp_path)
+    index = ContentIndex(tmp_path / "content.db", workers=1)
+    index.sync(_files(docs))
+    assert index.sync(_files(docs))["indexed"] == 0
+
+    cr = docs / "cr.md"
+    cr.write_text("Nouvelle version : le projet quantique démarre.")
+    os.utime(cr, (1, 1))
+    (docs / "budget.txt").unlink()
+    stats = index.sync(_files(docs))
+    assert (stats["indexed"], stats["removed"]) == (1, 1)
+    index.close()
+
+    reopened = ContentIndex(tmp_path / "content.db", workers=1)
+    assert reopened.search("acme") == [] and reopened.search("budget") == []
+    assert reopened.search("quantique")[0]["name"] == "cr.md"
+    orphans = reopened._conn.execute(
+        "SELECT COUNT(*) FROM postings WHERE doc_id NOT IN (SELECT id FROM docs)"
+    ).fetchone()[0]
+    assert orphans == 0
+
+
+def test_sync_commits_each_batch_before_analysing_the_next(tmp_path, monkeypatch):
+    docs = _corpus(tmp_path)
+    db = tmp_path / "content.db"
+    committed = []
+    analyze = content_index.analyze_file
+
+    def tracking_analyze(path):
+        # connexion séparée : ne voit que les lots déjà validés
+        with sqlite3.connect(db) as conn:
+            committed.append(conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0])
+        return analyze(path)
+
+    monkeypatch.setattr(content_index, "SYNC_BATCH", 3)
+    monkeypatch.setattr(content_index, "analyze_file", tracking_analyze)
+    index = ContentIndex(db, workers=1)
+    assert index.sync(_files(docs))["indexed"] == 7
+    assert committed == [0, 0, 0, 3, 3, 3, 6]
+    assert [h["name"] for h in index.search("reunion acme")] == ["cr.md"]
+
+
+def test_file_manager_search_includes_content_matches(tmp_path):
+    docs = _corpus(tmp_path)
+    manager = FileManager(
+        {
+            "working_dirs": {"documents": docs},
+            "file_index_path": tmp_path / "index.db",
+            "content_index_path": tmp_path / "content.db",
+            "content_index_workers": 1,
+        }
+    )
+    asyncio.run(manager._build_file_index())
+    reply = asyncio.run(manager.process_command("chercher acme"))
+    assert "Dans le contenu" in reply and "cr.md" in reply
+    assert "client Acme" in reply
+
+
+def test_content_search_does_not_block_the_event_loop(tmp_path):
+    docs = _corpus(tmp_path)
+    manager = FileManager(
+        {
+            "working_dirs": {"documents": docs},
+            "file_index_path": tmp_path / "index.db",
+            "content_index_path": tmp_path / "content.db",
+            "content_index_workers": 1,
+        }
+    )
+    asyncio.run(manager._build_file_index())
+
+    async def scenario():
+        # une synchronisation en cours tient le verrou de l'index de contenu
+        manager.content_index._lock.acquire()
+        threading.Timer(0.2, manager.content_index._lock.release).start()
+        command = asyncio.create_task(manager.process_command("chercher acme"))
+        ticks = 0
+        while not command.done():
+            await asyncio.sleep(0.01)
+            ticks += 1
+        return ticks, command.result()
+
+    ticks, reply = asyncio.run(scenario())
+    assert ticks >= 5 and "cr.md" in reply
@@ -0,0 +1,173 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from jarvys_dev import cycle_scheduler
+from jarvys_dev.cycle_scheduler import (
+    CycleEvent,
+    CycleScheduler,
+    FailingTestsSource,
+    FileEventSource,
+    GitHubIssueSource,
+    MemoryPatternSource,
+    append_event,
+)
+
+
+def test_file_source_reads_only_complete_new_lines(tmp_path):
+    path = tmp_path / "events.jsonl"
+    append_event("command", {"task": "old"}, path=path)
+    source = FileEventSource(path)  # les événements antérieurs sont ignorés
+    assert source.poll() == []
+
+    append_event("command", {"task": "deploy"}, path=path)
+    with open(path, "a") as fh:
+        fh.write('{"kind": "issue", "payload"')  # ligne en cours d'écriture
+    events = source.poll()
+    assert [e.payload["task"] for e in events] == ["deploy"]
+    assert events[0].priority == 0
+
+    with open(path, "a") as fh:
+        fh.write(': {"task": "t"}}\nnot json\n')
+    assert [e.kind for e in source.poll()] == ["issue"]
+
+
+def test_queue_orders_by_priority_and_coalesces_keys():
+    scheduler = CycleScheduler(lambda e: None, [])
+    scheduler.submit(CycleEvent.make("proactive", key="proactive"))
+    scheduler.submit(CycleEvent.make("issue", {"task": "a"}, key="issue:1"))
+    scheduler.submit(CycleEvent.make("command", {"task": "b"}))
+    scheduler.submit(CycleEvent.make("issue", {"task": "a2"}, key="issue:1"))
+    scheduler.submit(CycleEvent.make("issue", {"task": "x"}, key="issue:2"))
+    scheduler.submit(CycleEvent.make("command", {"task": "now"}, key="issue:2"))
+
+    order = []
+    while (event := scheduler._pop()) is not None:
+        order.append((event.kind, event.payload["task"] if event.payload else None))
+    assert order == [
+        ("command", "b"),
+        ("command", "now"),  # priorité relevée par la fusion
+        ("issue", "a2"),
+        ("proactive", None),
+    ]
+    assert scheduler.stats.coalesced == 2
+
+
+def test_run_processes_file_events_with_bounded_concurrency(tmp_path):
+    path = tmp_path / "events.jsonl"
+    source = FileEventSource(path)
+    active, peak, handled = [0], [0], []
+    lock = threading.Lock()
+
+    def handler(event):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+            handled.append(event.payload["task"])
+
+    for i in range(6):
+        append_event("command", {"task": f"t{i}"}, path=path)
+    scheduler = CycleScheduler(
+        handler, [source], max_concurrency=2, idle_min=0.01, idle_max=0.05
+    )
+    stats = scheduler.run(max_cycles=6)
+    assert sorted(handled) == [f"t{i}" for i in range(6)]
+    assert peak[0] == 2
+    assert stats.processed == 6 and stats.failed == 0
+
+
+def test_idle_backoff_grows_until_stop(monkeypatch):
+    waits, clock = [], [0.0]
+    monkeypatch.setattr(cycle_scheduler.time, "monotonic", lambda: clock[0])
+    scheduler = CycleScheduler(
+        lambda e: None, [], idle_min=0.01, idle_max=0.04, idle_factor=2
+    )
+
+    def recording_wait(timeout):
+        waits.append(timeout)
+        clock[0] += timeout
+        if len(waits) == 5:
+            scheduler.stop()
+        return False
+
+    scheduler._wake.wait = recording_wait
+    stats = scheduler.run()
+    assert waits == [0.01, 0.02, 0.04, 0.04, 0.04]
+    assert stats.idle_waits == 5
+
+
+def test_submit_and_cheap_sources_cut_the_idle_backoff_short(tmp_path):
+    path = tmp_path / "events.jsonl"
+    handled = []
+    scheduler = CycleScheduler(
+        lambda e: handled.append(e.payload["task"]),
+        [FileEventSource(path)],
+        idle_min=60,
+        idle_max=1800,
+        local_poll_interval=0.05,
+    )
+    runner = threading.Thread(target=scheduler.run, kwargs={"max_cycles": 2})
+    runner.start()
+    time.sleep(0.1)  # boucle en attente (backoff de 60 s)
+    start = time.monotonic()
+    scheduler.submit(CycleEvent.make("command", {"task": "direct"}))
+    while len(handled) < 1 and time.monotonic() - start < 5:
+        time.sleep(0.01)
+    append_event("command", {"task": "file"}, path=path)
+    runner.join(timeout=5)
+    assert not runner.is_alive()
+    assert handled == ["direct", "file"]
+    assert time.monotonic() - start < 2
+
+
+def test_handler_failure_is_counted():
+    scheduler = CycleScheduler(lambda e: 1 / 0, [], idle_min=0.01)
+    scheduler.submit(CycleEvent.make("command", {"task": "x"}))
+    stats = scheduler.run(max_cycles=1)
+    assert stats.failed == 1 and stats.processed == 1
+
+
+def test_failing_tests_source_reports_new_failures(tmp_path):
+    cache = tmp_path / ".pytest_cache" / "v" / "cache"
+    cache.mkdir(parents=True)
+    lastfailed = cache / "lastfailed"
+    lastfailed.write_text(json.dumps({"tests/test_a.py::test_old": True}))
+    source = FailingTestsSource(tmp_path, interval=0)
+    assert source.poll() == []
+
+    lastfailed.write_text(
+        json.dumps({"tests/test_a.py::test_old": True, "tests/test_b.py::t": True})
+    )
+    future = time.time() + 5
+    os.utime(lastfailed, (future, future))
+    events = source.poll()
+    assert [e.payload["test"] for e in events] == ["tests/test_b.py::t"]
+
+
+def test_memory_pattern_source_fires_on_change():
+    patterns = [{"summary": "a"}, {"summary": "a"}, {"summary": "b"}]
+    source = MemoryPatternSource(lambda: patterns.pop(0), interval=0)
+    assert source.poll() == []  # référence
+    assert source.poll() == []
+    assert [e.kind for e in source.poll()] == ["memory_pattern"]
+
+
+def test_github_issue_source_only_reports_updates():
+    now = datetime.now(timezone.utc)
+    issues = [
+        SimpleNamespace(title="new bug", number=7, updated_at=now + timedelta(1)),
+        SimpleNamespace(title="stale", number=3, updated_at=now - timedelta(1)),
+    ]
+    repo = SimpleNamespace(
+        full_name="o/r", get_issues=lambda state, since: list(issues)
+    )
+    source = GitHubIssueSource(repo, interval=0)
+    events = source.poll()
+    assert [(e.kind, e.key) for e in events] == [("issue", "issue:o/r#7")]
+    assert source.poll() == []
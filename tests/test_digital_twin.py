@@ -0,0 +1,58 @@
+import asyncio
+import json
+
+from jarvys_ai.digital_twin import DigitalTwin
+from jarvys_ai.interaction_log import InteractionLog
+
+
+def test_log_appends_lines_and_compacts(tmp_path):
+    log = InteractionLog(tmp_path / "h.jsonl", max_entries=3, compact_ratio=2)
+    for i, category in enumerate(["email", "file", "email", "cloud", "email"]):
+        log.append({"id": i, "category": category, "sentiment": "neutral"})
+
+    lines = (tmp_path / "h.jsonl").read_text().splitlines()
+    assert len(lines) == 5 and log.compactions == 0
+    # compteurs limités à la fenêtre conservée
+    assert [e["id"] for e in log.entries] == [2, 3, 4]
+    assert log.categories == {"email": 2, "cloud": 1}
+    assert log.most_common_category() == "email"
+
+    log.append({"id": 5, "category": "cloud", "sentiment": "positive"})
+    log.append({"id": 6, "category": "cloud", "sentiment": "positive"})
+    assert log.compactions == 1 and log.lines_on_disk == 3
+    log.close()
+
+    # ligne tronquée ignorée au rechargement
+    with open(tmp_path / "h.jsonl", "a") as f:
+        f.write('{"id": 7, "categ')
+    reloaded = InteractionLog(tmp_path / "h.jsonl", max_entries=3)
+    assert reloaded.load() == 3
+    assert [e["id"] for e in reloaded.recent(2)] == [5, 6]
+    assert reloaded.sentiments == {"positive": 2, "neutral": 1}
+
+
+def test_digital_twin_migrates_history_and_debounces_profile(tmp_path):
+    legacy = [{"id": "old", "category": "file", "sentiment": "neutral"}]
+    (tmp_path / "interaction_history.json").write_text(json.dumps(legacy))
+
+    async def scenario():
+        twin = DigitalTwin({"data_dir": str(tmp_path), "profile_flush_delay": 0.05})
+        await twin.initialize()
+        writes = twin.profile_writes  # profil par défaut créé
+        for _ in range(3):
+            await twin.update_interaction("envoie un email, merci", "ok", "text")
+        assert twin.profile_writes == writes  # rien d'écrit pendant la rafale
+        await asyncio.sleep(0.15)
+        assert twin.profile_writes == writes + 1
+        await twin.save_state()
+        return twin
+
+    twin = asyncio.run(scenario())
+    context = twin.get_user_context()
+    assert context["total_interactions"] == 4
+    assert context["most_used_category"] == "email"
+    assert twin.preferences["email_usage"] == 3
+    saved = json.loads((tmp_path / "user_profile.json").read_text())
+    assert saved["preferences"]["email_usage"] == 3
+    lines = (tmp_path / "interaction_history.jsonl").read_text().splitlines()
+    assert json.loads(lines[0])["id"] == "old" and len(lines) == 4
@@ -0,0 +1,37 @@
+from unittest import mock
+
+from jarvys_dev.tools import embeddings
+from jarvys_dev.tools.embedding_cache import EmbeddingCache
+
+
+def test_cache_roundtrip_and_lru_eviction(tmp_path):
+    cache = EmbeddingCache(tmp_path / "emb.sqlite", max_entries=2)
+    cache.put("m", "a", [0.5, 1.0])
+    cache.put("m", "b", [2.0])
+    assert cache.get("m", "a") == [0.5, 1.0]  # "a" is now most recent
+    assert cache.get("other-model", "a") is None
+
+    cache.put("m", "c", [3.0])
+    assert cache.get("m", "b") is None
+    assert cache.get("m", "c") == [3.0]
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 2
+    assert stats["evictions"] == 1
+
+    reopened = EmbeddingCache(tmp_path / "emb.sqlite", max_entries=2)
+    assert reopened.get("m", "c") == [3.0]
+
+
+def test_embed_texts_only_requests_uncached_texts(tmp_path, monkeypatch):
+    monkeypatch.setenv("JARVYS_EMBEDDING_CACHE", str(tmp_path / "emb.sqlite"))
+    client = mock.Mock()
+    client.embeddings.create.side_effect = lambda model, input: mock.Mock(
+        data=[mock.Mock(embedding=[float(len(t))]) for t in input]
+    )
+
+    assert embeddings.embed_texts(client, ["a", "bb"]) == [[1.0], [2.0]]
+    assert embeddings.embed_texts(client, ["bb", "ccc"]) == [[2.0], [3.0]]
+
+    inputs = [c.kwargs["input"] for c in client.embeddings.create.call_args_list]
+    assert inputs == [["a", "bb"], ["ccc"]]
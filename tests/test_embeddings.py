@@ -0,0 +1,93 @@
+from unittest import mock
+
+from jarvys_dev.prompt_budget import count_tokens
+from jarvys_dev.tools import embeddings
+
+
+def _resp(inputs):
+    return mock.Mock(data=[mock.Mock(embedding=[float(len(t))]) for t in inputs])
+
+
+def test_chunk_texts_respects_token_and_item_limits():
+    texts = ["a" * 400] * 5
+    per_text = count_tokens(texts[0])
+    assert embeddings.chunk_texts(texts, max_tokens=2 * per_text + 1) == [
+        [0, 1],
+        [2, 3],
+        [4],
+    ]
+    assert embeddings.chunk_texts(texts, max_items=3) == [[0, 1, 2], [3, 4]]
+
+
+def test_embed_texts_batches_and_retries_failed_chunk(monkeypatch):
+    monkeypatch.setattr(embeddings, "MAX_BATCH_ITEMS", 2)
+    monkeypatch.setattr(embeddings.time, "sleep", lambda _: None)
+    client = mock.Mock()
+    calls = []
+
+    def create(model, input):
+        calls.append(list(input))
+        if len(calls) == 2:
+            raise RuntimeError("rate limited")
+        return _resp(input)
+
+    client.embeddings.create.side_effect = create
+    out = embeddings.embed_texts(client, ["a", "bb", "ccc"])
+
+    assert out == [[1.0], [2.0], [3.0]]
+    # 2 chunks + 1 retry of the failing second chunk
+    assert calls == [["a", "bb"], ["ccc"], ["ccc"]]
+
+
+def test_embed_texts_skip_failed_returns_none(monkeypatch):
+    monkeypatch.setattr(embeddings.time, "sleep", lambda _: None)
+    client = mock.Mock()
+    client.embeddings.create.side_effect = RuntimeError("down")
+    assert embeddings.embed_texts(client, ["a"], skip_failed=True) == [None]
+
+
+def test_memorize_many_bulk_inserts(monkeypatch):
+    from jarvys_dev.tools.memory_infinite import JarvysInfiniteMemory
+
+    memory = JarvysInfiniteMemory.__new__(JarvysInfiniteMemory)
+    memory.agent_name = "JARVYS_DEV"
+    memory.user_context = "test"
+    memory.openai_client = mock.Mock()
+    memory.openai_client.embeddings.create.side_effect = lambda model, input: _resp(
+        input
+    )
+    memory.supabase = mock.Mock()
+    memory.local_store = None
+    insert = memory.supabase.table.return_value.insert
+    insert.return_value.execute.side_effect = lambda: mock.Mock(data=[{}, {}])
+
+    saved = memory.memorize_many(
+        ["a", {"content": "bb", "memory_type": "knowledge", "tags": ["x"]}]
+    )
+
+    assert saved == 2
+    memory.openai_client.embeddings.create.assert_called_once()
+    rows = insert.call_args.args[0]
+    assert [r["memory_type"] for r in rows] == ["experience", "knowledge"]
+    assert rows[1]["tags"] == ["x"]
+
+
+def test_upsert_embeddings_returns_only_saved_ids(monkeypatch):
+    from jarvys_dev.tools import memory
+
+    monkeypatch.setattr(memory, "_UPSERT_BATCH", 2)
+    monkeypatch.setattr(memory, "_load_config", lambda: None)
+    monkeypatch.setattr(memory, "_embed_many", lambda texts: [[1.0]] * len(texts))
+    monkeypatch.setattr(embeddings.time, "sleep", lambda _: None)
+
+    def upsert(rows, on_conflict):
+        if rows[0]["id"] == "c":  # le deuxième lot échoue à chaque tentative
+            raise RuntimeError("down")
+        return mock.Mock()
+
+    sb = mock.Mock()
+    sb.table.return_value.upsert.side_effect = upsert
+    monkeypatch.setattr(memory, "_sb", sb)
+
+    saved = memory.upsert_embeddings([("x", "a"), ("y", "b"), ("z", "c")])
+    assert saved == ["a", "b"]
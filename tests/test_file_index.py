@@ -0,0 +1,105 @@
+import asyncio
+import os
+import threading
+
+from jarvys_ai.extensions.file_index import FileIndex
+from jarvys_ai.extensions.file_manager import FileManager
+
+
+def _tree(tmp_path):
+    docs = tmp_path / "docs"
+    for sub in ("clients/a", "clients/b"):
+        (docs / sub).mkdir(parents=True)
+    (docs / "clients/a/Budget_2024.xlsx").write_text("a")
+    (docs / "clients/b/Budget_2024.xlsx").write_text("bb")
+    (docs / "rapport.pdf").write_text("pdf")
+    (docs / "node_modules").mkdir()
+    (docs / "node_modules/budget.js").write_text("ignored")
+    return docs
+
+
+def test_duplicates_substring_and_fuzzy_search(tmp_path):
+    docs = _tree(tmp_path)
+    index = FileIndex(tmp_path / "index.db")
+    assert index.refresh({"documents": docs})["added"] == 3
+
+    hits = index.search("dget_20")
+    assert [h["name"] for h in hits] == ["Budget_2024.xlsx"] * 2
+    assert len({h["path"] for h in hits}) == 2  # même nom, deux fichiers
+    assert [h["name"] for h in index.search("pd")] == ["rapport.pdf"]
+
+    fuzzy = index.search("budjet")  # faute de frappe
+    assert fuzzy and fuzzy[0]["name"] == "Budget_2024.xlsx"
+    assert 0.6 <= fuzzy[0]["score"] < 1
+    assert index.search("zzqqxx") == []
+
+
+def test_refresh_only_applies_deltas_and_persists(tmp_path):
+    docs = _tree(tmp_path)
+    index = FileIndex(tmp_path / "index.db")
+    index.refresh({"documents": docs})
+
+    assert index.refresh({"documents": docs}) == {
+        **index.last_refresh,
+        "added": 0,
+        "updated": 0,
+        "removed": 0,
+    }
+
+    report = docs / "rapport.pdf"
+    report.write_text("longer content")
+    os.utime(report, (1, 1))
+    (docs / "clients/a/Budget_2024.xlsx").unlink()
+    (docs / "notes.md").write_text("n")
+    stats = index.refresh({"documents": docs})
+    assert (stats["added"], stats["updated"], stats["removed"]) == (1, 1, 1)
+    index.close()
+
+    reopened = FileIndex(tmp_path / "index.db")
+    assert len(reopened) == 3
+    assert [h["path"] for h in reopened.search("budget")] == [
+        str(docs / "clients/b/Budget_2024.xlsx")
+    ]
+    assert reopened.search("rapport")[0]["size"] == len("longer content")
+
+
+def test_file_manager_search_uses_index(tmp_path):
+    docs = _tree(tmp_path)
+    manager = FileManager(
+        {
+            "working_dirs": {"documents": docs},
+            "file_index_path": tmp_path / "index.db",
+            "content_index_path": tmp_path / "content.db",
+        }
+    )
+    asyncio.run(manager._build_file_index())
+    reply = asyncio.run(manager.process_command("chercher budget"))
+    assert "(2 fichiers)" in reply
+    assert str(docs / "clients/a") in reply and str(docs / "clients/b") in reply
+    assert manager.get_stats()["indexed_files"] == 3
+
+
+def test_index_search_does_not_block_the_event_loop(tmp_path):
+    docs = _tree(tmp_path)
+    manager = FileManager(
+        {
+            "working_dirs": {"documents": docs},
+            "file_index_path": tmp_path / "index.db",
+            "content_index_path": tmp_path / "content.db",
+        }
+    )
+    asyncio.run(manager._build_file_index())
+
+    async def scenario():
+        # un rafraîchissement en cours tient le verrou de l'index
+        manager.file_index._lock.acquire()
+        threading.Timer(0.2, manager.file_index._lock.release).start()
+        search = asyncio.create_task(manager._search_files("budget"))
+        ticks = 0
+        while not search.done():
+            await asyncio.sleep(0.01)
+            ticks += 1
+        return ticks, search.result()
+
+    ticks, results = asyncio.run(scenario())
+    assert ticks >= 5 and len(results) == 2
@@ -0,0 +1,115 @@
+import subprocess
+
+from jarvys_dev.incremental_lint import IncrementalLinter, default_manifest_path
+
+
+class FakeRunner:
+    def __init__(self):
+        self.calls = []
+        self.ruff_output = ""
+
+    def __call__(self, args, **kwargs):
+        self.calls.append(list(args))
+        if args[0] == "ruff" and self.ruff_output:
+            return subprocess.CompletedProcess(args, 1, self.ruff_output, "")
+        return subprocess.CompletedProcess(args, 0, "", "")
+
+    def tools(self):
+        return [call[0] if call[0] != "poetry" else call[1] for call in self.calls]
+
+
+def _linter(root, manifest, runner):
+    return IncrementalLinter(root, manifest, prefix=(), runner=runner)
+
+
+def test_only_changed_files_are_linted(tmp_path):
+    root, manifest = tmp_path / "repo", tmp_path / "manifest.json"
+    (root / "pkg").mkdir(parents=True)
+    (root / "pkg" / "a.py").write_text("a = 1\n")
+    (root / "pkg" / "b.py").write_text("b = 1\n")
+    (root / "README.md").write_text("# doc\n")
+    (root / ".git").mkdir()
+    (root / ".git" / "x.py").write_text("ignored\n")
+
+    runner = FakeRunner()
+    report = _linter(root, manifest, runner).run()
+    assert sorted(report.files_linted) == ["README.md", "pkg/a.py", "pkg/b.py"]
+    assert runner.calls[0][-2:] == ["pkg/a.py", "pkg/b.py"]  # ruff : .py seulement
+
+    (root / "pkg" / "b.py").write_text("b = 2\n")
+    runner = FakeRunner()
+    report = _linter(root, manifest, runner).run()  # manifeste rechargé
+    assert report.files_linted == ["pkg/b.py"]
+    assert runner.tools() == ["ruff", "black"]
+    assert runner.calls[0][-1] == "pkg/b.py"
+
+    runner = FakeRunner()
+    report = _linter(root, manifest, runner).run()
+    assert report.files_linted == [] and runner.calls == []
+    assert report.files_total == 3
+
+
+def test_files_with_remaining_errors_are_rechecked(tmp_path):
+    root = tmp_path / "repo"
+    root.mkdir()
+    (root / "good.py").write_text("x = 1\n")
+    (root / "bad.py").write_text("import os\n")
+    runner = FakeRunner()
+    runner.ruff_output = "bad.py:1:8: F401 [*] `os` imported but unused\n"
+    linter = _linter(root, tmp_path / "m.json", runner)
+    report = linter.run()
+    assert report.files_failing == ["bad.py"] and not report.clean
+
+    runner.ruff_output = ""
+    assert linter.run().files_linted == ["bad.py"]
+
+
+def test_time_saved_counts_only_files_each_tool_handles(tmp_path):
+    root = tmp_path / "repo"
+    root.mkdir()
+    for name in ("a.py", "b.py", "README.md", "ci.yaml"):
+        (root / name).write_text("x = 1\n")
+    linter = _linter(root, tmp_path / "m.json", FakeRunner())
+    linter.run()
+    linter.manifest["costs"] = {"ruff": 1.0, "black": 1.0}
+
+    (root / "b.py").write_text("x = 2\n")
+    report = linter.run()
+    # a.py seul est épargné à ruff et black ; le .md et le .yaml ne comptent pas
+    assert report.files_linted == ["b.py"]
+    assert 1.4 <= report.time_saved <= 2.0
+
+
+def test_poetry_install_only_when_lock_changes(tmp_path):
+    root = tmp_path / "repo"
+    root.mkdir()
+    (root / "poetry.lock").write_text("v1")
+    runner = FakeRunner()
+    linter = IncrementalLinter(
+        root, tmp_path / "m.json", prefix=("poetry", "run"), runner=runner
+    )
+    assert linter.run().install_ran
+    assert runner.calls == [["poetry", "install", "--with", "dev"]]
+
+    report = linter.run()
+    assert not report.install_ran and report.time_saved >= 0
+    (root / "poetry.lock").write_text("v2")
+    assert linter.run().install_ran
+
+
+def test_config_change_resets_manifest(tmp_path):
+    root = tmp_path / "repo"
+    root.mkdir()
+    (root / "a.py").write_text("a = 1\n")
+    linter = _linter(root, tmp_path / "m.json", FakeRunner())
+    linter.run()
+    (root / "pyproject.toml").write_text("[tool.ruff]\nline-length = 80\n")
+    report = linter.run()
+    assert report.manifest_reset and report.files_linted == ["a.py"]
+
+
+def test_default_manifest_path_honours_env(monkeypatch, tmp_path):
+    monkeypatch.setenv("JARVYS_LINT_CACHE", "off")
+    assert default_manifest_path(tmp_path) is None
+    monkeypatch.setenv("JARVYS_LINT_CACHE", str(tmp_path / "cache"))
+    assert default_manifest_path(tmp_path).parent == tmp_path / "cache"
@@ -0,0 +1,96 @@
+import asyncio
+import time
+import types
+
+from jarvys_ai.intelligence_core import IntelligenceCore
+from jarvys_ai.intent_classifier import IntentClassifier
+
+
+class FakeCompletions:
+    def __init__(self, answer):
+        self.answer = answer
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        message = types.SimpleNamespace(content=self.answer)
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+
+def test_classifier_is_fast_and_unsure_on_unknown_commands():
+    clf = IntentClassifier()
+    clf.fit([("email", "email"), ("mail", "email"), ("fichier", "file")])
+    clf.fit([("status", "system"), ("aide", "general")])
+
+    label, confidence, probs = clf.predict("envoie un email à paul")
+    assert label == "email" and confidence > 0.7
+    assert abs(sum(probs.values()) - 1) < 1e-9
+    assert clf.predict("quelle heure est-il")[1] < 0.7
+
+    start = time.perf_counter()
+    for _ in range(100):
+        clf.predict("ouvre le fichier rapport.pdf du dossier projets")
+    assert (time.perf_counter() - start) / 100 < 0.001
+
+
+def test_only_low_confidence_commands_escalate_and_teach_the_classifier():
+    core = IntelligenceCore({"intent_threshold": 0.7})
+    completions = FakeCompletions('{"type": "system", "context": "heure"}')
+    core.openai_client = types.SimpleNamespace(
+        chat=types.SimpleNamespace(completions=completions)
+    )
+
+    async def scenario():
+        confident = await core.analyze_command("envoie un email à paul")
+        unsure = await core.analyze_command("quelle heure est-il")
+        again = await core.analyze_command("quelle heure est-il")
+        return confident, unsure, again
+
+    confident, unsure, again = asyncio.run(scenario())
+    assert confident["type"] == "email" and confident["context"] == "local"
+    assert unsure["type"] == "system" and unsure["context"] == "ai_enhanced"
+    assert (confident["intent_source"], unsure["intent_source"]) == ("local", "llm")
+    # appris du LLM : la même commande est ensuite résolue localement
+    assert again["type"] == "system" and again["context"] == "local"
+    assert completions.calls == 1
+    stats = core.get_stats()["intent"]
+    assert stats["commands"] == 3 and stats["escalated"] == 1
+    assert stats["escalation_rate"] == round(1 / 3, 3)
+    assert stats["avg_llm_ms"] is not None and stats["estimated_saved_ms"] is not None
+
+
+def test_train_from_digital_twin_history():
+    core = IntelligenceCore()
+    history = [
+        {
+            "command": "planifie une réunion demain",
+            "intent": "general",
+            "intent_source": "explicit",
+        },
+        {
+            "command": "déploie la nouvelle version",
+            "intent": "cloud",
+            "intent_source": "llm",
+        },
+        {"command": "sans étiquette", "intent": None, "intent_source": "llm"},
+        # prédictions du classifieur ou des mots-clés : non réapprises
+        {
+            "command": "déploie sur le disque",
+            "intent": "file",
+            "intent_source": "local",
+        },
+        {
+            "command": "version du fichier",
+            "intent": "file",
+            "intent_source": "keywords",
+        },
+        {"command": "ancien format", "intent": "file"},
+    ]
+    assert core.train_from_history(history) == 2
+    label, _, _ = core.intent_classifier.predict("déploie la version 2")
+    assert label == "cloud"
+
+    # sans LLM, une commande incertaine retombe sur les mots-clés
+    analysis = asyncio.run(core.analyze_command("xyz"))
+    assert analysis["type"] == "general"
+    assert core.get_intent_stats()["escalation_rate"] == 0.0
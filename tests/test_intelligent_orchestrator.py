@@ -0,0 +1,172 @@
+import pytest
+
+from jarvys_dev import intelligent_orchestrator as io_mod
+from jarvys_dev.intelligent_orchestrator import (
+    IntelligentOrchestrator,
+    TaskAnalysis,
+    TaskFeatureExtractor,
+)
+
+
+def _legacy_analysis(prompt: str, task_type: str = "auto") -> TaskAnalysis:
+    """Reference implementation: one ``prompt.lower()`` scan per signal."""
+    low = prompt.lower()
+    if task_type == "auto":
+        task_type = next(
+            (
+                name
+                for name, kws in io_mod.TASK_TYPE_KEYWORDS
+                if any(kw in low for kw in kws)
+            ),
+            "general",
+        )
+    complex_count = sum(1 for w in io_mod.COMPLEX_KEYWORDS if w in low)
+    complexity = (
+        min(len(prompt) / 2000, 1.0)
+        + min(complex_count / 5, 1.0)
+        + min(prompt.count("?") / 5, 1.0)
+    ) / 3
+    if task_type in ["creative", "writing"]:
+        creativity = 0.9
+    elif task_type in ["coding", "mathematical"]:
+        creativity = 0.3
+    elif any(kw in low for kw in io_mod.CREATIVE_KEYWORDS):
+        creativity = 0.8
+    else:
+        creativity = 0.5
+    if task_type in ["mathematical", "reasoning", "coding"]:
+        reasoning = 0.9
+    elif any(kw in low for kw in io_mod.REASONING_KEYWORDS):
+        reasoning = 0.8
+    else:
+        reasoning = 0.6
+    if task_type == "fast":
+        speed = 0.9
+    elif any(kw in low for kw in io_mod.URGENT_KEYWORDS):
+        speed = 0.8
+    elif any(kw in low for kw in io_mod.THOROUGH_KEYWORDS):
+        speed = 0.2
+    else:
+        speed = 0.5
+    return TaskAnalysis(
+        task_type=task_type,
+        complexity=complexity,
+        creativity_needed=creativity,
+        reasoning_needed=reasoning,
+        speed_priority=speed,
+        multimodal_needed=any(kw in low for kw in io_mod.MULTIMODAL_KEYWORDS),
+        estimated_tokens=int(len(prompt.split()) * 1.3),
+    )
+
+
+@pytest.fixture
+def orchestrator(monkeypatch):
+    monkeypatch.setattr(
+        IntelligentOrchestrator, "_load_from_huggingface", lambda self: None
+    )
+    return IntelligentOrchestrator()
+
+
+PROMPTS = [
+    "",
+    "Hello there",
+    "Write a Python FUNCTION to debug this script",
+    "Solve this equation?? And this one?",
+    "Please show me the results",  # "how" dans "show"
+    "Create an original poem about the sea",
+    "Give me a brief summary, quickly",
+    "Draw a diagram and a chart from this photo",
+    "A detailed, thorough and comprehensive architecture analysis",
+    "Urgent: I need this now!",
+    "Explain\tthe\nsynthesis   of optimization algorithms",
+    "ÉCRIRE une Histoire créative et unique",
+]
+
+
+@pytest.mark.parametrize("prompt", PROMPTS)
+def test_analyze_task_matches_legacy_scans(orchestrator, prompt):
+    assert orchestrator.analyze_task(prompt) == _legacy_analysis(prompt)
+
+
+@pytest.mark.parametrize("task_type", ["coding", "creative", "fast", "general"])
+def test_explicit_task_type_is_kept(orchestrator, task_type):
+    prompt = "Why is this quick code so creative?"
+    analysis = orchestrator.analyze_task(prompt, task_type)
+    assert analysis.task_type == task_type
+    assert analysis == _legacy_analysis(prompt, task_type)
+
+
+def test_extractor_on_long_prompt():
+    words = ["lorem", "ipsum", "dolor", "sit", "amet"] * 2000
+    prompt = " ".join(words + ["Diagram?"])
+    features = TaskFeatureExtractor().extract(prompt)
+    assert features.task_type == "multimodal"
+    assert features.multimodal
+    assert features.word_count == 10_001
+    assert features.question_count == 1
+    orchestrator = IntelligentOrchestrator.__new__(IntelligentOrchestrator)
+    assert orchestrator.analyze_task(prompt) == _legacy_analysis(prompt)
+
+
+def _analyses():
+    for task_type in ["coding", "creative", "reasoning", "fast", "multimodal", "x"]:
+        for complexity in (0.1, 0.6):
+            for multimodal in (False, True):
+                yield TaskAnalysis(
+                    task_type=task_type,
+                    complexity=complexity,
+                    creativity_needed=0.5,
+                    reasoning_needed=0.9,
+                    speed_priority=0.2 if complexity > 0.5 else 0.9,
+                    multimodal_needed=multimodal,
+                    estimated_tokens=100,
+                )
+
+
+def test_vectorized_selection_matches_loop(orchestrator):
+    orchestrator.record_performance("gpt-4o", "coding", 0.0, 1.0, 0.01)
+    orchestrator.record_performance("claude-sonnet-4", "coding", 1.0, 1.0, 0.01)
+    for analysis in _analyses():
+        _, model, score = orchestrator.select_optimal_model(analysis)
+        _, _, loop_score = orchestrator._select_by_loop(analysis)
+        assert score == pytest.approx(loop_score)
+        assert orchestrator._calculate_model_score(model, analysis) == pytest.approx(
+            loop_score
+        )
+
+
+def test_history_bonus_uses_last_window(orchestrator):
+    for _ in range(io_mod.HISTORY_WINDOW):
+        orchestrator.record_performance("gpt-4o", "coding", 0.0, 1.0, 0.01)
+    assert orchestrator._get_historical_performance("gpt-4o") == pytest.approx(-0.05)
+
+    orchestrator.select_optimal_model(next(_analyses()))  # construit l'index
+    for _ in range(io_mod.HISTORY_WINDOW):
+        orchestrator.record_performance("gpt-4o", "coding", 1.0, 1.0, 0.01)
+    assert orchestrator._get_historical_performance("gpt-4o") == pytest.approx(0.05)
+    index = orchestrator._score_index
+    assert index["history_bonus"][index["rows"]["gpt-4o"]] == pytest.approx(0.05)
+
+
+def test_performance_history_is_bounded(orchestrator):
+    for i in range(io_mod.HISTORY_LIMIT + 5):
+        orchestrator.record_performance("gpt-4o", "coding", 1.0, float(i), 0.0)
+    assert len(orchestrator.performance_history) == io_mod.HISTORY_LIMIT
+    assert orchestrator.performance_history[0]["latency"] == 5.0
+
+
+def test_loop_fallback_without_numpy(orchestrator, monkeypatch):
+    analysis = next(_analyses())
+    expected = orchestrator.select_optimal_model(analysis)
+    monkeypatch.setattr(io_mod, "np", None)
+    name, _, score = orchestrator.select_optimal_model(analysis)
+    assert name == expected[0]
+    assert score == pytest.approx(expected[2])
+
+
+def test_score_index_rebuilt_when_models_change(orchestrator):
+    analysis = next(_analyses())
+    orchestrator.select_optimal_model(analysis)
+    orchestrator.models_db = {"solo": orchestrator.models_db["gpt-4o"]}
+    name, _, _ = orchestrator.select_optimal_model(analysis)
+    assert name == "solo"
@@ -0,0 +1,98 @@
+import json
+import time
+
+from jarvys_dev.log_spool import SpoolWriter, iter_json_records
+
+
+class FakeSink:
+    def __init__(self):
+        self.calls = []
+        self.down = False
+        self.reject = set()
+
+    def __call__(self, table, rows):
+        if self.down:
+            raise ConnectionError("supabase down")
+        if any(row.get("id") in self.reject for row in rows):
+            raise ValueError("bad row")
+        self.calls.append((table, [row["id"] for row in rows]))
+
+
+def test_records_are_flushed_in_bulk_per_table(tmp_path):
+    sink = FakeSink()
+    writer = SpoolWriter(sink, tmp_path / "spool.jsonl", autostart=False)
+    for i in range(3):
+        writer.enqueue("orchestrator_logs", {"id": i})
+    writer.enqueue("jarvys_memory", {"id": 9})
+    writer.enqueue("orchestrator_logs", {"id": 3, "extra": True})
+
+    assert writer.flush() == 5
+    assert sink.calls == [
+        ("orchestrator_logs", [0, 1, 2]),
+        ("jarvys_memory", [9]),
+        ("orchestrator_logs", [3]),  # jeu de colonnes différent
+    ]
+    metrics = writer.metrics()
+    assert metrics["queue_depth"] == 0 and metrics["flushed"] == 5
+    assert metrics["flushes"] == 1 and metrics["avg_flush_latency"] >= 0
+
+
+def test_outage_keeps_records_and_restart_replays(tmp_path):
+    path = tmp_path / "spool.jsonl"
+    sink = FakeSink()
+    writer = SpoolWriter(sink, path, batch_size=2, autostart=False)
+    writer.enqueue("t", {"id": 1})
+    writer.flush()
+    sink.down = True
+    writer.enqueue("t", {"id": 2})
+    writer.enqueue("t", {"id": 3})
+    assert writer.flush() == 0
+    assert writer.metrics()["consecutive_failures"] == 1
+    writer._fh.close()  # arrêt brutal sans flush
+    with open(path, "ab") as fh:
+        fh.write(b'{"table": "t", "rec')  # ligne partielle
+
+    restarted = FakeSink()
+    writer = SpoolWriter(restarted, path, autostart=False)
+    assert writer.metrics()["replayed"] == 2
+    assert writer.flush() == 2
+    assert restarted.calls == [("t", [2, 3])]
+
+
+def test_rejected_rows_go_to_dead_letter(tmp_path):
+    sink = FakeSink()
+    sink.reject = {2}
+    dead = tmp_path / "local_logs.json"
+    writer = SpoolWriter(sink, None, dead_letter=dead, autostart=False)
+    for i in range(4):
+        writer.enqueue("t", {"id": i, "task": f"task {i}"})
+    assert writer.flush() == 4
+    assert sink.calls == [("t", [0]), ("t", [1]), ("t", [3])]
+    (record,) = [json.loads(line) for line in dead.read_text().splitlines()]
+    assert record["id"] == 2 and record["_table"] == "t"
+    assert writer.metrics()["dead_lettered"] == 1
+
+
+def test_background_thread_flushes_on_interval(tmp_path):
+    sink = FakeSink()
+    writer = SpoolWriter(sink, tmp_path / "s.jsonl", flush_interval=0.05)
+    writer.enqueue("t", {"id": 1})
+    deadline = time.time() + 2
+    while not sink.calls and time.time() < deadline:
+        time.sleep(0.01)
+    writer.close()
+    assert sink.calls == [("t", [1])]
+
+
+def test_spool_is_compacted_once_flushed(tmp_path):
+    path = tmp_path / "s.jsonl"
+    writer = SpoolWriter(FakeSink(), path, compact_bytes=1, autostart=False)
+    writer.enqueue("t", {"id": 1})
+    writer.flush()
+    assert path.stat().st_size == 0
+    assert writer.metrics()["spool_bytes"] == 0
+
+
+def test_iter_json_records_reads_legacy_concatenated_objects():
+    text = '{"task": "a"}{"task": "b"}\n{"task": "c"}\nnoise\n{"task": "d'
+    assert [r["task"] for r in iter_json_records(text)] == ["a", "b", "c"]
@@ -0,0 +1,175 @@
+from unittest import mock
+
+import numpy as np
+
+from jarvys_dev.tools.memory_infinite import RECALL_RPC, JarvysInfiniteMemory
+
+
+def _memory():
+    memory = JarvysInfiniteMemory.__new__(JarvysInfiniteMemory)
+    memory.agent_name = "JARVYS_DEV"
+    memory.user_context = "test"
+    memory.openai_client = mock.Mock()
+    memory.openai_client.embeddings.create.return_value = mock.Mock(
+        data=[mock.Mock(embedding=[1.0, 0.0])]
+    )
+    memory.supabase = mock.Mock()
+    memory.local_store = None
+    return memory
+
+
+def test_recall_uses_server_side_rpc():
+    memory = _memory()
+    memory.supabase.rpc.return_value.execute.return_value = mock.Mock(
+        data=[{"content": "old but relevant", "similarity": 0.97}]
+    )
+
+    hits = memory.recall("query", memory_types=["knowledge"], min_importance=0.3)
+
+    assert [h["content"] for h in hits] == ["old but relevant"]
+    name, params = memory.supabase.rpc.call_args.args
+    assert name == RECALL_RPC
+    assert params["user_ctx"] == "test"
+    assert params["memory_types"] == ["knowledge"]
+    assert params["min_importance"] == 0.3
+    assert params["match_count"] == 10
+    memory.supabase.table.assert_not_called()
+
+
+def test_recall_falls_back_to_vectorized_ranking():
+    memory = _memory()
+    memory.supabase.rpc.side_effect = RuntimeError("function does not exist")
+    rows = [
+        {"content": "recent", "embedding": "[0.0, 1.0]"},
+        {"content": "relevant", "embedding": [0.9, 0.1]},
+        {"content": "no vector", "embedding": None},
+    ]
+    query = memory.supabase.table.return_value.select.return_value
+    query = query.eq.return_value.gte.return_value
+    query.order.return_value.limit.return_value.execute.return_value = mock.Mock(
+        data=rows
+    )
+
+    hits = memory.recall("query", limit=1)
+
+    assert [h["content"] for h in hits] == ["relevant"]
+    assert hits[0]["similarity"] > 0.9
+
+
+def test_transient_rpc_error_does_not_scan_the_table():
+    memory = _memory()
+    memory.supabase.rpc.return_value.execute.side_effect = ConnectionError("reset")
+
+    assert memory.recall("query") == []
+    memory.supabase.table.assert_not_called()
+
+
+def test_transient_rpc_error_falls_back_to_the_local_store(tmp_path):
+    from jarvys_dev.tools.local_vector_store import LocalVectorStore
+
+    memory = _memory()
+    memory.supabase.table.return_value.insert.return_value.execute.side_effect = (
+        ConnectionError("down")
+    )
+    memory.supabase.rpc.return_value.execute.side_effect = ConnectionError("down")
+    memory.local_store = LocalVectorStore(tmp_path, dim=2)
+
+    assert memory.memorize("saved offline") is True
+    hits = memory.recall("query")
+    assert [h["content"] for h in hits] == ["saved offline"]
+    memory.supabase.table.return_value.select.assert_not_called()
+
+
+def test_local_store_ivf_search_and_persistence(tmp_path):
+    from jarvys_dev.tools.local_vector_store import LocalVectorStore
+
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(300, 8)).astype(np.float32)
+    records = [
+        {"content": f"m{i}", "user_context": "u", "memory_type": "knowledge"}
+        for i in range(300)
+    ]
+    store = LocalVectorStore(tmp_path, dim=8, ivf_min_rows=100, nprobe=4)
+    store.add(records, vectors)
+    assert store.stats()["ivf_lists"] == 17  # sqrt(300)
+
+    hits = store.search(vectors[42], user_context="u", limit=3)
+    assert hits[0]["content"] == "m42"
+    assert hits[0]["similarity"] > 0.99
+    assert store.search(vectors[42], user_context="other") == []
+
+    reopened = LocalVectorStore(tmp_path, dim=8, ivf_min_rows=100, nprobe=4)
+    assert len(reopened) == 300
+    assert reopened.search(vectors[7], user_context="u", limit=1)[0]["content"] == (
+        "m7"
+    )
+
+
+def test_offline_memorize_recall_then_sync(tmp_path):
+    from jarvys_dev.tools.local_vector_store import LocalVectorStore
+
+    memory = _memory()
+    memory.local_store = LocalVectorStore(tmp_path, dim=2)
+    memory._last_sync = 0.0
+    memory.supabase = None
+
+    assert memory.memorize("offline fact", memory_type="knowledge") is True
+    hits = memory.recall("fact")
+    assert [h["content"] for h in hits] == ["offline fact"]
+    assert memory.get_memory_stats()["pending_sync"] == 1
+
+    memory.supabase = mock.Mock()
+    assert memory.sync_local_memory() == 1
+    rows = memory.supabase.table.return_value.upsert.call_args.args[0]
+    assert rows[0]["content"] == "offline fact"
+    assert memory.local_store.pending_count() == 0
+
+
+def _add_from_process(root, worker, count):
+    from jarvys_dev.tools.local_vector_store import LocalVectorStore
+
+    store = LocalVectorStore(root, dim=4)
+    for i in range(count):
+        vector = np.zeros(4, dtype=np.float32)
+        vector[worker] = 1.0
+        vector[3] = i / count  # distinct par écriture
+        store.add([{"content": f"w{worker}-{i}", "user_context": "u"}], [vector])
+
+
+def test_local_store_rows_stay_aligned_across_processes(tmp_path):
+    import multiprocessing
+
+    from jarvys_dev.tools.local_vector_store import LocalVectorStore
+
+    ctx = multiprocessing.get_context("fork")
+    procs = [
+        ctx.Process(target=_add_from_process, args=(tmp_path, w, 40)) for w in (0, 1)
+    ]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join(30)
+        assert proc.exitcode == 0
+
+    store = LocalVectorStore(tmp_path, dim=4)
+    assert len(store) == 80
+    vectors = store._vectors()
+    for row, record in enumerate(store._fetch(list(range(80)))):
+        worker, i = map(int, record["content"][1:].split("-"))
+        expected = np.zeros(4, dtype=np.float32)
+        expected[worker], expected[3] = 1.0, i / 40
+        expected /= np.linalg.norm(expected)
+        assert np.allclose(vectors[row], expected), (row, record["content"])
+
+
+def test_memorize_reports_failure_when_no_copy_was_saved(tmp_path):
+    memory = _memory()
+    memory.supabase.table.return_value.insert.return_value.execute.side_effect = (
+        ConnectionError("down")
+    )
+    memory.local_store = mock.Mock()
+    memory.local_store.add.side_effect = OSError("disk full")
+
+    assert memory.memorize("fact") is False
+    memory.local_store.add.side_effect = None
+    assert memory.memorize("fact") is True
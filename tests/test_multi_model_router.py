@@ -28,10 +28,11 @@ def test_router_fallback_to_gemini(monkeypatch):
     dummy_model = mock.Mock()
     dummy_model.generate_content.return_value = DummyResp("gemini")
     dummy_generation_config = mock.Mock()
-    dummy_types = types.SimpleNamespace(
-        GenerationConfig=lambda temperature=None,
-        max_output_tokens=None: dummy_generation_config,
-    )
+
+    def generation_config(temperature=None, max_output_tokens=None):
+        return dummy_generation_config
+
+    dummy_types = types.SimpleNamespace(GenerationConfig=generation_config)
     dummy_module = types.SimpleNamespace(
         configure=lambda api_key=None: None,
         GenerativeModel=lambda name: dummy_model,
@@ -78,3 +79,226 @@ def test_router_fallback_to_anthropic(monkeypatch):
     # Let's just verify that anthropic was eventually called
     anthropic_dummy.messages.create.assert_called_once()
     anthropic_dummy.messages.create.assert_called_once()
+
+
+def test_agenerate_many_bounds_provider_concurrency(monkeypatch):
+    """Async generation uses the async client and caps in-flight requests."""
+    import asyncio
+
+    in_flight = 0
+    peak = 0
+
+    async def fake_create(**kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return DummyResp(kwargs["messages"][0]["content"])
+
+    async_dummy = mock.Mock()
+    async_dummy.chat.completions.create = fake_create
+    monkeypatch.setattr(
+        "jarvys_dev.multi_model_router.OpenAI", lambda api_key=None: mock.Mock()
+    )
+    monkeypatch.setattr(
+        "jarvys_dev.multi_model_router.AsyncOpenAI",
+        lambda api_key=None: async_dummy,
+    )
+    monkeypatch.setenv("OPENAI_API_KEY", "k")
+    monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    from jarvys_dev.multi_model_router import MultiModelRouter
+
+    router = MultiModelRouter(max_concurrency=3)
+    prompts = [f"write code {i}" for i in range(10)]
+    out = asyncio.run(router.agenerate_many(prompts, task_type="coding"))
+    assert out == prompts
+    assert peak == 3
+
+
+def test_agenerate_hedged_races_backup_and_cancels_loser(monkeypatch):
+    """A slow primary is overtaken by the backup fired after the hedge delay."""
+    import asyncio
+
+    cancelled = []
+
+    async def slow_openai(**kwargs):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append("openai")
+            raise
+        return DummyResp("openai")
+
+    async def fast_anthropic(**kwargs):
+        return DummyResp("anthropic")
+
+    openai_dummy = mock.Mock()
+    openai_dummy.chat.completions.create = slow_openai
+    anthropic_dummy = mock.Mock()
+    anthropic_dummy.messages.create = fast_anthropic
+    monkeypatch.setattr(
+        "jarvys_dev.multi_model_router.OpenAI", lambda api_key=None: mock.Mock()
+    )
+    monkeypatch.setattr(
+        "jarvys_dev.multi_model_router.AsyncOpenAI",
+        lambda api_key=None: openai_dummy,
+    )
+    monkeypatch.setattr(
+        "jarvys_dev.multi_model_router.Anthropic",
+        lambda api_key=None: mock.Mock(),
+        raising=False,
+    )
+    monkeypatch.setattr(
+        "jarvys_dev.multi_model_router.AsyncAnthropic",
+        lambda api_key=None: anthropic_dummy,
+        raising=False,
+    )
+    monkeypatch.setenv("OPENAI_API_KEY", "k")
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "a")
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    from jarvys_dev.multi_model_router import Benchmark, MultiModelRouter
+
+    router = MultiModelRouter(hedged=True)
+    router.hedge_default_delay = 10.0
+    # p95 history of the primary decides when the backup is fired
+    router.benchmarks = [Benchmark(model="gpt-4o", latency=0.01) for _ in range(20)]
+    plan = [("openai", "gpt-4o"), ("anthropic", "claude-sonnet-4-20250514")]
+    monkeypatch.setattr(router, "_hedge_plan", lambda *a: plan)
+
+    out = asyncio.run(router.agenerate("debug this code", task_type="coding"))
+    assert out == "anthropic"
+    assert cancelled == ["openai"]
+    assert router.benchmarks[-1].model == "claude-sonnet-4-20250514"
+
+
+@mock.patch.dict("os.environ", {"OPENAI_API_KEY": "k"})
+def test_router_serves_repeated_prompt_from_cache(monkeypatch):
+    dummy = mock.Mock()
+    dummy.chat.completions.create.return_value = DummyResp("plan")
+    monkeypatch.setattr(
+        "jarvys_dev.multi_model_router.OpenAI", lambda api_key=None: dummy
+    )
+    from jarvys_dev.multi_model_router import MultiModelRouter
+
+    router = MultiModelRouter()
+    assert router.generate("Plan how to handle: x", task_type="coding") == "plan"
+    assert router.generate("Plan how to  handle: x", task_type="coding") == "plan"
+    dummy.chat.completions.create.assert_called_once()
+    stats = router.get_cache_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+@mock.patch.dict("os.environ", {"OPENAI_API_KEY": "k"})
+def test_hedge_delay_falls_back_to_persisted_histogram(monkeypatch):
+    monkeypatch.setattr(
+        "jarvys_dev.multi_model_router.OpenAI", lambda api_key=None: mock.Mock()
+    )
+    from jarvys_dev.multi_model_router import MultiModelRouter
+    from jarvys_dev.performance_stats import PerformanceStore
+
+    router = MultiModelRouter()
+    router.hedge_default_delay = 10.0
+    assert router._hedge_delay("gpt-4o") == 10.0
+
+    store = PerformanceStore()  # en mémoire seulement
+    for _ in range(50):
+        store.record("gpt-4o", "coding", 1.0, 0.8, 0.0)
+    monkeypatch.setattr(router.orchestrator, "stats_store", store)
+    assert 0.8 <= router._hedge_delay("gpt-4o") < 0.9
+
+
+def _stream_router(monkeypatch, openai_dummy, anthropic_dummy=None):
+    monkeypatch.setattr(
+        "jarvys_dev.multi_model_router.OpenAI", lambda api_key=None: mock.Mock()
+    )
+    monkeypatch.setattr(
+        "jarvys_dev.multi_model_router.AsyncOpenAI",
+        lambda api_key=None: openai_dummy,
+    )
+    monkeypatch.setenv("OPENAI_API_KEY", "k")
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    if anthropic_dummy is None:
+        monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+    else:
+        monkeypatch.setattr(
+            "jarvys_dev.multi_model_router.Anthropic",
+            lambda api_key=None: mock.Mock(),
+            raising=False,
+        )
+        monkeypatch.setattr(
+            "jarvys_dev.multi_model_router.AsyncAnthropic",
+            lambda api_key=None: anthropic_dummy,
+            raising=False,
+        )
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "a")
+    from jarvys_dev.multi_model_router import MultiModelRouter
+
+    return MultiModelRouter()
+
+
+def _collect(agen):
+    import asyncio
+
+    async def run():
+        return [delta async for delta in agen]
+
+    return asyncio.run(run())
+
+
+def test_astream_yields_openai_deltas_and_records_ttft(monkeypatch):
+    async def chunks(texts):
+        for text in texts:
+            yield types.SimpleNamespace(
+                choices=[
+                    types.SimpleNamespace(delta=types.SimpleNamespace(content=text))
+                ]
+            )
+
+    async def fake_create(**kwargs):
+        assert kwargs["stream"] is True
+        return chunks(["def ", None, "f():", " pass"])
+
+    openai_dummy = mock.Mock()
+    openai_dummy.chat.completions.create = fake_create
+    router = _stream_router(monkeypatch, openai_dummy)
+
+    prompt = "write code for f"
+    assert _collect(router.astream(prompt, task_type="coding")) == [
+        "def ",
+        "f():",
+        " pass",
+    ]
+    bench = router.benchmarks[-1]
+    assert bench.ttft is not None and bench.ttft <= bench.latency
+    # la réponse complète est mise en cache pour les appels suivants
+    assert _collect(router.astream(prompt, task_type="coding")) == ["def f(): pass"]
+
+
+def test_astream_falls_back_when_provider_fails_before_first_delta(monkeypatch):
+    async def failing_create(**kwargs):
+        raise ConnectionError("down")
+
+    class FakeStream:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        @property
+        async def text_stream(self):
+            for text in ("from ", "claude"):
+                yield text
+
+    openai_dummy = mock.Mock()
+    openai_dummy.chat.completions.create = failing_create
+    anthropic_dummy = mock.Mock()
+    anthropic_dummy.messages.stream = lambda **kwargs: FakeStream()
+    router = _stream_router(monkeypatch, openai_dummy, anthropic_dummy)
+
+    out = _collect(router.astream("debug this code", task_type="coding"))
+    assert out == ["from ", "claude"]
+    assert router.benchmarks[-1].model == "claude-sonnet-4-20250514"
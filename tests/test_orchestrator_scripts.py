@@ -0,0 +1,35 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.mark.parametrize("script", ["grok_orchestrator", "orchestrator_monitor"])
+def test_scripts_import_without_src_on_the_path(script, tmp_path):
+    for name in ("langgraph", "google.oauth2", "supabase", "typing_extensions"):
+        pytest.importorskip(name)
+    # dépôts déjà présents : pas de clonage à l'import
+    for repo in ("appia-dev", "appIA"):
+        (tmp_path / repo).mkdir()
+    env = {key: value for key, value in os.environ.items() if key != "PYTHONPATH"}
+    env.update(
+        PYTHONPATH=str(ROOT),  # comme « python grok_orchestrator.py » : pas de src/
+        GH_TOKEN="test-token",
+        HOME=str(tmp_path),
+        WORKSPACE_DIR=str(tmp_path),
+        GIT_CEILING_DIRECTORIES=str(tmp_path),
+        GIT_TERMINAL_PROMPT="0",
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", f"import {script}"],
+        cwd=tmp_path,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
@@ -0,0 +1,123 @@
+import time
+
+import pytest
+
+from jarvys_dev import performance_stats as ps
+from jarvys_dev.intelligent_orchestrator import IntelligentOrchestrator
+from jarvys_dev.performance_stats import (
+    PerformanceStats,
+    PerformanceStore,
+    bucket_upper_bound,
+    get_performance_store,
+    latency_bucket,
+)
+
+
+@pytest.mark.parametrize("latency", [0.0004, 0.001, 0.0137, 0.25, 1.0, 7.3, 600.0])
+def test_bucket_bounds_latency_within_relative_error(latency):
+    upper = bucket_upper_bound(latency_bucket(latency))
+    assert upper >= latency
+    assert upper <= max(latency * (1 + 1 / ps.HIST_SUB_BUCKETS), 0.001) + 1e-12
+
+
+def test_stats_ewma_and_quantiles():
+    stats = PerformanceStats()
+    for latency in [0.1] * 90 + [2.0] * 10:
+        stats.add(1.0, latency, 0.01)
+    stats.add(0.0, 0.1, 0.01)
+    assert stats.count == 101
+    assert stats.ewma_success == pytest.approx(0.9)
+    assert 0.1 <= stats.quantile(0.5) < 0.12
+    assert 2.0 <= stats.quantile(0.95) < 2.3
+    assert stats.as_dict()["success_rate"] == pytest.approx(100 / 101)
+
+
+def test_store_persists_and_reloads(tmp_path):
+    path = tmp_path / "stats.sqlite"
+    store = PerformanceStore(path, flush_interval=3600)
+    store.record("gpt-4o", "coding", 1.0, 0.5, 0.02)
+    store.record("gpt-4o", "reasoning", 0.0, 1.5, 0.03)
+    assert store.flush() == 2
+    assert store.flush() == 0  # plus rien de sale
+    store.close()
+
+    reloaded = PerformanceStore(path)
+    assert len(reloaded) == 2
+    coding = reloaded.get("gpt-4o", "coding")
+    assert coding.count == 1 and coding.ewma_latency == pytest.approx(0.5)
+    assert reloaded.model_success("gpt-4o") == pytest.approx(0.5)
+    assert reloaded.latency_quantile("gpt-4o", 1.0) >= 1.5
+    assert reloaded.latency_quantile("unknown", 0.5) is None
+
+
+def test_store_flushes_periodically(tmp_path):
+    store = PerformanceStore(tmp_path / "s.sqlite", flush_interval=0)
+    store.record("m", "t", 1.0, 0.1, 0.0)
+    assert not store._dirty
+
+
+def test_background_thread_flushes_without_new_records(tmp_path):
+    store = PerformanceStore(tmp_path / "s.sqlite", flush_interval=0.05)
+    store.record("m", "t", 1.0, 0.1, 0.0)
+    deadline = time.monotonic() + 5
+    while store._dirty and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not store._dirty and store._thread.daemon
+    store.close()
+
+
+def test_record_leaves_flushing_to_the_background_thread(tmp_path, monkeypatch):
+    store = PerformanceStore(tmp_path / "s.sqlite", flush_interval=3600)
+    store.record("m", "t", 1.0, 0.1, 0.0)
+    flushes = []
+    monkeypatch.setattr(store, "flush", lambda: flushes.append(1))
+    store._last_flush -= 7200  # intervalle écoulé
+    store.record("m", "t", 1.0, 0.1, 0.0)
+    assert store._thread is not None and flushes == []
+
+
+def test_processes_sharing_the_file_add_up_their_counters(tmp_path):
+    path = tmp_path / "stats.sqlite"
+    first = PerformanceStore(path, flush_interval=3600)
+    second = PerformanceStore(path, flush_interval=3600)
+    first.record("m", "coding", 1.0, 0.1, 0.01)
+    second.record("m", "coding", 0.0, 2.0, 0.02)
+    second.record("m", "coding", 1.0, 2.0, 0.02)
+    first.flush()
+    second.flush()
+    first.record("m", "coding", 1.0, 0.1, 0.01)
+    first.flush()
+
+    merged = first.get("m", "coding")
+    assert merged.count == 4 and merged.success_total == 3.0
+    assert merged.total_cost == pytest.approx(0.06)
+    assert sum(merged.histogram) == 4
+    assert first.latency_quantile("m", 1.0, "coding") >= 2.0
+    first.close()
+    second.close()
+    assert PerformanceStore(path).get("m", "coding").count == 4
+
+
+def test_get_performance_store_disabled_by_env(monkeypatch, tmp_path):
+    assert get_performance_store() is None  # désactivé par conftest
+    monkeypatch.setenv("JARVYS_PERF_STATS", str(tmp_path / "p.sqlite"))
+    assert isinstance(get_performance_store(), PerformanceStore)
+
+
+def test_orchestrator_uses_persisted_stats(monkeypatch, tmp_path):
+    path = tmp_path / "stats.sqlite"
+    store = PerformanceStore(path)
+    for _ in range(20):
+        store.record("gpt-4o", "coding", 1.0, 0.4, 0.01)
+    store.close()
+
+    monkeypatch.setenv("JARVYS_PERF_STATS", str(path))
+    monkeypatch.setattr(
+        IntelligentOrchestrator, "_load_from_huggingface", lambda self: None
+    )
+    orchestrator = IntelligentOrchestrator()
+    assert orchestrator._get_historical_performance("gpt-4o") == pytest.approx(0.05)
+    assert "gpt-4o/coding" in orchestrator.get_orchestrator_stats()["routing_stats"]
+
+    orchestrator.record_performance("gpt-4o", "coding", 0.0, 3.0, 0.01)
+    assert orchestrator.stats_store.get("gpt-4o", "coding").count == 21
@@ -0,0 +1,107 @@
+import types
+
+from jarvys_dev.prompt_budget import (
+    MIN_CACHEABLE_TOKENS,
+    PromptBuilder,
+    PromptUsageLog,
+    count_tokens,
+    truncate_tokens,
+    usage_from_response,
+)
+
+
+def test_stable_sections_come_first_and_prefix_is_reused():
+    def build(task):
+        return (
+            PromptBuilder("generate_code", budget=1000)
+            .add("task", task)
+            .add("instructions", "Génère du code Python.", stable=True)
+            .add("environment", "Secrets: {}", stable=True)
+            .build()
+        )
+
+    first, second = build("tâche A"), build("tâche B")
+    assert first.text.startswith("Génère du code Python.\n\nSecrets: {}")
+    assert first.prefix == second.prefix and first.suffix != second.suffix
+    assert first.tokens == count_tokens(first.text) and not first.trimmed
+
+
+def test_only_prefixes_long_enough_are_marked_for_caching():
+    short = PromptBuilder("x").add("instructions", "Court.", stable=True).build()
+    assert not short.cacheable
+    assert "cache_control" not in short.anthropic_system()[0]
+
+    long_text = "Instructions détaillées. " * MIN_CACHEABLE_TOKENS
+    long = PromptBuilder("x").add("instructions", long_text, stable=True).build()
+    assert long.prefix_tokens >= MIN_CACHEABLE_TOKENS and long.cacheable
+    assert long.anthropic_system()[0]["cache_control"] == {"type": "ephemeral"}
+
+
+def test_budget_trims_lowest_priority_sections_first():
+    memories = [f"mémoire {i} " + "x" * 300 for i in range(5)]
+    history = ["historique " + "y" * 300]
+    builder = (
+        PromptBuilder("generate_code", budget=320)
+        .add("instructions", "Instructions " * 20, stable=True)
+        .add("task", "Tâche importante")
+        .add("history", history, priority=20)
+        .add("memory", memories, priority=10, header="Mémoires:")
+    )
+    prompt = builder.build()
+
+    assert prompt.tokens <= 320 and not prompt.over_budget
+    assert "Tâche importante" in prompt.text and "Instructions" in prompt.prefix
+    assert "mémoire 0" in prompt.text and "mémoire 4" not in prompt.text
+    assert prompt.trimmed["memory"] > 0 and "history" not in prompt.trimmed
+
+
+def test_untrimmable_sections_may_exceed_budget():
+    prompt = PromptBuilder("x", budget=5).add("code", "z" * 200).build()
+    assert prompt.over_budget and prompt.trimmed == {}
+
+
+def test_truncate_tokens_marks_the_cut():
+    text = "mot " * 100
+    cut = truncate_tokens(text, 10)
+    assert count_tokens(cut) <= 10 and cut.endswith("[…]")
+    assert truncate_tokens("court", 10) == "court"
+
+
+def test_usage_is_read_from_each_provider_shape():
+    anthropic = types.SimpleNamespace(
+        usage=types.SimpleNamespace(
+            input_tokens=100,
+            cache_read_input_tokens=900,
+            cache_creation_input_tokens=0,
+            output_tokens=50,
+        )
+    )
+    openai_rest = {
+        "usage": {
+            "prompt_tokens": 1200,
+            "completion_tokens": 30,
+            "prompt_tokens_details": {"cached_tokens": 1024},
+        }
+    }
+    xai_grpc = types.SimpleNamespace(
+        usage=types.SimpleNamespace(
+            prompt_tokens=500, cached_prompt_text_tokens=256, completion_tokens=5
+        )
+    )
+    gemini_rest = {"usageMetadata": {"promptTokenCount": 40}}
+
+    assert usage_from_response(anthropic).input_tokens == 1000
+    assert usage_from_response(anthropic).cached_tokens == 900
+    assert usage_from_response(openai_rest).cached_tokens == 1024
+    assert usage_from_response(xai_grpc).cached_tokens == 256
+    assert usage_from_response(gemini_rest).input_tokens == 40
+    assert usage_from_response(object()).input_tokens == 0
+
+    log = PromptUsageLog()
+    prompt = PromptBuilder("code_review", budget=100).add("t", "abc").build()
+    log.record("code_review", prompt, usage_from_response(anthropic))
+    log.record("code_review", prompt, usage_from_response(openai_rest))
+    stats = log.stats()["code_review"]
+    assert stats["calls"] == 2 and stats["cached_tokens"] == 1924
+    assert stats["estimated_tokens"] == 2 * prompt.tokens
+    assert stats["cache_hit_ratio"] == round(1924 / 2200, 3)
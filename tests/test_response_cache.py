@@ -0,0 +1,58 @@
+from unittest import mock
+
+from jarvys_dev.response_cache import ResponseCache, normalize_prompt
+
+
+def test_normalize_prompt_collapses_whitespace():
+    assert normalize_prompt("  Plan how\n to   handle: x ") == "Plan how to handle: x"
+
+
+def test_ttl_and_lru_eviction(monkeypatch):
+    clock = mock.Mock(return_value=100.0)
+    monkeypatch.setattr("jarvys_dev.response_cache.time.monotonic", clock)
+    cache = ResponseCache(ttl=10, max_entries=2)
+
+    cache.put("m", "coding", "a", "A", latency=1.5, cost=0.01)
+    cache.put("m", "coding", "b", "B")
+    assert cache.get("m", "coding", "a ") == "A"  # refresh "a"
+    cache.put("m", "coding", "c", "C")  # evicts "b", the LRU entry
+    assert cache.get("m", "coding", "b") is None
+    assert cache.get("m", "reasoning", "a") is None  # task type is part of key
+
+    clock.return_value = 111.0
+    assert cache.get("m", "coding", "a") is None  # expired
+
+    stats = cache.stats.as_dict()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+    assert stats["evictions"] == 1
+    assert stats["saved_latency_s"] == 1.5
+
+
+def test_semantic_tier_reuses_near_duplicate():
+    vectors = {
+        "verify technology updates": [1.0, 0.0, 0.1],
+        "verify the technology updates": [1.0, 0.0, 0.12],
+        "write a poem": [0.0, 1.0, 0.0],
+    }
+    cache = ResponseCache(embed_fn=vectors.__getitem__, semantic_threshold=0.95)
+    cache.put("m", "reasoning", "verify technology updates", "up to date")
+
+    assert cache.get("m", "reasoning", "verify the technology updates") == (
+        "up to date"
+    )
+    assert cache.get("m", "reasoning", "write a poem") is None
+    assert cache.stats.semantic_hits == 1
+
+
+def test_miss_then_put_embeds_the_prompt_once():
+    embed = mock.Mock(side_effect=lambda text: [float(len(text)), 1.0])
+    cache = ResponseCache(embed_fn=embed, semantic_threshold=0.999)
+
+    assert cache.get("m", "coding", "  write   tests ") is None
+    cache.put("m", "coding", "write tests", "done")
+    assert embed.call_count == 1
+
+    assert cache.get("m", "coding", "write tests") == "done"  # exact hit
+    assert cache.get("m", "coding", "write tests!") == "done"  # cosine ~ 1
+    assert embed.call_count == 2 and cache.stats.semantic_hits == 1
@@ -0,0 +1,83 @@
+import sys
+
+import pytest
+
+from jarvys_dev.sandbox import (
+    Candidate,
+    SandboxLimits,
+    SandboxRunner,
+    best_result,
+    extract_python_code,
+)
+
+pytestmark = pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="sandbox Linux uniquement"
+)
+
+TESTS = "from candidate import f\n\ndef test_f():\n    assert f() == 1\n"
+
+
+def _runner(**limits):
+    return SandboxRunner(SandboxLimits(**{"wall_seconds": 20, **limits}))
+
+
+def test_module_and_tests_run_with_measurements(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "secret")
+    code = (
+        "import os\n"
+        "assert 'OPENAI_API_KEY' not in os.environ\n"
+        "def f():\n    return 1\n"
+    )
+    result = _runner().run(Candidate("ok", code, TESTS))
+    assert result.ok, result.errors
+    assert result.tests_passed == 1 and result.tests_failed == 0
+    assert result.wall_time > 0 and result.cpu_time > 0 and result.peak_rss_mb > 0
+    assert result.import_time is not None and result.test_time is not None
+
+
+def test_failures_and_limits_are_reported():
+    failing = _runner().run(Candidate("bad", "def f():\n    return 2\n", TESTS))
+    assert failing.status == "failed" and failing.tests_failed == 1
+    assert failing.errors == ["1 test(s) failed"]
+
+    runner = _runner(cpu_seconds=1, wall_seconds=2, memory_mb=150)
+    results = runner.run_many(
+        [
+            Candidate("spin", "while True:\n    pass\n"),
+            Candidate("sleep", "import time\ntime.sleep(30)\n"),
+            Candidate("hog", "x = bytearray(400 << 20)\nimport time\ntime.sleep(5)\n"),
+            Candidate("syntax", "def (:\n"),
+        ]
+    )
+    assert [r.status for r in results] == [
+        "cpu_limit",
+        "timeout",
+        "memory_limit",
+        "syntax_error",
+    ]
+    assert results[1].wall_time < 5
+    # RLIMIT_AS refuse l'allocation : pas d'attente jusqu'à l'échéance
+    assert results[2].wall_time < 2 and results[2].errors == ["memory limit exceeded"]
+    assert best_result(results) is None
+
+    in_tests = _runner(memory_mb=150).run(
+        Candidate("hog_tests", "x = 1\n", "def test_hog():\n    bytearray(400 << 20)\n")
+    )
+    assert in_tests.status == "memory_limit" and in_tests.tests_failed == 1
+
+
+def test_best_result_and_code_extraction():
+    answer = "Voici:\n```python\ndef f():\n    return 1\n```\nExplications."
+    assert extract_python_code(answer) == "def f():\n    return 1\n"
+    assert extract_python_code("x = 1\n") == "x = 1\n"
+
+    runner = _runner()
+    results = runner.run_many(
+        [
+            Candidate("no_tests", "def f():\n    return 1\n"),
+            Candidate("tested", "def f():\n    return 1\n", TESTS),
+            Candidate("broken", "raise RuntimeError('boom')\n"),
+        ]
+    )
+    assert results[2].errors == ["RuntimeError: boom"]
+    assert best_result(results).name == "tested"
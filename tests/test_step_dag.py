@@ -0,0 +1,140 @@
+import threading
+import time
+
+import pytest
+
+from jarvys_dev.step_dag import Step, StepDAG, merge_dicts, timing_summary
+
+
+def _sleepy(key, value, delay=0.2, log=None):
+    def fn(state):
+        time.sleep(delay)
+        out = {**state, key: value}
+        if log is not None:
+            out["log"] = {key: value}
+        return out
+
+    return fn
+
+
+def test_dependencies_follow_declared_inputs():
+    dag = StepDAG(
+        [
+            Step("lint", _sleepy("lint", True), outputs=("lint",)),
+            Step("identify", _sleepy("task", "t"), outputs=("task",)),
+            Step("generate", _sleepy("code", "c"), ("task",), ("code",)),
+            Step("test", _sleepy("result", "ok"), ("code", "lint"), ("result",)),
+            Step("docs", _sleepy("doc", "d"), ("task", "code"), ("doc",)),
+        ]
+    )
+    assert dag.dependencies("lint") == ()
+    assert dag.dependencies("identify") == ()
+    assert dag.dependencies("test") == ("generate", "lint")
+    assert dag.dependencies("docs") == ("identify", "generate")
+
+
+def test_independent_steps_run_concurrently():
+    dag = StepDAG(
+        [
+            Step("lint", _sleepy("lint", True, log=True), outputs=("lint", "log")),
+            Step("identify", _sleepy("task", "t", log=True), outputs=("task", "log")),
+            Step("generate", _sleepy("code", "c"), ("task",), ("code",)),
+            Step("test", _sleepy("result", "ok"), ("code", "lint"), ("result",)),
+            Step("docs", _sleepy("doc", "d"), ("code",), ("doc",)),
+        ],
+        reducers={"log": merge_dicts},
+    )
+    start = time.perf_counter()
+    state, timings = dag.run({"log": {}})
+    elapsed = time.perf_counter() - start
+
+    # 3 niveaux de 0.2 s au lieu de 5 étapes séquentielles
+    assert elapsed < 0.8
+    assert state["result"] == "ok" and state["doc"] == "d"
+    assert state["log"] == {"lint": True, "task": "t"}
+    summary = timing_summary(timings)
+    assert summary["sequential_time"] > summary["wall_time"] + 0.3
+    assert [t["step"] for t in summary["steps"]] == [
+        "lint",
+        "identify",
+        "generate",
+        "test",
+        "docs",
+    ]
+
+
+def test_only_declared_outputs_are_merged_and_state_is_isolated():
+    def mutating(state):
+        state["meta"]["touched"] = True  # mutation locale à l'étape
+        return {**state, "meta": state["meta"], "secret": 1, "a": 1}
+
+    dag = StepDAG([Step("a", mutating, outputs=("a",))])
+    initial = {"meta": {}}
+    state, _ = dag.run(initial)
+    assert state == {"meta": {}, "a": 1}
+    assert initial == {"meta": {}}
+
+
+def test_when_false_skips_step_and_dependents():
+    calls = []
+
+    def record(name):
+        def fn(state):
+            calls.append(name)
+            return {name: True}
+
+        return fn
+
+    dag = StepDAG(
+        [
+            Step("identify", record("task"), outputs=("task",)),
+            Step(
+                "generate",
+                record("code"),
+                ("task",),
+                ("code",),
+                when=lambda s: s.get("task") is None,
+            ),
+            Step("test", record("result"), ("code",), ("result",)),
+        ]
+    )
+    state, timings = dag.run({})
+    assert calls == ["task"]
+    assert [t.status for t in timings] == ["ok", "skipped", "skipped"]
+
+
+def test_failure_waits_for_running_steps_and_reraises():
+    finished = threading.Event()
+
+    def boom(state):
+        raise RuntimeError("boom")
+
+    def slow(state):
+        time.sleep(0.1)
+        finished.set()
+        return {"slow": True}
+
+    dag = StepDAG(
+        [
+            Step("slow", slow, outputs=("slow",)),
+            Step("boom", boom, outputs=("x",)),
+            Step("after", lambda s: {"y": 1}, ("x",), ("y",)),
+        ]
+    )
+    with pytest.raises(RuntimeError, match="boom"):
+        dag.run({})
+    assert finished.is_set()
+    statuses = {t.name: t.status for t in dag.last_timings}
+    assert statuses == {"slow": "ok", "boom": "failed"}
+
+
+def test_duplicate_names_rejected():
+    with pytest.raises(ValueError):
+        StepDAG([Step("a", dict), Step("a", dict)])
+
+
+def test_merge_dicts_is_recursive():
+    assert merge_dicts({"m": {"a": 1}, "k": 1}, {"m": {"b": 2}}) == {
+        "m": {"a": 1, "b": 2},
+        "k": 1,
+    }
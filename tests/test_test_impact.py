@@ -0,0 +1,105 @@
+import subprocess
+
+from jarvys_dev.test_impact import TestImpact, parse_imports
+
+
+def _project(root):
+    (root / "src" / "pkg").mkdir(parents=True)
+    (root / "tests").mkdir()
+    (root / "pytest.ini").write_text("[pytest]\npythonpath = src\n")
+    (root / "src" / "pkg" / "__init__.py").write_text("")
+    (root / "src" / "pkg" / "core.py").write_text("from .util import one\n")
+    (root / "src" / "pkg" / "util.py").write_text("def one():\n    return 1\n")
+    (root / "src" / "pkg" / "other.py").write_text("VALUE = 2\n")
+    (root / "tests" / "test_core.py").write_text(
+        "from pkg.core import one\n\ndef test_core():\n    assert one() == 1\n"
+    )
+    (root / "tests" / "test_other.py").write_text(
+        "from pkg import other\n\ndef test_other():\n    assert other.VALUE == 2\n"
+    )
+
+
+class CountingRunner:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, args, **kwargs):
+        self.calls.append(args)
+        return subprocess.run(args, **kwargs)
+
+
+def test_parse_imports_resolves_relative_imports():
+    source = "import os\nfrom . import util\nfrom ..base import thing\n"
+    assert parse_imports(source, "pkg.sub.mod", False) == [
+        "os",
+        "pkg.sub",
+        "pkg.sub.util",
+        "pkg.base",
+        "pkg.base.thing",
+    ]
+
+
+def test_affected_tests_follow_transitive_imports(tmp_path):
+    _project(tmp_path)
+    impact = TestImpact(tmp_path)
+    assert impact.affected_tests(["src/pkg/util.py"]) == ["tests/test_core.py"]
+    assert impact.affected_tests([tmp_path / "src/pkg/other.py"]) == [
+        "tests/test_other.py"
+    ]
+    # __init__ du paquet exécuté par les deux imports
+    assert len(impact.affected_tests(["src/pkg/__init__.py"])) == 2
+
+
+def test_results_are_cached_until_dependencies_change(tmp_path):
+    _project(tmp_path)
+    cache = tmp_path / "cache.json"
+    runner = CountingRunner()
+
+    result = TestImpact(tmp_path, cache, runner=runner).run()
+    assert result.ok and result.selected == [
+        "tests/test_core.py",
+        "tests/test_other.py",
+    ]
+
+    result = TestImpact(tmp_path, cache, runner=runner).run()
+    assert result.ok and result.selected == [] and len(result.cached) == 2
+    assert len(runner.calls) == 1
+
+    (tmp_path / "src" / "pkg" / "util.py").write_text("def one():\n    return 0\n")
+    result = TestImpact(tmp_path, cache, runner=runner).run()
+    assert result.selected == ["tests/test_core.py"]
+    assert result.failed == ["tests/test_core.py::test_core"]
+    assert result.passed == ["tests/test_other.py"] and not result.ok
+
+    # l'échec est mis en cache lui aussi
+    result = TestImpact(tmp_path, cache, runner=runner).run()
+    assert result.selected == [] and result.failed == ["tests/test_core.py::test_core"]
+    assert len(runner.calls) == 2
+
+
+def test_pytest_crash_is_reported_and_not_cached(tmp_path):
+    _project(tmp_path)
+    cache = tmp_path / "cache.json"
+
+    def crashing(args, **kwargs):
+        return subprocess.CompletedProcess(args, 4, "", "usage error")
+
+    result = TestImpact(tmp_path, cache, runner=crashing).run()
+    assert not result.ok and result.errors == ["pytest exited with 4: usage error"]
+    assert TestImpact(tmp_path, cache).cache["results"] == {}
+
+
+def test_worktrees_share_the_main_repo_cache(tmp_path):
+    main, worktree = tmp_path / "main", tmp_path / "wt-1234"
+    for root in (main, worktree):
+        root.mkdir()
+        _project(root)
+    cache = tmp_path / "cache.json"
+    runner = CountingRunner()
+
+    TestImpact(main, cache, runner=runner).run()
+    # autre checkout, même contenu : résultats repris du cache partagé
+    result = TestImpact(worktree, cache, runner=runner).run()
+    assert result.selected == [] and len(result.cached) == 2
+    assert len(runner.calls) == 1
+    assert [p.name for p in tmp_path.iterdir() if p.suffix == ".tmp"] == []
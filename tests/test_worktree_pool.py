@@ -0,0 +1,71 @@
+import shutil
+import subprocess
+
+import pytest
+
+from jarvys_dev.worktree_pool import CommitQueue, WorktreeManager, WorktreePool
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git missing")
+
+
+def _git(cwd, *args):
+    return subprocess.run(
+        ["git", *args], cwd=cwd, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+@pytest.fixture()
+def repo(tmp_path):
+    path = tmp_path / "repo"
+    path.mkdir()
+    _git(path, "init", "-q", "-b", "main")
+    _git(path, "config", "user.email", "dev@example.com")
+    _git(path, "config", "user.name", "dev")
+    (path / "shared.txt").write_text("base\n")
+    _git(path, "add", ".")
+    _git(path, "commit", "-q", "-m", "init")
+    return path
+
+
+def test_tasks_run_in_separate_worktrees_and_merge(repo, tmp_path):
+    queue = CommitQueue()
+    pool = WorktreePool(3, root=tmp_path / "wt")
+    seen = []
+
+    def task(name, worktree):
+        seen.append(worktree.path)
+        assert worktree.path != repo and (worktree.path / "shared.txt").exists()
+        (worktree.path / f"{name}.txt").write_text(name)
+        return queue.commit_worktree(worktree, f"add {name}").result()
+
+    outcomes = pool.run(repo, ["a", "b", "c"], task)
+    queue.close()
+
+    assert [o.task for o in outcomes] == ["a", "b", "c"]
+    assert all(o.ok and o.result.merged for o in outcomes)
+    assert len(set(seen)) == 3 and not any(p.exists() for p in seen)
+    assert {"a.txt", "b.txt", "c.txt"} <= {p.name for p in repo.iterdir()}
+    # branches fusionnées supprimées, worktrees retirés
+    assert _git(repo, "branch", "--list", "jarvys/*") == ""
+    assert _git(repo, "worktree", "list").count("\n") == 0
+    assert queue.processed == 3
+
+
+def test_conflicting_merge_is_aborted_and_branch_kept(repo, tmp_path):
+    queue = CommitQueue()
+    manager = WorktreeManager(repo, tmp_path / "wt")
+    first, second = manager.create("one"), manager.create("two")
+    (first.path / "shared.txt").write_text("one\n")
+    (second.path / "shared.txt").write_text("two\n")
+
+    ok = queue.commit_worktree(first, "one").result()
+    clash = queue.commit_worktree(second, "two").result()
+    unchanged = queue.submit(repo, "nothing").result()
+    queue.close()
+
+    assert ok.merged and not ok.conflict
+    assert clash.conflict and not clash.merged and clash.committed
+    assert (repo / "shared.txt").read_text() == "one\n"
+    assert _git(repo, "status", "--porcelain") == ""  # merge annulé proprement
+    assert second.branch in _git(repo, "branch", "--list", "jarvys/*")
+    assert unchanged.ok and not unchanged.committed